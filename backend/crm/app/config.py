@@ -17,6 +17,17 @@ class Settings:
     print(POSTGRES_URL)
     MONGO_URL: str = os.getenv("MONGO_URL", "mongodb://localhost:27017/crm_logs")
     print(MONGO_URL)
+    # Serve list endpoints through AsyncSession (asyncpg / aiosqlite)
+    DATABASE_ASYNC: bool = os.getenv("DATABASE_ASYNC", "False").lower() == "true"
+    # Connection pool settings (per worker process; the async engine gets its own pool)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT_SECONDS: float = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+    DB_POOL_RECYCLE_SECONDS: int = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "300"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "True").lower() == "true"
+    # Server-side statement timeout in milliseconds (PostgreSQL only, 0 disables)
+    DB_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+    DB_ECHO: bool = os.getenv("DB_ECHO", "False").lower() == "true"
     # JWT settings
     JWT_SECRET_KEY: str = os.getenv(
         "JWT_SECRET_KEY", "your-super-secret-jwt-key-change-in-production"
@@ -24,6 +35,81 @@ class Settings:
     JWT_ALGORITHM: str = os.getenv("JWT_ALGORITHM", "HS256")
     JWT_EXPIRATION_HOURS: int = int(os.getenv("JWT_EXPIRATION_HOURS", 1))
 
+    # Password hashing (bcrypt cost and the worker pool used by login)
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", 12))
+    # thread | process
+    PASSWORD_HASH_EXECUTOR: str = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", 4))
+    PASSWORD_HASH_MAX_CONCURRENCY: int = int(os.getenv("PASSWORD_HASH_MAX_CONCURRENCY", 8))
+    PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS: float = float(
+        os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS", 5)
+    )
+
+    # Principal cache settings (get_current_user)
+    PRINCIPAL_CACHE_ENABLED: bool = (
+        os.getenv("PRINCIPAL_CACHE_ENABLED", "True").lower() == "true"
+    )
+    PRINCIPAL_CACHE_TTL_SECONDS: int = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", 60))
+    PRINCIPAL_CACHE_MAX_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", 10000))
+
+    # Self-contained tokens: embed role/permissions/department plus token_version
+    JWT_EMBED_CLAIMS: bool = os.getenv("JWT_EMBED_CLAIMS", "False").lower() == "true"
+    TOKEN_VERSION_CACHE_TTL_SECONDS: int = int(
+        os.getenv("TOKEN_VERSION_CACHE_TTL_SECONDS", 5)
+    )
+
+    # Activity/audit log writer (utils/logger.py)
+    LOG_QUEUE_MAX_SIZE: int = int(os.getenv("LOG_QUEUE_MAX_SIZE", 10000))
+    LOG_BATCH_SIZE: int = int(os.getenv("LOG_BATCH_SIZE", 500))
+    LOG_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("LOG_FLUSH_INTERVAL_SECONDS", 1.0))
+    # drop_oldest | block | spill
+    LOG_OVERFLOW_POLICY: str = os.getenv("LOG_OVERFLOW_POLICY", "drop_oldest")
+    LOG_SPILL_PATH: str = os.getenv("LOG_SPILL_PATH", "log_spill.ndjson")
+
+    # Dashboard lead statistics cache (LeadService.get_lead_stats), 0 disables
+    LEAD_STATS_CACHE_TTL_SECONDS: int = int(os.getenv("LEAD_STATS_CACHE_TTL_SECONDS", 30))
+
+    # POT IDs reserved per worker process in one counter-table update
+    POT_ID_BLOCK_SIZE: int = int(os.getenv("POT_ID_BLOCK_SIZE", 50))
+
+    # Typeahead suggest index full rebuild interval (picks up other workers' writes), 0 disables
+    SUGGEST_INDEX_REFRESH_SECONDS: int = int(os.getenv("SUGGEST_INDEX_REFRESH_SECONDS", 300))
+
+    # Cached GET responses (utils/response_cache.py): "memory" (per process) or "redis", 0 TTL disables
+    RESPONSE_CACHE_BACKEND: str = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+    RESPONSE_CACHE_TTL_SECONDS: int = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 60))
+    RESPONSE_CACHE_MAX_SIZE: int = int(os.getenv("RESPONSE_CACHE_MAX_SIZE", 5000))
+    RESPONSE_CACHE_REDIS_URL: str = os.getenv("RESPONSE_CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+    # Bulk lead import (services/lead_import.py): rows per INSERT/commit, per-row errors reported
+    LEAD_IMPORT_CHUNK_SIZE: int = int(os.getenv("LEAD_IMPORT_CHUNK_SIZE", 1000))
+    LEAD_IMPORT_MAX_ERRORS: int = int(os.getenv("LEAD_IMPORT_MAX_ERRORS", 1000))
+
+    # Bulk opportunity transitions: most opportunity ids one request may change
+    OPPORTUNITY_BULK_MAX_ITEMS: int = int(os.getenv("OPPORTUNITY_BULK_MAX_ITEMS", 500))
+
+    # Streaming exports (utils/export.py): rows fetched per server-side cursor batch
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+
+    # Document storage (utils/storage.py): "local" (files under STORAGE_LOCAL_ROOT) or "s3"
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "local")
+    STORAGE_LOCAL_ROOT: str = os.getenv("STORAGE_LOCAL_ROOT", "uploads")
+    STORAGE_CHUNK_SIZE: int = int(os.getenv("STORAGE_CHUNK_SIZE", 1024 * 1024))
+    STORAGE_MAX_UPLOAD_BYTES: int = int(os.getenv("STORAGE_MAX_UPLOAD_BYTES", 100 * 1024 * 1024))
+    # S3 compatible object store (the minio service in docker-compose.yml)
+    S3_ENDPOINT_URL: str = os.getenv("S3_ENDPOINT_URL", "http://localhost:9000")
+    S3_ACCESS_KEY: str = os.getenv("S3_ACCESS_KEY", "minioadmin")
+    S3_SECRET_KEY: str = os.getenv("S3_SECRET_KEY", "minioadmin123")
+    S3_BUCKET: str = os.getenv("S3_BUCKET", "crm-documents")
+    S3_REGION: str = os.getenv("S3_REGION", "us-east-1")
+    S3_PART_SIZE: int = int(os.getenv("S3_PART_SIZE", 8 * 1024 * 1024))
+    # Resumable upload sessions: part size handed to clients, largest file,
+    # how long a session stays open and how often expired ones are cleaned up
+    UPLOAD_SESSION_PART_SIZE: int = int(os.getenv("UPLOAD_SESSION_PART_SIZE", 8 * 1024 * 1024))
+    UPLOAD_SESSION_MAX_BYTES: int = int(os.getenv("UPLOAD_SESSION_MAX_BYTES", 2 * 1024 * 1024 * 1024))
+    UPLOAD_SESSION_TTL_SECONDS: int = int(os.getenv("UPLOAD_SESSION_TTL_SECONDS", 24 * 3600))
+    UPLOAD_SESSION_CLEANUP_SECONDS: int = int(os.getenv("UPLOAD_SESSION_CLEANUP_SECONDS", 3600))
+
     # Application settings
     APP_NAME: str = "CRM Authentication API"
     APP_VERSION: str = "1.0.0"
@@ -2,6 +2,16 @@
 Database initialization and models
 """
 from .base import Base, get_db
-from .engine import engine, SessionLocal
+from .engine import (
+    SessionLocal,
+    get_engine,
+    get_sessionmaker,
+    get_async_sessionmaker,
+    engine_stats,
+    dispose_engines,
+)
 
-__all__ = ['Base', 'get_db', 'engine', 'SessionLocal']
\ No newline at end of file
+__all__ = [
+    'Base', 'get_db', 'SessionLocal', 'get_engine', 'get_sessionmaker',
+    'get_async_sessionmaker', 'engine_stats', 'dispose_engines'
+]
@@ -1,9 +1,20 @@
 """
 SQLAlchemy engine and session configuration
+
+A single engine (and, with DATABASE_ASYNC, a single async engine) is created
+lazily per process on first use. Pool sizing, recycle, pre-ping, statement
+timeout and echo come from settings so pools can be sized per worker.
 """
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+from ..config import settings
 
 # Database URL from environment with SQLite fallback for local development
 DATABASE_URL = os.getenv('POSTGRES_URL')
@@ -13,27 +24,194 @@ if not DATABASE_URL:
     DATABASE_URL = 'sqlite:///./crm_database.db'
     print(f"No POSTGRES_URL found, using SQLite: {DATABASE_URL}")
 
-# Check if we're using SQLite or PostgreSQL
-if DATABASE_URL.startswith('sqlite'):
-    print(f"Using SQLite database: {DATABASE_URL}")
-    engine = create_engine(
-        DATABASE_URL,
-        connect_args={"check_same_thread": False},  # Only for SQLite
-        echo=False  # Set to True for SQL debugging
-    )
-else:
-    print(f"Using PostgreSQL database: {DATABASE_URL}")
-    # Use PostgreSQL for production
-    engine = create_engine(
-        DATABASE_URL,
-        pool_size=10,
-        max_overflow=20,
-        pool_pre_ping=True,
-        pool_recycle=300,
-        echo=False  # Set to True for SQL debugging
+# Session factories; bound to the engine the first time it is created
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+_engine: Optional[Engine] = None
+_async_engine = None
+_async_sessionmaker = None
+_async_checked = False
+_lock = threading.Lock()
+
+# Counters fed by pool events
+_pool_events: Dict[str, Dict[str, float]] = {}
+
+
+def is_sqlite(url: str = None) -> bool:
+    return (url or DATABASE_URL).startswith('sqlite')
+
+
+def to_async_url(url: str) -> str:
+    """Map a sync database URL to its async driver (asyncpg / aiosqlite)"""
+    if url.startswith('sqlite:'):
+        return 'sqlite+aiosqlite:' + url[len('sqlite:'):]
+    for prefix in ('postgresql+psycopg2://', 'postgresql://', 'postgres://'):
+        if url.startswith(prefix):
+            return 'postgresql+asyncpg://' + url[len(prefix):]
+    return url
+
+
+def _engine_kwargs(asyncio: bool = False) -> Dict[str, Any]:
+    """Engine options for the configured backend"""
+    if is_sqlite():
+        kwargs: Dict[str, Any] = {"echo": settings.DB_ECHO}
+        if not asyncio:
+            kwargs["connect_args"] = {"check_same_thread": False}  # Only for SQLite
+        return kwargs
+
+    kwargs = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "echo": settings.DB_ECHO,
+    }
+    if settings.DB_STATEMENT_TIMEOUT_MS > 0:
+        timeout = str(settings.DB_STATEMENT_TIMEOUT_MS)
+        if asyncio:
+            kwargs["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            kwargs["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return kwargs
+
+
+def _track_pool(name: str, target_engine: Engine):
+    """Count connects/checkouts and time spent holding connections"""
+    counters = _pool_events.setdefault(
+        name, {"connects": 0, "checkouts": 0, "checkins": 0, "invalidations": 0,
+               "held_ms_total": 0.0, "held_ms_max": 0.0}
     )
 
-# Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    @event.listens_for(target_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        counters["connects"] += 1
+
+    @event.listens_for(target_engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        counters["checkouts"] += 1
+        connection_record.info["checkout_at"] = time.perf_counter()
+
+    @event.listens_for(target_engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        counters["checkins"] += 1
+        started = connection_record.info.pop("checkout_at", None)
+        if started is not None:
+            held_ms = (time.perf_counter() - started) * 1000
+            counters["held_ms_total"] += held_ms
+            counters["held_ms_max"] = max(counters["held_ms_max"], held_ms)
+
+    @event.listens_for(target_engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        counters["invalidations"] += 1
+
+
+def get_engine() -> Engine:
+    """Return the process-wide engine, creating it on first use"""
+    global _engine
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                print(f"Using {'SQLite' if is_sqlite() else 'PostgreSQL'} database: {DATABASE_URL}")
+                new_engine = create_engine(DATABASE_URL, **_engine_kwargs())
+                _track_pool("sync", new_engine)
+                SessionLocal.configure(bind=new_engine)
+                _engine = new_engine
+                print("✅ Database engine configured successfully")
+    return _engine
+
+
+def get_sessionmaker() -> sessionmaker:
+    """Session factory bound to the process-wide engine"""
+    get_engine()
+    return SessionLocal
+
+
+def get_async_sessionmaker():
+    """
+    async_sessionmaker for the DATABASE_ASYNC data path, or None when the
+    flag is off or the async driver is not installed
+    """
+    global _async_engine, _async_sessionmaker, _async_checked
+    if _async_checked:
+        return _async_sessionmaker
+
+    with _lock:
+        if _async_checked:
+            return _async_sessionmaker
+        if settings.DATABASE_ASYNC:
+            try:
+                from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+                _async_engine = create_async_engine(
+                    to_async_url(DATABASE_URL), **_engine_kwargs(asyncio=True)
+                )
+                _track_pool("async", _async_engine.sync_engine)
+                _async_sessionmaker = async_sessionmaker(
+                    _async_engine, autoflush=False, expire_on_commit=False
+                )
+                print(f"✅ Async database engine configured: {_async_engine.url.drivername}")
+            except ImportError as e:
+                print(f"❌ Async database driver unavailable ({e}), using sync data path")
+        _async_checked = True
+    return _async_sessionmaker
+
+
+def _pool_stats(name: str, target_engine: Engine) -> Dict[str, Any]:
+    pool = target_engine.pool
+    counters = dict(_pool_events.get(name, {}))
+    if counters.get("checkins"):
+        counters["held_ms_avg"] = round(counters["held_ms_total"] / counters["checkins"], 3)
+    counters["held_ms_total"] = round(counters.get("held_ms_total", 0.0), 3)
+    counters["held_ms_max"] = round(counters.get("held_ms_max", 0.0), 3)
+
+    stats = {
+        "driver": target_engine.url.drivername,
+        "pool_class": type(pool).__name__,
+        "status": pool.status(),
+        **counters,
+    }
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "pool_size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "max_overflow": pool._max_overflow,
+            "timeout_seconds": pool.timeout(),
+        })
+    return stats
+
+
+def engine_stats() -> Dict[str, Any]:
+    """Engine and pool statistics for monitoring"""
+    stats: Dict[str, Any] = {
+        "pid": os.getpid(),
+        "sync": _pool_stats("sync", _engine) if _engine is not None else None,
+        "async": None,
+    }
+    if _async_engine is not None:
+        stats["async"] = _pool_stats("async", _async_engine.sync_engine)
+    return stats
+
+
+async def dispose_engines():
+    """Close pooled connections (called from the app lifespan)"""
+    global _engine, _async_engine, _async_sessionmaker, _async_checked
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    if _engine is not None:
+        _engine.dispose()
+    _engine = None
+    _async_engine = None
+    _async_sessionmaker = None
+    _async_checked = False
+    print("📴 Database engines disposed")
+
 
-print("✅ Database engine configured successfully")
\ No newline at end of file
+def __getattr__(name: str):
+    # `engine` is still importable for scripts such as verify_database.py;
+    # accessing it creates the engine on demand
+    if name == 'engine':
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
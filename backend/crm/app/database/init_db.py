@@ -1,25 +1,58 @@
 """
 Database initialization script with sample data
 """
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import inspect
 from ..models import Base, User, Role, Department, Company, Contact, RoleType
-from ..database.engine import engine
+from ..database.engine import get_engine, get_sessionmaker
 from ..utils.auth import hash_password  # Use the proper bcrypt hashing
+from ..services.search_index import search_index
 from datetime import datetime
 
 
 def create_tables():
     """Create all database tables"""
     print("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
     print("✅ Database tables created successfully")
+    create_missing_indexes()
+    widen_string_columns()
+    search_index.ensure(get_engine())
+
+
+def create_missing_indexes():
+    """Create indexes declared on models that an existing database lacks"""
+    engine = get_engine()
+    inspector = inspect(engine)
+    for table in Base.metadata.tables.values():
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=engine)
+                print(f"✅ Created index {index.name}")
+
+
+def widen_string_columns():
+    """Grow VARCHAR columns an existing database declares narrower than the model"""
+    engine = get_engine()
+    if engine.dialect.name != "postgresql":
+        return  # SQLite doesn't enforce VARCHAR lengths
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.tables.values():
+            existing = {column["name"]: column["type"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                length = getattr(column.type, "length", None)
+                current = getattr(existing.get(column.name), "length", None)
+                if length and current and current < length:
+                    conn.exec_driver_sql(
+                        f'ALTER TABLE {table.name} ALTER COLUMN {column.name} TYPE VARCHAR({length})'
+                    )
+                    print(f"✅ Widened {table.name}.{column.name} to VARCHAR({length})")
 
 
 def seed_initial_data():
     """Seed database with initial data"""
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    db = SessionLocal()
+    db = get_sessionmaker()()
     
     try:
         print("Seeding initial data...")
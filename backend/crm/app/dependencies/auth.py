@@ -6,6 +6,8 @@ from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from ..utils.auth import verify_token
+from ..utils.principal_cache import principal_cache, token_version_cache
+from ..utils.permissions import compile_permissions
 from ..models import User
 from ..services.auth_service import AuthService
 from ..services.user_service import UserService
@@ -14,6 +16,44 @@ from .database import get_postgres_db, get_mongo_db
 security = HTTPBearer()
 
 
+def build_principal(user: User) -> dict:
+    """Build the principal dict exposed to route dependencies"""
+    permissions = user.role.permissions if user.role and user.role.permissions else None
+    return {
+        "id": user.id,
+        "name": user.name,
+        "email": user.email,
+        "username": user.username,
+        "role": user.role.name if user.role else None,
+        "permissions": permissions,
+        "compiled_permissions": compile_permissions(permissions),
+        "department": user.department.name if user.department else None,
+    }
+
+
+def principal_from_claims(user_id: int, payload: dict) -> dict:
+    """Build the principal dict from a self-contained token"""
+    return {
+        "id": user_id,
+        "name": payload.get("name"),
+        "email": payload.get("email"),
+        "username": payload.get("username"),
+        "role": payload.get("role"),
+        "permissions": payload.get("perms") or None,
+        "compiled_permissions": compile_permissions(payload.get("perms")),
+        "department": payload.get("dept"),
+    }
+
+
+def is_token_version_current(db: Session, user_id: int, token_version: int) -> bool:
+    """Revocation check for self-contained tokens using a cached version lookup"""
+    cached = token_version_cache.get(user_id)
+    if cached is None:
+        cached = {"token_version": UserService(db).get_token_version(user_id)}
+        token_version_cache.set(user_id, cached)
+    return cached["token_version"] is not None and cached["token_version"] == token_version
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_postgres_db),
@@ -26,21 +66,28 @@ async def get_current_user(
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid token")
 
+        user_id = int(user_id)
+
+        # Self-contained token: only the token_version is checked against the DB
+        if "ver" in payload:
+            if not is_token_version_current(db, user_id, payload["ver"]):
+                raise HTTPException(status_code=401, detail="Token revoked")
+            return principal_from_claims(user_id, payload)
+
+        principal = principal_cache.get(user_id)
+        if principal is not None:
+            return principal
+
         # Get user from database using SQLAlchemy
         user_service = UserService(db)
-        user = user_service.get_user_by_id(int(user_id))
+        user = user_service.get_user_by_id(user_id)
         # print(user)
         if not user:
             raise HTTPException(status_code=401, detail="User not found")
-        return {
-            "id": user.id,
-            "name": user.name,
-            "email": user.email,
-            "username": user.username,
-            "role": user.role.name if user.role else None,
-            "permissions": user.role.permissions if user.role.permissions else None,
-            "department": user.department.name if user.department else None,
-        }
+
+        principal = build_principal(user)
+        principal_cache.set(user_id, principal)
+        return principal
     except ValueError:
         raise HTTPException(status_code=401, detail="Invalid user ID format")
     except Exception as e:
@@ -4,6 +4,7 @@ Database dependencies using SQLAlchemy
 from fastapi import Depends
 from sqlalchemy.orm import Session
 from ..database import get_db
+from ..database import get_async_sessionmaker
 from pymongo import MongoClient
 from ..config import settings
 
@@ -41,4 +42,15 @@ def get_mongo_db():
 # PostgreSQL dependency
 def get_postgres_db(db: Session = Depends(get_db)):
     """Get PostgreSQL database session"""
-    return db
\ No newline at end of file
+    return db
+
+# Data path dependency for endpoints wrapped in ServiceRunner
+async def get_data_session(db: Session = Depends(get_postgres_db)):
+    """Yield an AsyncSession when DATABASE_ASYNC is enabled, else the sync session"""
+    async_session_factory = get_async_sessionmaker()
+    if async_session_factory is None:
+        yield db
+        return
+
+    async with async_session_factory() as session:
+        yield session
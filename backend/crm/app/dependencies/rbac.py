@@ -6,6 +6,47 @@ from fastapi import Depends, HTTPException, status
 from functools import wraps
 from typing import List, Optional
 from .auth import get_current_user
+from ..utils.permissions import (
+    accepted_any,
+    accepted_tokens,
+    get_compiled_permissions,
+)
+
+
+class PermissionChecker:
+    """
+    Pre-built permission dependency.
+
+    The accepted permission tokens are computed once at import time, so each
+    request only does a set-disjointness test against the principal's
+    compiled permissions.
+    """
+
+    def __init__(self, *permissions: str, require_all: bool = False):
+        self.permissions = list(permissions)
+        self.require_all = require_all
+        if require_all:
+            self._accepted = tuple(accepted_tokens(p) for p in permissions)
+            self._detail = f"All of these permissions required: {self.permissions}"
+        else:
+            self._accepted = accepted_any(permissions)
+            self._detail = f"One of these permissions required: {self.permissions}"
+
+    def allows(self, current_user: dict) -> bool:
+        compiled = get_compiled_permissions(current_user)
+        if self.require_all:
+            return compiled.superuser or all(
+                not compiled.granted.isdisjoint(accepted) for accepted in self._accepted
+            )
+        return compiled.allows(self._accepted)
+
+    async def __call__(self, current_user: dict = Depends(get_current_user)) -> dict:
+        if not self.allows(current_user):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=self._detail,
+            )
+        return current_user
 
 
 def check_permissions(required_permissions: List[str], require_all: bool = False):
@@ -16,6 +57,7 @@ def check_permissions(required_permissions: List[str], require_all: bool = False
         required_permissions: List of required permissions
         require_all: If True, user must have ALL permissions. If False, user needs ANY permission.
     """
+    checker = PermissionChecker(*required_permissions, require_all=require_all)
 
     def decorator(func):
         @wraps(func)
@@ -33,26 +75,7 @@ def check_permissions(required_permissions: List[str], require_all: bool = False
                     detail="Authentication required",
                 )
 
-            # Check if user has required permissions
-            user_permissions = current_user.get("permissions", [])
-
-            # Super admin has all permissions
-            if "all" in user_permissions:
-                return await func(*args, **kwargs)
-
-            # Check specific permissions
-            if require_all:
-                # User must have ALL required permissions
-                has_permission = all(
-                    perm in user_permissions for perm in required_permissions
-                )
-            else:
-                # User must have ANY of the required permissions
-                has_permission = any(
-                    perm in user_permissions for perm in required_permissions
-                )
-
-            if not has_permission:
+            if not checker.allows(current_user):
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail=f"Insufficient permissions. Required: {required_permissions}",
@@ -71,15 +94,7 @@ async def require_permission(
     """
     Dependency to require a specific permission
     """
-    permission.append("*")
-
-    user_permissions = current_user.get("permissions", [])
-
-    # Super admin has all permissions
-    if "all" in user_permissions:
-        return current_user
-
-    if permission not in user_permissions:
+    if not get_compiled_permissions(current_user).allows(accepted_tokens(permission)):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=f"Permission required: {permission}",
@@ -94,14 +109,7 @@ async def require_any_permission(
     """
     Dependency to require any of the specified permissions
     """
-    user_permissions = current_user.get("permissions", [])
-    permissions.append("*")
-    # Super admin has all permissions
-    if "all" in user_permissions:
-        return current_user
-
-    print(any(perm in user_permissions for perm in permissions))
-    if not any(perm in user_permissions for perm in permissions):
+    if not PermissionChecker(*permissions).allows(current_user):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=f"One of these permissions required: {permissions}",
@@ -116,14 +124,7 @@ async def require_all_permissions(
     """
     Dependency to require all of the specified permissions
     """
-    permissions.append("*")
-    user_permissions = current_user.get("permissions", [])
-
-    # Super admin has all permissions
-    if "all" in user_permissions:
-        return current_user
-
-    if not all(perm in user_permissions for perm in permissions):
+    if not PermissionChecker(*permissions, require_all=True).allows(current_user):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=f"All of these permissions required: {permissions}",
@@ -132,65 +133,17 @@ async def require_all_permissions(
     return current_user
 
 
-# Specific permission dependencies
-async def require_users_read(current_user: dict = Depends(get_current_user)) -> dict:
-    return await require_any_permission(["users:read"], current_user)
-
-
-async def require_users_write(current_user: dict = Depends(get_current_user)) -> dict:
-    return await require_any_permission(["users:write", "users:all"], current_user)
-
-
-async def require_companies_read(
-    current_user: dict = Depends(get_current_user),
-) -> dict:
-    return await require_any_permission(
-        ["companies:read", "companies:all"], current_user
-    )
-
-
-async def require_companies_write(
-    current_user: dict = Depends(get_current_user),
-) -> dict:
-    return await require_any_permission(
-        ["companies:write", "companies:all"], current_user
-    )
-
-
-async def require_contacts_read(current_user: dict = Depends(get_current_user)) -> dict:
-    return await require_any_permission(["contacts:read", "contacts:all"], current_user)
-
-
-async def require_contacts_write(
-    current_user: dict = Depends(get_current_user),
-) -> dict:
-    return await require_any_permission(
-        ["contacts:write", "contacts:all"], current_user
-    )
-
-
-async def require_leads_read(current_user: dict = Depends(get_current_user)) -> dict:
-    return await require_any_permission(["leads:read", "leads:all"], current_user)
-
-
-async def require_leads_write(current_user: dict = Depends(get_current_user)) -> dict:
-    return await require_any_permission(["leads:write", "leads:all"], current_user)
-
-
-async def require_opportunities_read(
-    current_user: dict = Depends(get_current_user),
-) -> dict:
-    return await require_any_permission(
-        ["opportunities:read", "opportunities:all"], current_user
-    )
-
-
-async def require_opportunities_write(
-    current_user: dict = Depends(get_current_user),
-) -> dict:
-    return await require_any_permission(
-        ["opportunities:write", "opportunities:all"], current_user
-    )
+# Specific permission dependencies ("<resource>:all" is accepted as a wildcard)
+require_users_read = PermissionChecker("users:read")
+require_users_write = PermissionChecker("users:write")
+require_companies_read = PermissionChecker("companies:read")
+require_companies_write = PermissionChecker("companies:write")
+require_contacts_read = PermissionChecker("contacts:read")
+require_contacts_write = PermissionChecker("contacts:write")
+require_leads_read = PermissionChecker("leads:read")
+require_leads_write = PermissionChecker("leads:write")
+require_opportunities_read = PermissionChecker("opportunities:read")
+require_opportunities_write = PermissionChecker("opportunities:write")
 
 
 # Role-based dependencies
@@ -249,21 +202,17 @@ def get_user_permissions(user: dict) -> List[str]:
 
 def has_permission(user: dict, permission: str) -> bool:
     """Check if user has a specific permission"""
-    permissions = get_user_permissions(user)
-    return "all" in permissions or permission in permissions
+    return get_compiled_permissions(user).allows(accepted_tokens(permission))
 
 
 def has_any_permission(user: dict, required_permissions: List[str]) -> bool:
     """Check if user has any of the required permissions"""
-    permissions = get_user_permissions(user)
-    if "all" in permissions:
-        return True
-    return any(perm in permissions for perm in required_permissions)
+    return get_compiled_permissions(user).allows(accepted_any(required_permissions))
 
 
 def has_all_permissions(user: dict, required_permissions: List[str]) -> bool:
     """Check if user has all of the required permissions"""
-    permissions = get_user_permissions(user)
-    if "all" in permissions:
-        return True
-    return all(perm in permissions for perm in required_permissions)
+    compiled = get_compiled_permissions(user)
+    return compiled.superuser or all(
+        compiled.allows(accepted_tokens(perm)) for perm in required_permissions
+    )
@@ -10,13 +10,21 @@ from contextlib import asynccontextmanager
 
 # Import routers
 from .routers.sso import auth, dashboard
-from .routers.portal import companies, contacts, leads, opportunities, users
+from .routers.portal import companies, contacts, leads, opportunities, users, search, uploads
 from .routers.front import health
 
 # Import database
+from .database import dispose_engines
 from .database.init_db import init_database
 from .dependencies.database import init_mongodb, close_mongodb
+from .utils.logger import log_writer
+from .services.suggest_index import suggest_index
+from .services.upload_sessions import upload_session_janitor
+from .utils.response_cache import response_cache
+from .utils.storage import storage
+from .utils.auth import shutdown_password_executor
 from .middlewares.error_handler import ErrorHandlerMiddleware
+from .serializers import FastJSONResponse
 
 
 @asynccontextmanager
@@ -29,6 +37,10 @@ async def lifespan(app: FastAPI):
         # Initialize databases
         init_database()
         init_mongodb()
+        await log_writer.start()
+        await suggest_index.start()
+        await storage.start()
+        await upload_session_janitor.start()
 
         print("✅ CRM Application started successfully!")
 
@@ -40,7 +52,13 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     try:
+        await upload_session_janitor.stop()
+        await suggest_index.stop()
+        await log_writer.stop()
+        shutdown_password_executor()
+        response_cache.close()
         close_mongodb()
+        await dispose_engines()
         print("📴 CRM Application shutdown completed")
     except Exception as e:
         print(f"❌ Error during shutdown: {e}")
@@ -52,6 +70,7 @@ app = FastAPI(
     description="Comprehensive CRM system with SQLAlchemy ORM",
     version="2.0.0",
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 app.add_middleware(ErrorHandlerMiddleware)
 # CORS middleware
@@ -103,6 +122,8 @@ app.include_router(contacts.router)
 app.include_router(leads.router)
 app.include_router(opportunities.router)
 app.include_router(users.router)
+app.include_router(search.router)
+app.include_router(uploads.router)
 
 
 @app.get("/")
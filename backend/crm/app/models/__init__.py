@@ -17,6 +17,8 @@ from .opportunity import (
     GoNoGoStatus,
     QuotationStatus,
 )
+from .id_sequence import IdSequence
+from .upload_session import UploadSession
 
 __all__ = [
     'Base',
@@ -40,5 +42,7 @@ __all__ = [
     'OpportunityStatus',
     'QualificationStatus',
     'GoNoGoStatus',
-    'QuotationStatus'
+    'QuotationStatus',
+    'IdSequence',
+    'UploadSession'
 ]
\ No newline at end of file
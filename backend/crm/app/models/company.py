@@ -1,7 +1,7 @@
 """
 SQLAlchemy Company model
 """
-from sqlalchemy import Column, String, Text, ForeignKey, Integer
+from sqlalchemy import Column, String, Text, ForeignKey, Integer, Index
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 
@@ -20,6 +20,11 @@ class Company(BaseModel):
     postal_code = Column(String(10))
     website = Column(String(255))
     description = Column(Text)
+
+    # Keyset pagination: (sort key, id) seeks for the company list
+    __table_args__ = (
+        Index("ix_companies_name_id", "name", "id"),
+    )
     
     # Self-referential relationship for parent company
     parent_company = relationship("Company", remote_side="Company.id", back_populates="subsidiaries")
@@ -2,7 +2,7 @@
 SQLAlchemy Contact model
 """
 
-from sqlalchemy import Column, String, ForeignKey, Enum as SQLEnum, Integer
+from sqlalchemy import Column, String, ForeignKey, Enum as SQLEnum, Integer, Index
 from sqlalchemy.orm import relationship
 from enum import Enum
 from .base import BaseModel
@@ -25,6 +25,12 @@ class Contact(BaseModel):
     role_type = Column(SQLEnum(RoleType), nullable=False, index=True)
     business_card_path = Column(String(500))
 
+    # Keyset pagination: (sort key, id) seeks for the contact lists
+    __table_args__ = (
+        Index("ix_contacts_full_name_id", "full_name", "id"),
+        Index("ix_contacts_company_full_name_id", "company_id", "full_name", "id"),
+    )
+
     # Relationships
     company = relationship(
         "Company", foreign_keys="Contact.company_id", back_populates="contacts"
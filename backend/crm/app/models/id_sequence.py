@@ -0,0 +1,17 @@
+"""
+Counter table for human readable, sequential IDs (POT IDs)
+"""
+from sqlalchemy import Column, String, BigInteger
+from .base import Base
+
+
+class IdSequence(Base):
+    __tablename__ = "id_sequences"
+
+    # Sequence name, e.g. "pot_id"
+    name = Column(String(50), primary_key=True)
+    # First value not yet handed out to any worker
+    next_value = Column(BigInteger, nullable=False)
+
+    def __repr__(self):
+        return f"<IdSequence(name={self.name}, next_value={self.next_value})>"
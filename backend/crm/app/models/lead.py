@@ -14,6 +14,7 @@ from sqlalchemy import (
     DECIMAL,
     DateTime,
     JSON,
+    Index,
 )
 from sqlalchemy.orm import relationship
 from enum import Enum
@@ -157,6 +158,12 @@ class Lead(BaseModel):
     conversion_date = Column(DateTime)
     conversion_notes = Column(Text)
 
+    # Keyset pagination: (sort key, id) seeks for the lead list
+    __table_args__ = (
+        Index("ix_leads_updated_on_id", "updated_on", "id"),
+        Index("ix_leads_company_updated_on_id", "company_id", "updated_on", "id"),
+    )
+
     # Relationships
     company = relationship("Company", foreign_keys=[company_id], back_populates="leads")
     end_customer = relationship("Company", foreign_keys=[end_customer_id])
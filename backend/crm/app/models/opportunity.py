@@ -15,11 +15,11 @@ from sqlalchemy import (
     CheckConstraint,
     DateTime,
     JSON,
+    Index,
 )
 from sqlalchemy.orm import relationship
 from enum import Enum
 import uuid
-import random
 from datetime import datetime
 from .base import BaseModel
 
@@ -35,6 +35,31 @@ class OpportunityStage(str, Enum):
     L7_DROPPED = "L7_Dropped"
 
 
+# Win probability per stage
+STAGE_PERCENTAGES = {
+    OpportunityStage.L1_PROSPECT: 5,
+    OpportunityStage.L1_QUALIFICATION: 15,
+    OpportunityStage.L2_NEED_ANALYSIS: 40,
+    OpportunityStage.L3_PROPOSAL: 60,
+    OpportunityStage.L4_NEGOTIATION: 80,
+    OpportunityStage.L5_WON: 100,
+    OpportunityStage.L6_LOST: 0,
+    OpportunityStage.L7_DROPPED: 0,
+}
+
+# User-friendly stage names
+STAGE_DISPLAY_NAMES = {
+    OpportunityStage.L1_PROSPECT: "L1 - Prospect",
+    OpportunityStage.L1_QUALIFICATION: "L1 - Qualification (15%)",
+    OpportunityStage.L2_NEED_ANALYSIS: "L2 - Need Analysis / Demo (40%)",
+    OpportunityStage.L3_PROPOSAL: "L3 - Proposal / Bid Submission (60%)",
+    OpportunityStage.L4_NEGOTIATION: "L4 - Negotiation (80%)",
+    OpportunityStage.L5_WON: "L5 - Won (100%)",
+    OpportunityStage.L6_LOST: "L6 - Lost",
+    OpportunityStage.L7_DROPPED: "L7 - Dropped",
+}
+
+
 class OpportunityStatus(str, Enum):
     OPEN = "Open"
     WON = "Won"
@@ -71,10 +96,11 @@ class QuotationStatus(str, Enum):
 class Opportunity(BaseModel):
     __tablename__ = "opportunities"
 
-    # Core fields with POT-{4digit} ID
+    # Core fields with POT ID (legacy POT-1234, sequential POT-10000 onwards,
+    # assigned from services/id_allocator.py when the row is flushed)
     pot_id = Column(
-        String(10), unique=True, nullable=False, index=True
-    )  # POT-1234 format
+        String(20), unique=True, nullable=False, index=True
+    )
     lead_id = Column(Integer, ForeignKey("leads.id"), nullable=True)
     company_id = Column(Integer, ForeignKey("companies.id"), nullable=False, index=True)
     contact_id = Column(Integer, ForeignKey("contacts.id"), nullable=False, index=True)
@@ -166,6 +192,10 @@ class Opportunity(BaseModel):
             "(amount < 1000000 AND justification IS NULL) OR (amount >= 1000000 AND justification IS NOT NULL AND length(trim(justification)) > 0)",
             name="check_amount_justification",
         ),
+        # Keyset pagination: (sort key, id) seeks for the opportunity lists
+        Index("ix_opportunities_updated_on_id", "updated_on", "id"),
+        Index("ix_opportunities_company_created_on_id", "company_id", "created_on", "id"),
+        Index("ix_opportunities_lead_created_on_id", "lead_id", "created_on", "id"),
     )
 
     # Relationships
@@ -191,16 +221,6 @@ class Opportunity(BaseModel):
         back_populates="opportunities_updated",
     )
 
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        if not self.pot_id:
-            self.pot_id = self._generate_pot_id()
-
-    @staticmethod
-    def _generate_pot_id():
-        """Generate unique POT-{4digit} ID"""
-        return f"POT-{random.randint(1000, 9999)}"
-
     # Properties
     @property
     def company_name(self):
@@ -225,32 +245,12 @@ class Opportunity(BaseModel):
     @property
     def stage_percentage(self):
         """Return percentage based on stage"""
-        stage_percentages = {
-            OpportunityStage.L1_PROSPECT: 5,
-            OpportunityStage.L1_QUALIFICATION: 15,
-            OpportunityStage.L2_NEED_ANALYSIS: 40,
-            OpportunityStage.L3_PROPOSAL: 60,
-            OpportunityStage.L4_NEGOTIATION: 80,
-            OpportunityStage.L5_WON: 100,
-            OpportunityStage.L6_LOST: 0,
-            OpportunityStage.L7_DROPPED: 0,
-        }
-        return stage_percentages.get(self.stage, 0)
+        return STAGE_PERCENTAGES.get(self.stage, 0)
 
     @property
     def stage_display_name(self):
         """Return user-friendly stage name"""
-        stage_names = {
-            OpportunityStage.L1_PROSPECT: "L1 - Prospect",
-            OpportunityStage.L1_QUALIFICATION: "L1 - Qualification (15%)",
-            OpportunityStage.L2_NEED_ANALYSIS: "L2 - Need Analysis / Demo (40%)",
-            OpportunityStage.L3_PROPOSAL: "L3 - Proposal / Bid Submission (60%)",
-            OpportunityStage.L4_NEGOTIATION: "L4 - Negotiation (80%)",
-            OpportunityStage.L5_WON: "L5 - Won (100%)",
-            OpportunityStage.L6_LOST: "L6 - Lost",
-            OpportunityStage.L7_DROPPED: "L7 - Dropped",
-        }
-        return stage_names.get(self.stage, self.stage.value)
+        return STAGE_DISPLAY_NAMES.get(self.stage, self.stage.value)
 
     def __repr__(self):
         return f"<Opportunity(pot_id={self.pot_id}, name={self.name}, stage={self.stage}, status={self.status})>"
\ No newline at end of file
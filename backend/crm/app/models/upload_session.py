@@ -0,0 +1,56 @@
+"""
+Resumable chunked document uploads (services/upload_sessions.py)
+"""
+from datetime import datetime
+
+from sqlalchemy import Column, String, Integer, BigInteger, Text, DateTime, ForeignKey, Index
+from .base import Base
+
+UPLOAD_OPEN = "open"
+UPLOAD_COMPLETING = "completing"
+UPLOAD_COMPLETED = "completed"
+UPLOAD_ABORTED = "aborted"
+UPLOAD_EXPIRED = "expired"
+
+
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+
+    # Random hex id, also what the client puts in part URLs
+    id = Column(String(32), primary_key=True)
+    # "lead" or "opportunity" and its id; the document is attached on completion
+    entity_type = Column(String(20), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    document_type = Column(String(100), nullable=False)
+    file_name = Column(String(255), nullable=False)
+    content_type = Column(String(255), nullable=False)
+    quotation_name = Column(String(255), nullable=True)
+    description = Column(Text, nullable=True)
+    total_size = Column(BigInteger, nullable=False)
+    part_size = Column(Integer, nullable=False)
+    # Object key the parts are committed to and the backend's multipart upload id
+    storage_key = Column(String(500), nullable=False)
+    upload_id = Column(String(255), nullable=False)
+    status = Column(String(20), nullable=False, default=UPLOAD_OPEN)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_on = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    completed_on = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # The janitor's scan for expired open sessions
+        Index("ix_upload_sessions_status_expires_at", "status", "expires_at"),
+    )
+
+    @property
+    def part_count(self) -> int:
+        return max(1, -(-self.total_size // self.part_size))
+
+    def part_length(self, number: int) -> int:
+        """Size part ``number`` (1-based) must have: part_size, the remainder for the last"""
+        if number < self.part_count:
+            return self.part_size
+        return self.total_size - self.part_size * (self.part_count - 1)
+
+    def __repr__(self):
+        return f"<UploadSession(id={self.id}, entity={self.entity_type}:{self.entity_id}, status={self.status})>"
@@ -2,7 +2,7 @@
 SQLAlchemy User model with fixed foreign key relationships
 """
 
-from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, Integer
+from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, Integer, Index
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 
@@ -21,6 +21,13 @@ class User(BaseModel):
     last_login = Column(DateTime, nullable=True)
     failed_login_attempts = Column(Integer, default=0)
     locked_until = Column(DateTime, nullable=True)
+    # Bumped whenever claims embedded in self-contained tokens go stale
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)
+
+    # Keyset pagination: (sort key, id) seeks for the user list
+    __table_args__ = (
+        Index("ix_users_name_id", "name", "id"),
+    )
 
     # Relationships
     role = relationship("Role", back_populates="users", foreign_keys=[role_id])
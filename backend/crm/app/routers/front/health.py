@@ -3,6 +3,14 @@ Health check endpoints
 """
 from fastapi import APIRouter
 from ...schemas.auth import StandardResponse
+from ...utils.principal_cache import principal_cache, token_version_cache
+from ...utils.logger import log_writer
+from ...database import engine_stats
+from ...services.lead_service import lead_stats_cache
+from ...services.suggest_index import suggest_index
+from ...services.upload_sessions import upload_session_janitor
+from ...utils.response_cache import response_cache
+from ...utils.storage import storage
 
 router = APIRouter(tags=["health"])
 
@@ -34,4 +42,24 @@ async def health_check():
         message="CRM API is healthy",
         data={"service": "crm-api", "version": "1.0.0"},
         error=None
-    )
\ No newline at end of file
+    )
+
+@router.get("/health/metrics", response_model=StandardResponse)
+async def health_metrics():
+    """In-process cache and runtime counters"""
+    return StandardResponse(
+        status=True,
+        message="CRM API metrics",
+        data={
+            "principal_cache": principal_cache.stats(),
+            "token_version_cache": token_version_cache.stats(),
+            "log_writer": log_writer.stats(),
+            "database": engine_stats(),
+            "lead_stats_cache": lead_stats_cache.stats(),
+            "suggest_index": suggest_index.stats(),
+            "response_cache": response_cache.stats(),
+            "storage": storage.stats(),
+            "upload_sessions": upload_session_janitor.stats(),
+        },
+        error=None
+    )
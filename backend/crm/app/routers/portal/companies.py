@@ -4,6 +4,7 @@ Company Management API endpoints
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import Optional
+from datetime import datetime
 from ...schemas.company import (
     CompanyCreate,
     CompanyUpdate,
@@ -13,7 +14,13 @@ from ...schemas.company import (
 from ...schemas.auth import StandardResponse
 from ...dependencies.rbac import require_companies_read, require_companies_write
 from ...services.company_service import CompanyService
-from ...dependencies.database import get_postgres_db
+from ...services.runner import ServiceRunner
+from ...services.loader_profiles import parse_fields, InvalidFieldsError
+from ...serializers import company_serializer
+from ...utils.pagination import InvalidCursorError, TOTAL_EXACT
+from ...utils.response_cache import response_cache
+from ...utils.export import export_response, EXPORT_FORMAT_PATTERN
+from ...dependencies.database import get_postgres_db, get_data_session
 
 router = APIRouter(prefix="/api/companies", tags=["Company Management"])
 
@@ -22,13 +29,19 @@ async def get_company_service(postgres_pool=Depends(get_postgres_db)) -> Company
     return CompanyService(postgres_pool)
 
 
+async def get_company_runner(db=Depends(get_data_session)) -> ServiceRunner:
+    return ServiceRunner(CompanyService, db)
+
+
 @router.get("/", response_model=StandardResponse)
 async def get_companies(
     skip: int = Query(0, ge=0),
     limit: Optional[int] = Query(None),
     search: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+    include_total: str = Query(TOTAL_EXACT, pattern="^(false|exact|estimate)$"),
     current_user: dict = Depends(require_companies_read),
-    company_service: CompanyService = Depends(get_company_service),
+    company_runner: ServiceRunner = Depends(get_company_runner),
 ):
     """Get all companies with pagination and search"""
     try:
@@ -36,20 +49,52 @@ async def get_companies(
             raise HTTPException(
                 status_code=422, detail="Limit cannot be greater than 500"
             )
-        companies = company_service.get_companies(skip, limit, search)
-        total = company_service.get_company_count(search)
-        company_response_list = [
-            CompanyResponse.from_orm(company) for company in companies
-        ]
-        return StandardResponse(
+        cached = response_cache.lookup(
+            "companies:list", current_user, ("companies",),
+            skip=skip, limit=limit, search=search, cursor=cursor, include_total=include_total,
+        )
+        if cached.hit:
+            return cached.response()
+
+        def load(service: CompanyService):
+            page = service.get_companies_page(skip, limit, search, cursor, include_total)
+            company_list = [CompanyResponse.from_orm(company) for company in page.items]
+            return company_list, page.total, page.next_cursor
+
+        company_response_list, total, next_cursor = await company_runner.run(load)
+        return cached.store(StandardResponse(
             status=True,
             message="Companies retrieved successfully",
             data=CompanyListResponse(
-                companies=company_response_list, total=total, skip=skip, limit=limit
+                companies=company_response_list, total=total, skip=skip, limit=limit,
+                next_cursor=next_cursor
             ),
+        ))
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(e)
+
+
+@router.get("/export")
+async def export_companies(
+    format: str = Query("csv", pattern=EXPORT_FORMAT_PATTERN),
+    search: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None, description="Comma separated company fields to export (default: all)"),
+    current_user: dict = Depends(require_companies_read),
+):
+    """Stream every company matching the list filters as CSV or NDJSON"""
+    try:
+        fieldset = parse_fields(fields, company_serializer.fields)
+        return export_response(
+            lambda db: CompanyService(db).get_companies_export_query(search, fieldset),
+            company_serializer, fieldset, format, f"companies-{datetime.utcnow():%Y%m%d}",
         )
+    except InvalidFieldsError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(e)
+        raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/{company_id}", response_model=StandardResponse)
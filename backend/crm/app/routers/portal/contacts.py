@@ -4,6 +4,7 @@ Contact Management API endpoints
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import Optional
+from datetime import datetime
 from ...schemas.contact import (
     ContactCreate,
     ContactUpdate,
@@ -13,7 +14,13 @@ from ...schemas.contact import (
 from ...schemas.auth import StandardResponse
 from ...dependencies.rbac import require_contacts_read, require_contacts_write
 from ...services.contact_service import ContactService
-from ...dependencies.database import get_postgres_db
+from ...services.runner import ServiceRunner
+from ...services.loader_profiles import parse_fields, InvalidFieldsError
+from ...serializers import contact_serializer
+from ...utils.pagination import InvalidCursorError, TOTAL_EXACT
+from ...utils.response_cache import response_cache
+from ...utils.export import export_response, EXPORT_FORMAT_PATTERN
+from ...dependencies.database import get_postgres_db, get_data_session
 
 router = APIRouter(prefix="/api/contacts", tags=["Contact Management"])
 
@@ -22,41 +29,75 @@ async def get_contact_service(postgres_pool=Depends(get_postgres_db)) -> Contact
     return ContactService(postgres_pool)
 
 
+async def get_contact_runner(db=Depends(get_data_session)) -> ServiceRunner:
+    return ServiceRunner(ContactService, db)
+
+
 @router.get("/", response_model=StandardResponse)
 async def get_contacts(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
     search: Optional[str] = Query(None),
     company_id: Optional[int] = Query(None),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+    include_total: str = Query(TOTAL_EXACT, pattern="^(false|exact|estimate)$"),
     current_user: dict = Depends(require_contacts_read),
-    contact_service: ContactService = Depends(get_contact_service),
+    contact_runner: ServiceRunner = Depends(get_contact_runner),
 ):
     """Get all contacts with pagination and search"""
     try:
-        if company_id:
-            contacts = contact_service.get_contacts_by_company(company_id, skip, limit)
-        else:
-            contacts = contact_service.get_contacts(skip, limit, search)
-        total = contact_service.get_contact_count(search)
-
-        contact_response_list = [
-            ContactResponse(
-                **contact.__dict__,
-                company_name=contact.company.name if contact.company else None
-            )
-            for contact in contacts
-        ]
+        def load(service: ContactService):
+            if company_id:
+                page = service.get_contacts_by_company_page(
+                    company_id, skip, limit, cursor, include_total
+                )
+            else:
+                page = service.get_contacts_page(skip, limit, search, cursor, include_total)
+            return [
+                ContactResponse(
+                    **contact.__dict__,
+                    company_name=contact.company.name if contact.company else None
+                )
+                for contact in page.items
+            ], page.total, page.next_cursor
+
+        contact_response_list, total, next_cursor = await contact_runner.run(load)
 
         return StandardResponse(
             status=True,
             message="Contacts retrieved successfully",
             # data={"contacts": contacts, "total": total, "skip": skip, "limit": limit},
             data=ContactListResponse(
-                contacts=contact_response_list, total=total, skip=skip, limit=limit
+                contacts=contact_response_list, total=total, skip=skip, limit=limit,
+                next_cursor=next_cursor
             ),
         )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(e)
+
+
+@router.get("/export")
+async def export_contacts(
+    format: str = Query("csv", pattern=EXPORT_FORMAT_PATTERN),
+    search: Optional[str] = Query(None),
+    company_id: Optional[int] = Query(None),
+    fields: Optional[str] = Query(None, description="Comma separated contact fields to export (default: all)"),
+    current_user: dict = Depends(require_contacts_read),
+):
+    """Stream every contact matching the list filters as CSV or NDJSON"""
+    try:
+        fieldset = parse_fields(fields, contact_serializer.fields)
+        return export_response(
+            lambda db: ContactService(db).get_contacts_export_query(search, company_id, fieldset),
+            contact_serializer, fieldset, format, f"contacts-{datetime.utcnow():%Y%m%d}",
+        )
+    except InvalidFieldsError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(e)
+        raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/{contact_id}", response_model=StandardResponse)
@@ -150,9 +191,15 @@ async def get_decision_makers(
 ):
     """Get decision makers for a company (needed for opportunity creation)"""
     try:
+        cached = response_cache.lookup(
+            "contacts:decision_makers", current_user, ("contacts",), company_id=company_id
+        )
+        if cached.hit:
+            return cached.response()
+
         contacts = contact_service.get_decision_makers(company_id)
 
-        return StandardResponse(
+        return cached.store(StandardResponse(
             status=True,
             message="Decision makers retrieved successfully",
             data={
@@ -160,6 +207,6 @@ async def get_decision_makers(
                     ContactResponse.from_orm(contact) for contact in contacts
                 ]
             },
-        )
+        ))
     except Exception as e:
         print(e)
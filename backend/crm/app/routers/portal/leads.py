@@ -2,7 +2,8 @@
 Enhanced Lead Management API endpoints with conversion workflow
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, Header, UploadFile, File
 from typing import Optional, List
 from datetime import datetime
 from ...schemas.lead import (
@@ -19,14 +20,29 @@ from ...schemas.lead import (
 )
 from ...schemas.auth import StandardResponse
 from ...schemas.opportunity import OpportunityCreate
+from ...schemas.upload import UploadSessionCreate
 from ...dependencies.rbac import (
     require_leads_read,
     require_leads_write,
     require_admin_role,
 )
 from ...services.lead_service import LeadService
+from ...services.lead_import import LeadImporter, LeadImportError, read_rows
 from ...services.opportunity_service import OpportunityService
-from ...dependencies.database import get_postgres_db
+from ...services.upload_sessions import UploadSessionService, UploadSessionError, UploadSessionNotFound
+from ...services.runner import ServiceRunner
+from ...services.loader_profiles import parse_fields, InvalidFieldsError
+from ...serializers import (
+    FastJSONResponse,
+    lead_serializer,
+    LEAD_SUMMARY_FIELDS,
+    LEAD_PENDING_REVIEW_FIELDS,
+)
+from ...utils.pagination import InvalidCursorError, TOTAL_EXACT
+from ...utils.etag import weak_etag, etag_matches, not_modified
+from ...utils.export import export_response, EXPORT_FORMAT_PATTERN
+from ...utils.storage import storage, document_key, ObjectNotFound, UploadTooLarge
+from ...dependencies.database import get_postgres_db, get_data_session
 
 router = APIRouter(prefix="/api/leads", tags=["Enhanced Lead Management"])
 
@@ -37,6 +53,10 @@ async def get_lead_service(
     return LeadService(postgres_pool)
 
 
+async def get_lead_runner(db=Depends(get_data_session)) -> ServiceRunner:
+    return ServiceRunner(LeadService, db)
+
+
 async def get_opportunity_service(
     postgres_pool=Depends(get_postgres_db),
 ) -> OpportunityService:
@@ -51,83 +71,40 @@ async def get_leads(
     status: Optional[str] = Query(None),
     company_id: Optional[str] = Query(None),
     review_status: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+    include_total: str = Query(TOTAL_EXACT, pattern="^(false|exact|estimate)$"),
+    fields: Optional[str] = Query(None, description="Comma separated lead fields to return (default: all)"),
+    if_none_match: Optional[str] = Header(None),
     current_user: dict = Depends(require_leads_read),
-    lead_service: LeadService = Depends(get_lead_service),
+    lead_runner: ServiceRunner = Depends(get_lead_runner),
 ):
-    """Get all leads with pagination and filtering"""
+    """Get all leads with pagination and filtering (304 when If-None-Match still matches)"""
     try:
-        leads = lead_service.get_leads(
-            skip, limit, search, status, company_id, review_status
-        )
-        total = lead_service.get_leads_count(search, status, company_id, review_status)
+        fieldset = parse_fields(fields, lead_serializer.fields)
+
+        def load(service: LeadService):
+            etag = weak_etag(
+                service.get_leads_version(search, status, company_id, review_status),
+                {
+                    "skip": skip, "limit": limit, "search": search, "status": status,
+                    "company_id": company_id, "review_status": review_status,
+                    "cursor": cursor, "include_total": include_total, "fields": fields,
+                },
+            )
+            if etag_matches(if_none_match, etag):
+                return etag, None
+            page = service.get_leads_page(
+                skip, limit, search, status, company_id, review_status, cursor, include_total,
+                fieldset,
+            )
+            return etag, (lead_serializer.many(page.items, fieldset), page.total, page.next_cursor)
 
-        # Transform to response models
-        lead_responses = []
-        for lead in leads:
-            lead_dict = {
-                "id": lead.id,
-                "project_title": lead.project_title,
-                "lead_source": lead.lead_source.value,
-                "lead_sub_type": lead.lead_sub_type.value,
-                "tender_sub_type": lead.tender_sub_type.value,
-                "products_services": lead.products_services or [],
-                "company_id": lead.company_id,
-                "sub_business_type": lead.sub_business_type,
-                "end_customer_id": lead.end_customer_id,
-                "end_customer_region": lead.end_customer_region,
-                "partner_involved": lead.partner_involved,
-                "partners_data": lead.partners_data or [],
-                "tender_fee": lead.tender_fee,
-                "currency": lead.currency,
-                "submission_type": (
-                    lead.submission_type.value if lead.submission_type else None
-                ),
-                "tender_authority": lead.tender_authority,
-                "tender_for": lead.tender_for,
-                "emd_required": lead.emd_required,
-                "emd_amount": lead.emd_amount,
-                "emd_currency": lead.emd_currency,
-                "bg_required": lead.bg_required,
-                "bg_amount": lead.bg_amount,
-                "bg_currency": lead.bg_currency,
-                "important_dates": lead.important_dates or [],
-                "clauses": lead.clauses or [],
-                "expected_revenue": lead.expected_revenue,
-                "revenue_currency": lead.revenue_currency,
-                "convert_to_opportunity_date": lead.convert_to_opportunity_date,
-                "competitors": lead.competitors or [],
-                "documents": lead.documents or [],
-                "status": lead.status.value,
-                "priority": lead.priority.value,
-                "qualification_notes": lead.qualification_notes,
-                "lead_score": lead.lead_score,
-                "contacts": lead.contacts or [],
-                "company_name": lead.company_name,
-                "end_customer_name": lead.end_customer_name,
-                "creator_name": lead.creator_name,
-                "conversion_requester_name": lead.conversion_requester_name,
-                "reviewer_name": lead.reviewer_name,
-                "ready_for_conversion": lead.ready_for_conversion,
-                "conversion_requested": lead.conversion_requested,
-                "conversion_request_date": lead.conversion_request_date,
-                "reviewed": lead.reviewed,
-                "review_status": lead.review_status.value,
-                "review_date": lead.review_date,
-                "review_comments": lead.review_comments,
-                "converted": lead.converted,
-                "converted_to_opportunity_id": lead.converted_to_opportunity_id,
-                "conversion_date": lead.conversion_date,
-                "conversion_notes": lead.conversion_notes,
-                "can_request_conversion": lead.can_request_conversion,
-                "can_convert_to_opportunity": lead.can_convert_to_opportunity,
-                "needs_admin_review": lead.needs_admin_review,
-                "is_active": lead.is_active,
-                "created_on": lead.created_on,
-                "updated_on": lead.updated_on,
-            }
-            lead_responses.append(lead_dict)
+        etag, loaded = await lead_runner.run(load)
+        if loaded is None:
+            return not_modified(etag)
+        lead_responses, total, next_cursor = loaded
 
-        return StandardResponse(
+        return FastJSONResponse(StandardResponse(
             status=True,
             message="Leads retrieved successfully",
             data={
@@ -135,8 +112,11 @@ async def get_leads(
                 "total": total,
                 "skip": skip,
                 "limit": limit,
+                "next_cursor": next_cursor,
             },
-        )
+        ), headers={"ETag": etag})
+    except (InvalidCursorError, InvalidFieldsError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"Error in get_leads: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -144,12 +124,13 @@ async def get_leads(
 
 @router.get("/stats", response_model=StandardResponse)
 async def get_lead_stats(
+    breakdown: Optional[str] = Query(None, pattern="^(company|sales_person)$"),
     current_user: dict = Depends(require_leads_read),
     lead_service: LeadService = Depends(get_lead_service),
 ):
-    """Get lead statistics"""
+    """Get lead statistics, optionally broken down per company or sales person"""
     try:
-        stats = lead_service.get_lead_stats()
+        stats = lead_service.get_lead_stats(breakdown)
         return StandardResponse(
             status=True, message="Lead statistics retrieved successfully", data=stats
         )
@@ -166,19 +147,7 @@ async def get_pending_review_leads(
     try:
         leads = lead_service.get_leads_pending_review()
 
-        lead_responses = []
-        for lead in leads:
-            lead_dict = {
-                "id": lead.id,
-                "project_title": lead.project_title,
-                "company_name": lead.company_name,
-                "expected_revenue": lead.expected_revenue,
-                "conversion_request_date": lead.conversion_request_date,
-                "conversion_requester_name": lead.conversion_requester_name,
-                "status": lead.status.value,
-                "review_status": lead.review_status.value,
-            }
-            lead_responses.append(lead_dict)
+        lead_responses = lead_serializer.many(leads, LEAD_PENDING_REVIEW_FIELDS)
 
         return StandardResponse(
             status=True,
@@ -189,86 +158,60 @@ async def get_pending_review_leads(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/export")
+async def export_leads(
+    format: str = Query("csv", pattern=EXPORT_FORMAT_PATTERN),
+    search: Optional[str] = Query(None),
+    status: Optional[str] = Query(None),
+    company_id: Optional[str] = Query(None),
+    review_status: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None, description="Comma separated lead fields to export (default: all)"),
+    current_user: dict = Depends(require_leads_read),
+):
+    """Stream every lead matching the list filters as CSV or NDJSON"""
+    try:
+        fieldset = parse_fields(fields, lead_serializer.fields)
+        return export_response(
+            lambda db: LeadService(db).get_leads_export_query(
+                search, status, company_id, review_status, fieldset
+            ),
+            lead_serializer, fieldset, format, f"leads-{datetime.utcnow():%Y%m%d}",
+        )
+    except ValueError as e:
+        # Unknown fields or an invalid status / review_status
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Error in export_leads: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/{lead_id}", response_model=StandardResponse)
 async def get_lead(
     lead_id: str,
+    if_none_match: Optional[str] = Header(None),
     current_user: dict = Depends(require_leads_read),
     lead_service: LeadService = Depends(get_lead_service),
 ):
-    """Get lead by ID"""
+    """Get lead by ID (304 when If-None-Match still matches)"""
     try:
+        version = lead_service.get_lead_version(lead_id)
+        if not version:
+            raise HTTPException(status_code=404, detail="Lead not found")
+        etag = weak_etag(version.id, version.updated_on)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
         lead = lead_service.get_lead_by_id(lead_id)
         if not lead:
             raise HTTPException(status_code=404, detail="Lead not found")
 
-        # Transform to response format (same as in get_leads)
-        lead_dict = {
-            "id": lead.id,
-            "project_title": lead.project_title,
-            "lead_source": lead.lead_source.value,
-            "lead_sub_type": lead.lead_sub_type.value,
-            "tender_sub_type": lead.tender_sub_type.value,
-            "products_services": lead.products_services or [],
-            "company_id": lead.company_id,
-            "sub_business_type": lead.sub_business_type,
-            "end_customer_id": lead.end_customer_id,
-            "end_customer_region": lead.end_customer_region,
-            "partner_involved": lead.partner_involved,
-            "partners_data": lead.partners_data or [],
-            "tender_fee": lead.tender_fee,
-            "currency": lead.currency,
-            "submission_type": (
-                lead.submission_type.value if lead.submission_type else None
-            ),
-            "tender_authority": lead.tender_authority,
-            "tender_for": lead.tender_for,
-            "emd_required": lead.emd_required,
-            "emd_amount": lead.emd_amount,
-            "emd_currency": lead.emd_currency,
-            "bg_required": lead.bg_required,
-            "bg_amount": lead.bg_amount,
-            "bg_currency": lead.bg_currency,
-            "important_dates": lead.important_dates or [],
-            "clauses": lead.clauses or [],
-            "expected_revenue": lead.expected_revenue,
-            "revenue_currency": lead.revenue_currency,
-            "convert_to_opportunity_date": lead.convert_to_opportunity_date,
-            "competitors": lead.competitors or [],
-            "documents": lead.documents or [],
-            "status": lead.status.value,
-            "priority": lead.priority.value,
-            "qualification_notes": lead.qualification_notes,
-            "lead_score": lead.lead_score,
-            "contacts": lead.contacts or [],
-            "company_name": lead.company_name,
-            "end_customer_name": lead.end_customer_name,
-            "creator_name": lead.creator_name,
-            "conversion_requester_name": lead.conversion_requester_name,
-            "reviewer_name": lead.reviewer_name,
-            "ready_for_conversion": lead.ready_for_conversion,
-            "conversion_requested": lead.conversion_requested,
-            "conversion_request_date": lead.conversion_request_date,
-            "reviewed": lead.reviewed,
-            "review_status": lead.review_status.value,
-            "review_date": lead.review_date,
-            "review_comments": lead.review_comments,
-            "converted": lead.converted,
-            "converted_to_opportunity_id": lead.converted_to_opportunity_id,
-            "conversion_date": lead.conversion_date,
-            "conversion_notes": lead.conversion_notes,
-            "can_request_conversion": lead.can_request_conversion,
-            "can_convert_to_opportunity": lead.can_convert_to_opportunity,
-            "needs_admin_review": lead.needs_admin_review,
-            "is_active": lead.is_active,
-            "created_on": lead.created_on,
-            "updated_on": lead.updated_on,
-        }
+        lead_dict = lead_serializer(lead)
 
-        return StandardResponse(
+        return FastJSONResponse(StandardResponse(
             status=True,
             message="Lead retrieved successfully",
             data=lead_dict,
-        )
+        ), headers={"ETag": etag})
     except HTTPException:
         raise
     except Exception as e:
@@ -290,11 +233,7 @@ async def create_lead(
         return StandardResponse(
             status=True,
             message="Lead created successfully",
-            data={
-                "id": lead.id,
-                "project_title": lead.project_title,
-                "status": lead.status.value,
-            },
+            data=lead_serializer(lead, LEAD_SUMMARY_FIELDS),
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -302,6 +241,29 @@ async def create_lead(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/import", response_model=StandardResponse)
+async def import_leads(
+    file: UploadFile = File(..., description="CSV or XLSX file, one lead per row"),
+    current_user: dict = Depends(require_leads_write),
+    db=Depends(get_postgres_db),
+):
+    """Bulk import leads, reporting per-row errors and throughput"""
+    try:
+        importer = LeadImporter(db, current_user["id"])
+        # Rows are read from the spooled upload as they are imported
+        report = await asyncio.to_thread(importer.run, read_rows(file.file, file.filename or ""))
+    except LeadImportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return FastJSONResponse(StandardResponse(
+        status=True,
+        message=f"Imported {report['imported']} of {report['rows']} leads",
+        data=report,
+    ))
+
+
 @router.put("/{lead_id}", response_model=StandardResponse)
 async def update_lead(
     lead_id: str,
@@ -322,11 +284,7 @@ async def update_lead(
         return StandardResponse(
             status=True,
             message="Lead updated successfully",
-            data={
-                "id": lead.id,
-                "project_title": lead.project_title,
-                "status": lead.status.value,
-            },
+            data=lead_serializer(lead, LEAD_SUMMARY_FIELDS),
         )
     except HTTPException:
         raise
@@ -537,8 +495,11 @@ async def upload_lead_document(
         if not lead:
             raise HTTPException(status_code=404, detail="Lead not found")
 
-        # Save file (implement actual file storage logic here)
-        file_path = f"/uploads/leads/{lead.id}/{document_type}_{file.filename}"
+        # Stream the file to document storage
+        stored = await storage.save_upload(
+            file, document_key(f"leads/{lead.id}", f"{document_type}_{file.filename}")
+        )
+        file_path = f"/api/leads/{lead.id}/documents/{stored.key.rsplit('/', 1)[-1]}"
 
         # Add document to lead
         document_data = {
@@ -546,15 +507,83 @@ async def upload_lead_document(
             "quotation_name": quotation_name,
             "file_path": file_path,
             "description": description,
+            "file_name": file.filename,
+            "storage_key": stored.key,
+            "size": stored.size,
+            "sha256": stored.sha256,
+            "content_type": stored.content_type,
         }
 
-        lead_service.add_document(lead_id, document_data, current_user["id"])
+        try:
+            lead_service.add_document(lead_id, document_data, current_user["id"])
+        except Exception:
+            await storage.delete(stored.key)
+            raise
 
         return StandardResponse(
             status=True,
             message="Document uploaded successfully",
-            data={"file_path": file_path, "document_type": document_type},
+            data={
+                "file_path": file_path,
+                "document_type": document_type,
+                "size": stored.size,
+                "sha256": stored.sha256,
+            },
+        )
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/{lead_id}/upload-sessions", response_model=StandardResponse)
+async def create_lead_upload_session(
+    lead_id: int,
+    upload: UploadSessionCreate,
+    current_user: dict = Depends(require_leads_write),
+    db=Depends(get_postgres_db),
+):
+    """Open a resumable upload of a large lead document; parts go to /api/uploads/{session_id}"""
+    try:
+        service = UploadSessionService(db)
+        session = await asyncio.to_thread(
+            service.create_session, "lead", lead_id, upload.dict(), current_user["id"]
+        )
+        return StandardResponse(
+            status=True,
+            message="Upload session created",
+            data=service.describe(session, []),
+        )
+    except UploadSessionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except UploadSessionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{lead_id}/documents/{name}")
+async def download_lead_document(
+    lead_id: int,
+    name: str,
+    range: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    current_user: dict = Depends(require_leads_read),
+    lead_service: LeadService = Depends(get_lead_service),
+):
+    """Stream a lead document; Range requests get 206 Partial Content"""
+    try:
+        if not lead_service.get_lead_version(lead_id):
+            raise HTTPException(status_code=404, detail="Lead not found")
+        return await storage.download(
+            f"leads/{lead_id}/{name}", range, if_none_match, name.split("-", 1)[-1]
         )
+    except ObjectNotFound:
+        raise HTTPException(status_code=404, detail="Document not found")
     except HTTPException:
         raise
     except Exception as e:
@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, Header, UploadFile, File
 from typing import Optional
+from datetime import date, datetime
 from ...schemas.opportunity import (
     OpportunityCreate,
     OpportunityUpdate,
     OpportunityStageUpdate,
     OpportunityCloseRequest,
+    OpportunityBulkTransitionRequest,
     QualificationTaskUpdate,
     DemoTaskUpdate,
     ProposalTaskUpdate,
@@ -12,9 +15,20 @@ from ...schemas.opportunity import (
     WonTaskUpdate,
 )
 from ...schemas.auth import StandardResponse
+from ...schemas.upload import UploadSessionCreate
 from ...dependencies.rbac import require_opportunities_read, require_opportunities_write
-from ...services.opportunity_service import OpportunityService
-from ...dependencies.database import get_postgres_db
+from ...services.opportunity_service import OpportunityService, DOCUMENT_FIELDS
+from ...services.runner import ServiceRunner
+from ...services.upload_sessions import UploadSessionService, UploadSessionError, UploadSessionNotFound
+from ...services.loader_profiles import parse_fields, InvalidFieldsError
+from ...serializers import FastJSONResponse, opportunity_serializer
+from ...utils.pagination import InvalidCursorError, TOTAL_EXACT
+from ...utils.etag import weak_etag, etag_matches, not_modified
+from ...utils.response_cache import response_cache
+from ...utils.export import export_response, EXPORT_FORMAT_PATTERN
+from ...utils.storage import storage, document_key, ObjectNotFound, UploadTooLarge
+from ...dependencies.database import get_postgres_db, get_data_session
+from ...config import settings
 
 router = APIRouter(
     prefix="/api/opportunities", tags=["Enhanced Opportunity Management"]
@@ -27,49 +41,8 @@ async def get_opportunity_service(
     return OpportunityService(postgres_pool)
 
 
-# Utility for transforming opportunity objects to dict
-
-
-def transform_opportunity(opp):
-    return {
-        "id": opp.id,
-        "pot_id": opp.pot_id,
-        "lead_id": opp.lead_id,
-        "company_id": opp.company_id,
-        "contact_id": opp.contact_id,
-        "name": opp.name,
-        "stage": opp.stage.value,
-        "amount": opp.amount,
-        "scoring": opp.scoring,
-        "bom_id": opp.bom_id,
-        "costing": opp.costing,
-        "status": opp.status.value,
-        "justification": opp.justification,
-        "close_date": opp.close_date,
-        "probability": opp.probability,
-        "notes": opp.notes,
-        "company_name": opp.company_name,
-        "contact_name": opp.contact_name,
-        "contact_email": getattr(opp.contact, "email", None),
-        "lead_source": getattr(opp.lead, "source", None),
-        "created_by_name": opp.creator_name,
-        "qualification_completer_name": (
-            getattr(opp.qualification_completer, "name", None)
-            if opp.qualification_completer
-            else None
-        ),
-        "delivery_team_member_name": (
-            getattr(opp.delivery_team_member, "name", None)
-            if opp.delivery_team_member
-            else None
-        ),
-        "is_active": opp.is_active,
-        "created_on": opp.created_on,
-        "updated_on": opp.updated_on,
-        "stage_percentage": opp.stage_percentage,
-        "stage_display_name": opp.stage_display_name,
-        # **opp.stage_specific_fields(),  # assuming all stage-specific fields are packed in one method
-    }
+async def get_opportunity_runner(db=Depends(get_data_session)) -> ServiceRunner:
+    return ServiceRunner(OpportunityService, db)
 
 
 @router.get("/", response_model=StandardResponse)
@@ -81,56 +54,117 @@ async def get_opportunities(
     status: Optional[str] = None,
     company_id: Optional[int] = None,
     lead_id: Optional[int] = None,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+    include_total: str = Query(TOTAL_EXACT, pattern="^(false|exact|estimate)$"),
+    fields: Optional[str] = Query(None, description="Comma separated opportunity fields to return (default: all)"),
+    if_none_match: Optional[str] = Header(None),
     current_user: dict = Depends(require_opportunities_read),
-    opportunity_service: OpportunityService = Depends(get_opportunity_service),
+    opportunity_runner: ServiceRunner = Depends(get_opportunity_runner),
 ):
     try:
-        if company_id:
-            opportunities = opportunity_service.get_opportunities_by_company(
-                company_id, skip, limit
-            )
-        elif lead_id:
-            opportunities = opportunity_service.get_opportunities_by_lead(
-                lead_id, skip, limit
-            )
-        else:
-            opportunities = opportunity_service.get_opportunities(
-                skip, limit, stage, status, search
+        fieldset = parse_fields(fields, opportunity_serializer.fields)
+
+        def load(service: OpportunityService):
+            etag = weak_etag(
+                service.get_opportunities_version(stage, status, search, company_id, lead_id),
+                {
+                    "skip": skip, "limit": limit, "search": search, "stage": stage,
+                    "status": status, "company_id": company_id, "lead_id": lead_id,
+                    "cursor": cursor, "include_total": include_total, "fields": fields,
+                },
             )
-
-        total = opportunity_service.get_opportunity_count(stage, status, search)
-        return StandardResponse(
+            if etag_matches(if_none_match, etag):
+                return etag, None
+            if company_id:
+                page = service.get_opportunities_by_company_page(
+                    company_id, skip, limit, cursor, include_total, fieldset
+                )
+            elif lead_id:
+                page = service.get_opportunities_by_lead_page(
+                    lead_id, skip, limit, cursor, include_total, fieldset
+                )
+            else:
+                page = service.get_opportunities_page(
+                    skip, limit, stage, status, search, cursor, include_total, fieldset
+                )
+            opportunity_list = opportunity_serializer.many(page.items, fieldset)
+            return etag, (opportunity_list, page.total, page.next_cursor)
+
+        etag, loaded = await opportunity_runner.run(load)
+        if loaded is None:
+            return not_modified(etag)
+        opportunity_list, total, next_cursor = loaded
+        return FastJSONResponse(StandardResponse(
             status=True,
             message="Opportunities retrieved successfully",
             data={
-                "opportunities": [transform_opportunity(opp) for opp in opportunities],
+                "opportunities": opportunity_list,
                 "total": total,
                 "skip": skip,
                 "limit": limit,
+                "next_cursor": next_cursor,
             },
-        )
+        ), headers={"ETag": etag})
     except HTTPException:
         raise
+    except (InvalidCursorError, InvalidFieldsError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(e)
         raise e
 
 
+@router.get("/export")
+async def export_opportunities(
+    format: str = Query("csv", pattern=EXPORT_FORMAT_PATTERN),
+    search: Optional[str] = None,
+    stage: Optional[str] = None,
+    status: Optional[str] = None,
+    company_id: Optional[int] = None,
+    lead_id: Optional[int] = None,
+    fields: Optional[str] = Query(None, description="Comma separated opportunity fields to export (default: all)"),
+    current_user: dict = Depends(require_opportunities_read),
+):
+    """Stream every opportunity matching the list filters as CSV or NDJSON"""
+    try:
+        fieldset = parse_fields(fields, opportunity_serializer.fields)
+        return export_response(
+            lambda db: OpportunityService(db).get_opportunities_export_query(
+                stage, status, search, company_id, lead_id, fieldset
+            ),
+            opportunity_serializer, fieldset, format,
+            f"opportunities-{datetime.utcnow():%Y%m%d}",
+        )
+    except InvalidFieldsError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/{opportunity_id}", response_model=StandardResponse)
 async def get_opportunity(
     opportunity_id: int,
+    if_none_match: Optional[str] = Header(None),
     current_user: dict = Depends(require_opportunities_read),
     opportunity_service: OpportunityService = Depends(get_opportunity_service),
 ):
     try:
+        version = opportunity_service.get_opportunity_version(opportunity_id)
+        if not version:
+            raise HTTPException(status_code=404, detail="Opportunity not found")
+        etag = weak_etag(version.id, version.updated_on)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
         opportunity = opportunity_service.get_opportunity_by_id(opportunity_id)
         if not opportunity:
             raise HTTPException(status_code=404, detail="Opportunity not found")
-        return StandardResponse(
+        return FastJSONResponse(StandardResponse(
             status=True,
             message="Opportunity retrieved successfully",
-            data=transform_opportunity(opportunity),
-        )
+            data=opportunity_serializer(opportunity),
+        ), headers={"ETag": etag})
     except HTTPException:
         raise
     except Exception as e:
@@ -348,6 +382,37 @@ async def close_opportunity(
         raise e
 
 
+@router.post("/bulk-transition", response_model=StandardResponse)
+async def bulk_transition_opportunities(
+    request: OpportunityBulkTransitionRequest,
+    current_user: dict = Depends(require_opportunities_write),
+    opportunity_runner: ServiceRunner = Depends(get_opportunity_runner),
+):
+    """Change the stage of, or close, many opportunities in one transaction"""
+    try:
+        count = sum(len(transition.ids) for transition in request.transitions)
+        if count > settings.OPPORTUNITY_BULK_MAX_ITEMS:
+            raise HTTPException(
+                status_code=422,
+                detail=f"At most {settings.OPPORTUNITY_BULK_MAX_ITEMS} opportunities can be changed at once",
+            )
+        transitions = [transition.dict() for transition in request.transitions]
+        results = await opportunity_runner.run(
+            lambda service: service.bulk_transition(transitions, current_user["id"])
+        )
+        updated = sum(1 for result in results if result["success"])
+        return StandardResponse(
+            status=True,
+            message=f"{updated} of {len(results)} opportunities updated",
+            data={"updated": updated, "failed": len(results) - updated, "results": results},
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.delete("/{opportunity_id}", response_model=StandardResponse)
 async def delete_opportunity(
     opportunity_id: int,
@@ -375,10 +440,16 @@ async def get_pipeline_summary(
     opportunity_service: OpportunityService = Depends(get_opportunity_service),
 ):
     try:
+        cached = response_cache.lookup(
+            "opportunities:pipeline_summary", current_user, ("opportunities",), user_id=user_id
+        )
+        if cached.hit:
+            return cached.response()
+
         summary = opportunity_service.get_pipeline_summary(user_id)
-        return StandardResponse(
+        return cached.store(StandardResponse(
             status=True, message="Pipeline summary retrieved successfully", data=summary
-        )
+        ))
     except HTTPException:
         raise
     except Exception as e:
@@ -389,11 +460,16 @@ async def get_pipeline_summary(
 @router.get("/analytics/metrics", response_model=StandardResponse)
 async def get_opportunity_metrics(
     user_id: Optional[int] = None,
+    group_by: Optional[str] = Query(None, pattern="^(month|created_by|company)$"),
+    date_from: Optional[date] = Query(None, description="Earliest close_date"),
+    date_to: Optional[date] = Query(None, description="Latest close_date"),
     current_user: dict = Depends(require_opportunities_read),
     opportunity_service: OpportunityService = Depends(get_opportunity_service),
 ):
     try:
-        metrics = opportunity_service.get_opportunity_metrics(user_id)
+        metrics = opportunity_service.get_opportunity_metrics(
+            user_id, group_by, date_from, date_to
+        )
         return StandardResponse(
             status=True,
             message="Opportunity metrics retrieved successfully",
@@ -411,44 +487,106 @@ async def upload_opportunity_document(
     opportunity_id: int,
     file: UploadFile = File(...),
     document_type: str = Query(
-        ..., description="Type of document: quotation, proposal, loi, etc."
+        ..., description=f"Type of document: {', '.join(DOCUMENT_FIELDS)}"
     ),
     current_user: dict = Depends(require_opportunities_write),
     opportunity_service: OpportunityService = Depends(get_opportunity_service),
 ):
     try:
+        # Only these types have somewhere to record the file
+        if document_type not in DOCUMENT_FIELDS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown document type '{document_type}', expected one of: {', '.join(DOCUMENT_FIELDS)}",
+            )
         opportunity = opportunity_service.get_opportunity_by_id(opportunity_id)
         if not opportunity:
             raise HTTPException(status_code=404, detail="Opportunity not found")
 
-        file_path = f"/uploads/opportunities/{opportunity.pot_id}/{document_type}_{file.filename}"
-
-        doc_field_map = {
-            "quotation": "quotation_file_path",
-            "proposal": "proposal_file_path",
-            "updated_proposal": "updated_proposal_file_path",
-            "negotiated_quotation": "negotiated_quotation_file_path",
-            "loi": "loi_file_path",
-        }
-
-        update_data = (
-            {doc_field_map[document_type]: file_path}
-            if document_type in doc_field_map
-            else {}
+        stored = await storage.save_upload(
+            file,
+            document_key(f"opportunities/{opportunity.id}", f"{document_type}_{file.filename}"),
         )
-
-        if update_data:
-            opportunity_service.update_opportunity(
-                opportunity_id, update_data, current_user["id"]
+        file_path = (
+            f"/api/opportunities/{opportunity.id}/documents/{stored.key.rsplit('/', 1)[-1]}"
+        )
+        try:
+            opportunity_service.attach_document(
+                opportunity_id, document_type, file_path, current_user["id"]
             )
+        except Exception:
+            await storage.delete(stored.key)
+            raise
 
         return StandardResponse(
             status=True,
             message="Document uploaded successfully",
-            data={"file_path": file_path, "document_type": document_type},
+            data={
+                "file_path": file_path,
+                "document_type": document_type,
+                "size": stored.size,
+                "sha256": stored.sha256,
+            },
         )
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
         print(e)
         raise e
+
+
+@router.post("/{opportunity_id}/upload-sessions", response_model=StandardResponse)
+async def create_opportunity_upload_session(
+    opportunity_id: int,
+    upload: UploadSessionCreate,
+    current_user: dict = Depends(require_opportunities_write),
+    db=Depends(get_postgres_db),
+):
+    """Open a resumable upload of a large opportunity document; parts go to /api/uploads/{session_id}"""
+    try:
+        service = UploadSessionService(db)
+        session = await asyncio.to_thread(
+            service.create_session, "opportunity", opportunity_id, upload.dict(), current_user["id"]
+        )
+        return StandardResponse(
+            status=True,
+            message="Upload session created",
+            data=service.describe(session, []),
+        )
+    except UploadSessionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except UploadSessionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{opportunity_id}/documents/{name}")
+async def download_opportunity_document(
+    opportunity_id: int,
+    name: str,
+    range: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    current_user: dict = Depends(require_opportunities_read),
+    opportunity_service: OpportunityService = Depends(get_opportunity_service),
+):
+    """Stream an opportunity document; Range requests get 206 Partial Content"""
+    try:
+        if not opportunity_service.get_opportunity_version(opportunity_id):
+            raise HTTPException(status_code=404, detail="Opportunity not found")
+        return await storage.download(
+            f"opportunities/{opportunity_id}/{name}", range, if_none_match,
+            name.split("-", 1)[-1],
+        )
+    except ObjectNotFound:
+        raise HTTPException(status_code=404, detail="Document not found")
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(e)
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,41 @@
+"""
+Global search API endpoints
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
+from ...schemas.auth import StandardResponse
+from ...dependencies.auth import get_current_user
+from ...dependencies.rbac import has_permission
+from ...serializers import FastJSONResponse
+from ...services.suggest_index import suggest_index, SUGGEST_TYPES, SUGGEST_PERMISSIONS
+
+router = APIRouter(prefix="/api/search", tags=["Search"])
+
+
+@router.get("/suggest", response_model=StandardResponse)
+async def suggest(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    types: Optional[str] = Query(
+        None, description=f"Comma separated subset of: {', '.join(SUGGEST_TYPES)}"
+    ),
+    current_user: dict = Depends(get_current_user),
+):
+    """Typeahead suggestions across companies, contacts, users and POT IDs"""
+    requested = SUGGEST_TYPES
+    if types:
+        requested = [t.strip() for t in types.split(",") if t.strip()]
+        unknown = sorted(set(requested) - set(SUGGEST_TYPES))
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown suggestion types: {', '.join(unknown)}")
+
+    # Only suggest entities the user could open
+    allowed = [t for t in requested if has_permission(current_user, SUGGEST_PERMISSIONS[t])]
+    results = suggest_index.suggest(q, limit, allowed) if allowed else []
+
+    return FastJSONResponse(StandardResponse(
+        status=True,
+        message="Suggestions retrieved successfully",
+        data={"query": q, "results": results},
+    ))
@@ -0,0 +1,136 @@
+"""
+Resumable upload session endpoints (sessions are opened under the lead /
+opportunity they belong to, see services/upload_sessions.py)
+"""
+
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Path, Request
+from ...schemas.auth import StandardResponse
+from ...dependencies.auth import get_current_user
+from ...dependencies.rbac import has_permission
+from ...dependencies.database import get_postgres_db
+from ...services.upload_sessions import (
+    UploadSessionService,
+    UploadSessionError,
+    UploadSessionNotFound,
+    UploadSessionGone,
+)
+from ...utils.storage import storage, ObjectNotFound, PartSizeMismatch
+
+router = APIRouter(prefix="/api/uploads", tags=["Resumable Uploads"])
+
+# Permission needed to upload documents to each entity type
+UPLOAD_PERMISSIONS = {"lead": "leads:write", "opportunity": "opportunities:write"}
+
+
+async def get_upload_session_service(db=Depends(get_postgres_db)) -> UploadSessionService:
+    return UploadSessionService(db)
+
+
+def _check_permission(current_user: dict, entity_type: str):
+    if not has_permission(current_user, UPLOAD_PERMISSIONS[entity_type]):
+        raise HTTPException(
+            status_code=403,
+            detail=f"One of these permissions required: ['{UPLOAD_PERMISSIONS[entity_type]}']",
+        )
+
+
+@router.get("/{session_id}", response_model=StandardResponse)
+async def get_upload_session(
+    session_id: str,
+    current_user: dict = Depends(get_current_user),
+    service: UploadSessionService = Depends(get_upload_session_service),
+):
+    """Session state and the parts received so far, for resuming an upload"""
+    try:
+        session = service.get_session(session_id, current_user["id"])
+        _check_permission(current_user, session.entity_type)
+        data = await asyncio.to_thread(service.session_status, session_id, current_user["id"])
+        return StandardResponse(status=True, message="Upload session retrieved", data=data)
+    except UploadSessionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.put("/{session_id}/parts/{part_number}", response_model=StandardResponse)
+async def upload_part(
+    request: Request,
+    session_id: str,
+    part_number: int = Path(..., ge=1),
+    current_user: dict = Depends(get_current_user),
+    service: UploadSessionService = Depends(get_upload_session_service),
+):
+    """
+    Store one part (the raw request body). Parts can be sent in any order
+    and in parallel; sending a part again replaces it.
+    """
+    try:
+        entity_type, key, upload_id, size = service.part_target(
+            session_id, current_user["id"], part_number
+        )
+        _check_permission(current_user, entity_type)
+        sha256 = await storage.save_part(key, upload_id, part_number, request.stream(), size)
+        return StandardResponse(
+            status=True,
+            message="Part uploaded",
+            data={"part_number": part_number, "size": size, "sha256": sha256},
+        )
+    except UploadSessionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except (UploadSessionGone, ObjectNotFound):
+        raise HTTPException(status_code=410, detail="Upload session is no longer open")
+    except (UploadSessionError, PartSizeMismatch) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/{session_id}/complete", response_model=StandardResponse)
+async def complete_upload_session(
+    session_id: str,
+    current_user: dict = Depends(get_current_user),
+    service: UploadSessionService = Depends(get_upload_session_service),
+):
+    """Assemble the parts and attach the document to its lead / opportunity"""
+    try:
+        session = service.get_session(session_id, current_user["id"])
+        _check_permission(current_user, session.entity_type)
+        data = await asyncio.to_thread(service.complete, session_id, current_user["id"])
+        return StandardResponse(status=True, message="Document uploaded successfully", data=data)
+    except UploadSessionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except (UploadSessionGone, ObjectNotFound) as e:
+        raise HTTPException(status_code=410, detail=str(e) or "Upload session is no longer open")
+    except UploadSessionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.delete("/{session_id}", response_model=StandardResponse)
+async def abort_upload_session(
+    session_id: str,
+    current_user: dict = Depends(get_current_user),
+    service: UploadSessionService = Depends(get_upload_session_service),
+):
+    """Abort an upload and discard the parts received"""
+    try:
+        session = service.get_session(session_id, current_user["id"])
+        _check_permission(current_user, session.entity_type)
+        await asyncio.to_thread(service.abort, session_id, current_user["id"])
+        return StandardResponse(status=True, message="Upload session aborted")
+    except UploadSessionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except UploadSessionGone as e:
+        raise HTTPException(status_code=410, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -7,8 +7,12 @@ from typing import List, Optional
 from ...schemas.user import UserCreate, UserUpdate
 from ...schemas.auth import StandardResponse
 from ...dependencies.rbac import require_users_read, require_users_write, require_admin_role
-from ...dependencies.database import get_postgres_db
+from ...dependencies.database import get_postgres_db, get_data_session
 from ...services.user_service import UserService
+from ...services.runner import ServiceRunner
+from ...utils.pagination import InvalidCursorError, TOTAL_EXACT
+from ...utils.response_cache import response_cache
+from ...utils.auth import hash_password_async
 from ...models import Role, Department
 
 router = APIRouter(prefix="/api/users", tags=["User Management"])
@@ -16,35 +20,43 @@ router = APIRouter(prefix="/api/users", tags=["User Management"])
 def get_user_service(db: Session = Depends(get_postgres_db)) -> UserService:
     return UserService(db)
 
+def get_user_runner(db=Depends(get_data_session)) -> ServiceRunner:
+    return ServiceRunner(UserService, db)
+
 @router.get("/", response_model=StandardResponse)
 async def get_users(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
     search: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+    include_total: str = Query(TOTAL_EXACT, pattern="^(false|exact|estimate)$"),
     current_user: dict = Depends(require_users_read),
-    user_service: UserService = Depends(get_user_service)
+    user_runner: ServiceRunner = Depends(get_user_runner)
 ):
     """Get all users with pagination and search"""
     try:
-        users = user_service.get_users(skip, limit, search)
-        total = user_service.get_user_count(search)
-        
-        # Convert SQLAlchemy objects to dict
-        users_data = []
-        for user in users:
-            user_dict = {
-                "id": user.id,
-                "name": user.name,
-                "email": user.email,
-                "username": user.username,
-                "role_name": user.role.name if user.role else None,
-                "department_name": user.department.name if user.department else None,
-                "is_active": user.is_active,
-                "created_on": user.created_on.isoformat() if user.created_on else None,
-                "last_login": user.last_login.isoformat() if user.last_login else None
-            }
-            users_data.append(user_dict)
-        
+        def load(service: UserService):
+            page = service.get_users_page(skip, limit, search, cursor, include_total)
+
+            # Convert SQLAlchemy objects to dict
+            users_data = []
+            for user in page.items:
+                user_dict = {
+                    "id": user.id,
+                    "name": user.name,
+                    "email": user.email,
+                    "username": user.username,
+                    "role_name": user.role.name if user.role else None,
+                    "department_name": user.department.name if user.department else None,
+                    "is_active": user.is_active,
+                    "created_on": user.created_on.isoformat() if user.created_on else None,
+                    "last_login": user.last_login.isoformat() if user.last_login else None
+                }
+                users_data.append(user_dict)
+            return users_data, page.total, page.next_cursor
+
+        users_data, total, next_cursor = await user_runner.run(load)
+
         return StandardResponse(
             status=True,
             message="Users retrieved successfully",
@@ -52,9 +64,12 @@ async def get_users(
                 "users": users_data,
                 "total": total,
                 "skip": skip,
-                "limit": limit
+                "limit": limit,
+                "next_cursor": next_cursor
             }
         )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(e)
 
@@ -102,7 +117,8 @@ async def create_user(
 ):
     """Create new user"""
     try:
-        user = user_service.create_user(user_data, current_user["id"])
+        password_hash = await hash_password_async(user_data.password)
+        user = user_service.create_user(user_data, current_user["id"], password_hash)
         
         user_dict = {
             "id": user.id,
@@ -187,6 +203,10 @@ async def get_roles(
 ):
     """Get all roles"""
     try:
+        cached = response_cache.lookup("roles:list", current_user, ("roles",))
+        if cached.hit:
+            return cached.response()
+
         roles = db.query(Role).filter(Role.is_active == True).all()
         roles_data = [
             {
@@ -198,11 +218,11 @@ async def get_roles(
             for role in roles
         ]
         
-        return StandardResponse(
+        return cached.store(StandardResponse(
             status=True,
             message="Roles retrieved successfully",
             data={"roles": roles_data}
-        )
+        ))
     except Exception as e:
         print(e)
 
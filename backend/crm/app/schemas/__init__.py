@@ -48,6 +48,7 @@ from .opportunity import (
     OpportunityStage,
     OpportunityStatus,
 )
+from .upload import UploadSessionCreate
 
 __all__ = [
     # Auth schemas
@@ -102,4 +103,6 @@ __all__ = [
     "OpportunityMetrics",
     "OpportunityStage",
     "OpportunityStatus",
+    # Upload schemas
+    "UploadSessionCreate",
 ]
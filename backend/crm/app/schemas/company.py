@@ -109,9 +109,10 @@ class CompanyResponse(CompanyBase):
 
 class CompanyListResponse(BaseModel):
     companies: list[CompanyResponse]
-    total: int
+    total: Optional[int] = None
     skip: int
     limit: Optional[int] = None
+    next_cursor: Optional[str] = None
 
     class Config:
         orm_mode = True  # Crucial!
@@ -68,9 +68,10 @@ class ContactResponse(ContactBase):
 
 class ContactListResponse(BaseModel):
     contacts: list[ContactResponse]
-    total: int
+    total: Optional[int] = None
     skip: int
     limit: int
+    next_cursor: Optional[str] = None
 
 class BusinessCardUpload(BaseModel):
     """Schema for business card file upload"""
@@ -266,9 +266,10 @@ class LeadResponse(LeadBase):
 
 class LeadListResponse(BaseModel):
     leads: List[LeadResponse]
-    total: int
+    total: Optional[int] = None
     skip: int
     limit: int
+    next_cursor: Optional[str] = None
 
 
 # Conversion Workflow Schemas
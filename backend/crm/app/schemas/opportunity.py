@@ -285,9 +285,10 @@ class OpportunityResponse(OpportunityBase):
 
 class OpportunityListResponse(BaseModel):
     opportunities: List[OpportunityResponse]
-    total: int
+    total: Optional[int] = None
     skip: int
     limit: int
+    next_cursor: Optional[str] = None
 
 
 class OpportunityStageUpdate(BaseModel):
@@ -318,6 +319,42 @@ class OpportunityCloseRequest(BaseModel):
     drop_reason: Optional[str] = None
 
 
+class OpportunityBulkTransition(BaseModel):
+    """
+    A stage change (``stage``) or a close (``status`` + ``close_date``)
+    applied to every opportunity in ``ids``
+    """
+
+    ids: List[int]
+    stage: Optional[OpportunityStage] = None
+    status: Optional[Literal["Won", "Lost", "Dropped"]] = None
+    close_date: Optional[date] = None
+    notes: Optional[str] = None
+    lost_reason: Optional[str] = None
+    competitor_name: Optional[str] = None
+    drop_reason: Optional[str] = None
+
+    @validator("ids")
+    def validate_ids(cls, v):
+        if not v:
+            raise ValueError("At least one opportunity id is required")
+        return v
+
+    @validator("close_date", always=True)
+    def validate_transition(cls, v, values):
+        if (values.get("stage") is None) == (values.get("status") is None):
+            raise ValueError("Give either a stage or a closing status")
+        if values.get("status") is not None and v is None:
+            raise ValueError("close_date is required when closing opportunities")
+        return v
+
+
+class OpportunityBulkTransitionRequest(BaseModel):
+    """Schema for changing the stage or closing many opportunities at once"""
+
+    transitions: List[OpportunityBulkTransition]
+
+
 class OpportunityPipelineSummary(BaseModel):
     """Opportunity pipeline summary"""
 
@@ -0,0 +1,29 @@
+"""
+Resumable upload session schemas
+"""
+
+from pydantic import BaseModel, validator
+from typing import Optional
+
+
+class UploadSessionCreate(BaseModel):
+    """Schema for opening a resumable upload of one document"""
+
+    file_name: str
+    total_size: int
+    document_type: str
+    content_type: Optional[str] = None
+    quotation_name: Optional[str] = None
+    description: Optional[str] = None
+
+    @validator("total_size")
+    def validate_total_size(cls, v):
+        if v < 1:
+            raise ValueError("total_size must be at least 1 byte")
+        return v
+
+    @validator("file_name", "document_type")
+    def validate_name(cls, v):
+        if not v.strip():
+            raise ValueError("Must not be empty")
+        return v.strip()
@@ -89,9 +89,10 @@ class UserResponse(UserBase):
 
 class UserListResponse(BaseModel):
     users: list[UserResponse]
-    total: int
+    total: Optional[int] = None
     skip: int
     limit: int
+    next_cursor: Optional[str] = None
 
 class RoleBase(BaseModel):
     name: str
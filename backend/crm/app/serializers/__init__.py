@@ -0,0 +1,20 @@
+"""
+Response serializers for CRM application
+"""
+from .base import EntitySerializer, FastJSONResponse, dumps
+from .lead import lead_serializer, LEAD_SUMMARY_FIELDS, LEAD_PENDING_REVIEW_FIELDS
+from .opportunity import opportunity_serializer
+from .contact import contact_serializer
+from .company import company_serializer
+
+__all__ = [
+    "EntitySerializer",
+    "FastJSONResponse",
+    "dumps",
+    "lead_serializer",
+    "LEAD_SUMMARY_FIELDS",
+    "LEAD_PENDING_REVIEW_FIELDS",
+    "opportunity_serializer",
+    "contact_serializer",
+    "company_serializer",
+]
@@ -0,0 +1,118 @@
+"""
+Precompiled entity serializers and the orjson response class
+
+An EntitySerializer is declared once per entity as an ordered map of
+output field -> source, where the source is either a (dotted) attribute
+path such as ``"status.value"`` or a callable for values that need logic.
+For each fieldset the sources are compiled once: plain column paths become
+one ``operator.itemgetter`` over the instance's loaded state (skipping the
+ORM attribute descriptor per field), other paths one ``attrgetter``, so
+serializing a row is a couple of C calls instead of a 60-key dict literal.
+Rows with unloaded or expired columns fall back to normal attribute access.
+
+Responses are encoded straight to bytes with orjson. Decimals are emitted
+as strings and datetimes as ISO 8601, matching the previous Pydantic
+output byte for byte.
+"""
+from decimal import Decimal
+from operator import attrgetter, itemgetter
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Union
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import inspect
+
+FieldSource = Union[str, Callable[[Any], Any]]
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, BaseModel):
+        return obj.__dict__
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode ``content`` (dicts, lists, Pydantic models, ORM values) to JSON bytes"""
+    return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson (the application's default response class)"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class EntitySerializer:
+    """Serialize ORM rows to dicts from a declarative field map"""
+
+    def __init__(self, model, fields: Dict[str, FieldSource]):
+        self.model = model
+        self.fields = fields
+        self._compiled: Dict[Optional[FrozenSet[str]], Callable[[Any], dict]] = {}
+
+    def compile(self, fields: Optional[Iterable[str]] = None) -> Callable[[Any], dict]:
+        """Return (and cache) the row serializer for a fieldset; None means every field"""
+        key = frozenset(fields) if fields is not None else None
+        serialize = self._compiled.get(key)
+        if serialize is None:
+            serialize = self._compiled[key] = self._build(key)
+        return serialize
+
+    def _build(self, fields: Optional[FrozenSet[str]]) -> Callable[[Any], dict]:
+        selected = [
+            (name, source) for name, source in self.fields.items()
+            if fields is None or name in fields
+        ]
+        column_keys = set(inspect(self.model).column_attrs.keys())
+        columns = [(name, source) for name, source in selected if source in column_keys]
+        paths = [
+            (name, source) for name, source in selected
+            if isinstance(source, str) and source not in column_keys
+        ]
+        computed = [(name, source) for name, source in selected if not isinstance(source, str)]
+
+        column_names = tuple(name for name, _ in columns)
+        column_keys = [key for _, key in columns]
+        path_names = tuple(name for name, _ in paths)
+        read_state = _tuple_getter(itemgetter, column_keys)
+        read_columns = _tuple_getter(attrgetter, column_keys)
+        read_paths = _tuple_getter(attrgetter, [path for _, path in paths])
+
+        def serialize(obj):
+            try:
+                values = read_state(obj.__dict__)
+            except KeyError:
+                values = read_columns(obj)
+            row = dict(zip(column_names, values))
+            if path_names:
+                row.update(zip(path_names, read_paths(obj)))
+            for name, source in computed:
+                row[name] = source(obj)
+            return row
+
+        return serialize
+
+    def __call__(self, obj, fields: Optional[Iterable[str]] = None) -> dict:
+        return self.compile(fields)(obj)
+
+    def many(self, objs: Iterable[Any], fields: Optional[Iterable[str]] = None) -> List[dict]:
+        serialize = self.compile(fields)
+        return [serialize(obj) for obj in objs]
+
+
+def _tuple_getter(getter_factory, keys) -> Callable[[Any], tuple]:
+    """itemgetter/attrgetter that always returns a tuple, even for 0 or 1 keys"""
+    if not keys:
+        return lambda obj: ()
+    if len(keys) == 1:
+        single = getter_factory(keys[0])
+        return lambda obj: (single(obj),)
+    return getter_factory(*keys)
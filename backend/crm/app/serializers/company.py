@@ -0,0 +1,27 @@
+"""
+Company serializer (company exports)
+"""
+from ..models import Company
+from .base import EntitySerializer
+
+company_serializer = EntitySerializer(Company, {
+    "id": "id",
+    "name": "name",
+    "gst_number": "gst_number",
+    "pan_number": "pan_number",
+    "parent_company_id": "parent_company_id",
+    "parent_company_name": lambda company: (
+        company.parent_company.name if company.parent_company else None
+    ),
+    "industry_category": "industry_category",
+    "address": "address",
+    "city": "city",
+    "state": "state",
+    "country": "country",
+    "postal_code": "postal_code",
+    "website": "website",
+    "description": "description",
+    "is_active": "is_active",
+    "created_on": "created_on",
+    "updated_on": "updated_on",
+})
@@ -0,0 +1,20 @@
+"""
+Contact serializer (contact exports)
+"""
+from ..models import Contact
+from .base import EntitySerializer
+
+contact_serializer = EntitySerializer(Contact, {
+    "id": "id",
+    "full_name": "full_name",
+    "designation": "designation",
+    "email": "email",
+    "phone_number": "phone_number",
+    "company_id": "company_id",
+    "company_name": lambda contact: contact.company.name if contact.company else None,
+    "role_type": "role_type.value",
+    "business_card_path": "business_card_path",
+    "is_active": "is_active",
+    "created_on": "created_on",
+    "updated_on": "updated_on",
+})
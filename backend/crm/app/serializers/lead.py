@@ -0,0 +1,80 @@
+"""
+Lead serializer shared by the lead endpoints
+"""
+from ..models import Lead
+from .base import EntitySerializer
+
+lead_serializer = EntitySerializer(Lead, {
+    "id": "id",
+    "project_title": "project_title",
+    "lead_source": "lead_source.value",
+    "lead_sub_type": "lead_sub_type.value",
+    "tender_sub_type": "tender_sub_type.value",
+    "products_services": lambda lead: lead.products_services or [],
+    "company_id": "company_id",
+    "sub_business_type": "sub_business_type",
+    "end_customer_id": "end_customer_id",
+    "end_customer_region": "end_customer_region",
+    "partner_involved": "partner_involved",
+    "partners_data": lambda lead: lead.partners_data or [],
+    "tender_fee": "tender_fee",
+    "currency": "currency",
+    "submission_type": lambda lead: (
+        lead.submission_type.value if lead.submission_type else None
+    ),
+    "tender_authority": "tender_authority",
+    "tender_for": "tender_for",
+    "emd_required": "emd_required",
+    "emd_amount": "emd_amount",
+    "emd_currency": "emd_currency",
+    "bg_required": "bg_required",
+    "bg_amount": "bg_amount",
+    "bg_currency": "bg_currency",
+    "important_dates": lambda lead: lead.important_dates or [],
+    "clauses": lambda lead: lead.clauses or [],
+    "expected_revenue": "expected_revenue",
+    "revenue_currency": "revenue_currency",
+    "convert_to_opportunity_date": "convert_to_opportunity_date",
+    "competitors": lambda lead: lead.competitors or [],
+    "documents": lambda lead: lead.documents or [],
+    "status": "status.value",
+    "priority": "priority.value",
+    "qualification_notes": "qualification_notes",
+    "lead_score": "lead_score",
+    "contacts": lambda lead: lead.contacts or [],
+    "company_name": "company_name",
+    "end_customer_name": "end_customer_name",
+    "creator_name": "creator_name",
+    "conversion_requester_name": "conversion_requester_name",
+    "reviewer_name": "reviewer_name",
+    "ready_for_conversion": "ready_for_conversion",
+    "conversion_requested": "conversion_requested",
+    "conversion_request_date": "conversion_request_date",
+    "reviewed": "reviewed",
+    "review_status": "review_status.value",
+    "review_date": "review_date",
+    "review_comments": "review_comments",
+    "converted": "converted",
+    "converted_to_opportunity_id": "converted_to_opportunity_id",
+    "conversion_date": "conversion_date",
+    "conversion_notes": "conversion_notes",
+    "can_request_conversion": "can_request_conversion",
+    "can_convert_to_opportunity": "can_convert_to_opportunity",
+    "needs_admin_review": "needs_admin_review",
+    "is_active": "is_active",
+    "created_on": "created_on",
+    "updated_on": "updated_on",
+})
+
+# Fieldsets for the smaller lead payloads
+LEAD_SUMMARY_FIELDS = frozenset({"id", "project_title", "status"})
+LEAD_PENDING_REVIEW_FIELDS = frozenset({
+    "id",
+    "project_title",
+    "company_name",
+    "expected_revenue",
+    "conversion_request_date",
+    "conversion_requester_name",
+    "status",
+    "review_status",
+})
@@ -0,0 +1,45 @@
+"""
+Opportunity serializer shared by the opportunity endpoints
+"""
+from ..models import Opportunity
+from .base import EntitySerializer
+
+opportunity_serializer = EntitySerializer(Opportunity, {
+    "id": "id",
+    "pot_id": "pot_id",
+    "lead_id": "lead_id",
+    "company_id": "company_id",
+    "contact_id": "contact_id",
+    "name": "name",
+    "stage": "stage.value",
+    "amount": "amount",
+    "scoring": "scoring",
+    "bom_id": "bom_id",
+    "costing": "costing",
+    "status": "status.value",
+    "justification": "justification",
+    "close_date": "close_date",
+    "probability": "probability",
+    "notes": "notes",
+    "company_name": "company_name",
+    "contact_name": "contact_name",
+    "contact_email": lambda opp: getattr(opp.contact, "email", None),
+    "lead_source": lambda opp: opp.lead.lead_source.value if opp.lead else None,
+    "created_by_name": "creator_name",
+    "qualification_completer_name": lambda opp: (
+        getattr(opp.qualification_completer, "name", None)
+        if opp.qualification_completer
+        else None
+    ),
+    "delivery_team_member_name": lambda opp: (
+        getattr(opp.delivery_team_member, "name", None)
+        if opp.delivery_team_member
+        else None
+    ),
+    "is_active": "is_active",
+    "created_on": "created_on",
+    "updated_on": "updated_on",
+    "stage_percentage": "stage_percentage",
+    "stage_display_name": "stage_display_name",
+    # **opp.stage_specific_fields(),  # assuming all stage-specific fields are packed in one method
+})
@@ -7,6 +7,7 @@ from .company_service import CompanyService
 from .contact_service import ContactService
 from .lead_service import LeadService
 from .opportunity_service import OpportunityService
+from .runner import ServiceRunner
 
 __all__ = [
     "AuthService", 
@@ -14,5 +15,6 @@ __all__ = [
     "CompanyService", 
     "ContactService", 
     "LeadService", 
-    "OpportunityService"
+    "OpportunityService",
+    "ServiceRunner"
 ]
\ No newline at end of file
@@ -7,9 +7,14 @@ from fastapi import HTTPException, Request
 from sqlalchemy.orm import Session
 from ..models import User
 from ..services.user_service import UserService
-from ..utils.auth import verify_password, create_access_token
+from ..utils.auth import (
+    verify_and_update_password_async,
+    create_access_token,
+    build_embedded_claims,
+)
 from ..utils.logger import log_activity
 from ..schemas.auth import UserResponse
+from ..config import settings
 
 
 class AuthService:
@@ -38,7 +43,14 @@ class AuthService:
             )
             raise HTTPException(status_code=401, detail="Invalid credentials")
 
-        if not verify_password(password, user.password_hash):
+        # bcrypt runs on the password hashing pool, not the event loop. Release
+        # the pooled connection first so a login burst can't exhaust the pool
+        # while requests wait on hashing (loaded attributes stay readable).
+        self.db.close()
+        valid, new_hash = await verify_and_update_password_async(
+            password, user.password_hash
+        )
+        if not valid:
             await log_activity(
                 self.mongo_db,
                 str(user.id),
@@ -48,6 +60,10 @@ class AuthService:
             )
             raise HTTPException(status_code=401, detail="Invalid credentials")
 
+        # Transparently upgrade hashes made with a different bcrypt cost
+        if new_hash:
+            self.user_service.update_password_hash(user.id, new_hash)
+
         # Update last login
         self.user_service.update_last_login(user.id)
 
@@ -57,6 +73,8 @@ class AuthService:
             "username": user.username,
             "email": user.email,
         }
+        if settings.JWT_EMBED_CLAIMS:
+            token_data.update(build_embedded_claims(user))
         access_token = create_access_token(token_data)
 
         # Log successful login
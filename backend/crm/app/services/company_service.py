@@ -2,11 +2,19 @@
 Company management service using SQLAlchemy ORM
 """
 
-from typing import Optional, List
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, and_
+from typing import Optional, List, Iterable
+from sqlalchemy.orm import Session
+from sqlalchemy import and_
 from datetime import datetime
-from ..models import Company, User
+from ..models import Company
+from ..utils.pagination import keyset_page, ranked_page, Page, TOTAL_NONE
+from .search_index import search_index
+from .loader_profiles import loader_options, COMPANY_EXPORT, COMPANY_FIELD_SOURCES
+from ..utils.response_cache import response_cache
+
+
+# Cached company lists are dropped when a company write commits
+response_cache.track(Company, "companies")
 
 
 class CompanyService:
@@ -121,36 +129,48 @@ class CompanyService:
         self, skip: int = 0, limit: int = 100, search: str = None
     ) -> List[Company]:
         """Get all companies with pagination and search"""
-        query = self.db.query(Company).filter(
-            and_(Company.is_active == True, Company.deleted_on.is_(None))
-        )
-
-        if search:
-            search_term = f"%{search}%"
-            query = query.filter(
-                or_(
-                    Company.name.ilike(search_term),
-                    Company.industry_category.ilike(search_term),
-                    Company.city.ilike(search_term),
-                )
+        return self.get_companies_page(skip, limit, search)[0]
+
+    def get_companies_page(
+        self, skip: int = 0, limit: int = 100, search: str = None,
+        cursor: Optional[str] = None, include_total: str = TOTAL_NONE,
+    ) -> Page:
+        """Get a page of companies (offset or cursor) and the next cursor"""
+        query, rank = self._filter_companies(self.db.query(Company), search)
+
+        if rank is not None:
+            return ranked_page(
+                query, rank, Company.id, "companies:search", limit,
+                cursor=cursor, skip=skip, include_total=include_total,
             )
-
-        return query.order_by(Company.name).offset(skip).limit(limit).all()
+        return keyset_page(
+            query, Company.name, Company.id, "companies:name", limit,
+            cursor=cursor, skip=skip, include_total=include_total
+        )
 
     def get_company_count(self, search: str = None) -> int:
         """Get total count of companies"""
-        query = self.db.query(Company).filter(
+        query, _ = self._filter_companies(self.db.query(Company), search)
+        return query.count()
+
+    def get_companies_export_query(
+        self, search: str = None, fields: Optional[Iterable[str]] = None
+    ):
+        """Query of every company a list request selects, in id order, for streaming exports"""
+        query = self.db.query(Company).options(*loader_options(
+            COMPANY_EXPORT, fields, COMPANY_FIELD_SOURCES, required=(Company.id,),
+        ))
+        query, _ = self._filter_companies(query, search)
+        return query.order_by(Company.id)
+
+    @staticmethod
+    def _filter_companies(query, search: str = None):
+        """Apply the company list filters; returns (query, search rank or None)"""
+        query = query.filter(
             and_(Company.is_active == True, Company.deleted_on.is_(None))
         )
 
+        rank = None
         if search:
-            search_term = f"%{search}%"
-            query = query.filter(
-                or_(
-                    Company.name.ilike(search_term),
-                    Company.industry_category.ilike(search_term),
-                    Company.city.ilike(search_term),
-                )
-            )
-
-        return query.count()
+            query, rank = search_index.apply(query, Company, search)
+        return query, rank
@@ -1,11 +1,19 @@
 """
 Contact management service using SQLAlchemy ORM
 """
-from typing import Optional, List
+from typing import Optional, List, Iterable
 from datetime import datetime
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, and_
+from sqlalchemy import and_
 from ..models import Contact, Company, User, RoleType
+from ..utils.pagination import keyset_page, ranked_page, Page, TOTAL_NONE
+from .search_index import search_index
+from .loader_profiles import loader_options, CONTACT_LIST, CONTACT_FIELD_SOURCES
+from ..utils.response_cache import response_cache
+
+# Cached contact lists (e.g. decision makers) are dropped when a contact write commits
+response_cache.track(Contact, "contacts")
+
 
 class ContactService:
     def __init__(self, db: Session):
@@ -84,39 +92,45 @@ class ContactService:
     
     def get_contacts(self, skip: int = 0, limit: int = 100, search: str = None) -> List[Contact]:
         """Get all contacts with pagination and search"""
-        query = self.db.query(Contact).options(
-            joinedload(Contact.company)
-        ).filter(
-            and_(
-                Contact.is_active == True,
-                Contact.deleted_on.is_(None)
-            )
+        return self.get_contacts_page(skip, limit, search)[0]
+
+    def get_contacts_page(self, skip: int = 0, limit: int = 100, search: str = None,
+                          cursor: Optional[str] = None, include_total: str = TOTAL_NONE) -> Page:
+        """Get a page of contacts (offset or cursor) and the next cursor"""
+        query, rank = self._filter_contacts(
+            self.db.query(Contact).options(*loader_options(CONTACT_LIST)), search
         )
         
-        if search:
-            search_term = f"%{search}%"
-            query = query.join(Company).filter(
-                or_(
-                    Contact.full_name.ilike(search_term),
-                    Contact.email.ilike(search_term),
-                    Contact.designation.ilike(search_term),
-                    Company.name.ilike(search_term)
-                )
+        if rank is not None:
+            return ranked_page(
+                query, rank, Contact.id, "contacts:search", limit,
+                cursor=cursor, skip=skip, include_total=include_total,
             )
-        
-        return query.order_by(Contact.full_name).offset(skip).limit(limit).all()
+        return keyset_page(
+            query, Contact.full_name, Contact.id, "contacts:full_name", limit,
+            cursor=cursor, skip=skip, include_total=include_total
+        )
     
     def get_contacts_by_company(self, company_id: int, skip: int = 0, limit: int = 100) -> List[Contact]:
         """Get contacts by company"""
-        return self.db.query(Contact).options(
-            joinedload(Contact.company)
+        return self.get_contacts_by_company_page(company_id, skip, limit)[0]
+
+    def get_contacts_by_company_page(self, company_id: int, skip: int = 0, limit: int = 100,
+                                     cursor: Optional[str] = None, include_total: str = TOTAL_NONE) -> Page:
+        """Get a page of a company's contacts and the next cursor"""
+        query = self.db.query(Contact).options(
+            *loader_options(CONTACT_LIST)
         ).filter(
             and_(
                 Contact.company_id == company_id,
                 Contact.is_active == True,
                 Contact.deleted_on.is_(None)
             )
-        ).order_by(Contact.full_name).offset(skip).limit(limit).all()
+        )
+        return keyset_page(
+            query, Contact.full_name, Contact.id, "contacts:full_name", limit,
+            cursor=cursor, skip=skip, include_total=include_total
+        )
     
     def get_decision_makers(self, company_id: int) -> List[Contact]:
         """Get decision makers for a company"""
@@ -131,22 +145,41 @@ class ContactService:
     
     def get_contact_count(self, search: str = None) -> int:
         """Get total count of contacts"""
-        query = self.db.query(Contact).filter(
+        query, _ = self._filter_contacts(self.db.query(Contact), search)
+        return query.count()
+    
+    def get_contacts_export_query(self, search: str = None, company_id: int = None,
+                                  fields: Optional[Iterable[str]] = None):
+        """
+        Query of every contact a list request selects, in id order, for
+        streaming exports; company_id takes precedence like in the list
+        """
+        query = self.db.query(Contact).options(
+            *loader_options(CONTACT_LIST, fields, CONTACT_FIELD_SOURCES, required=(Contact.id,))
+        )
+        if company_id:
+            query = query.filter(
+                and_(
+                    Contact.company_id == company_id,
+                    Contact.is_active == True,
+                    Contact.deleted_on.is_(None)
+                )
+            )
+        else:
+            query, _ = self._filter_contacts(query, search)
+        return query.order_by(Contact.id)
+    
+    @staticmethod
+    def _filter_contacts(query, search: str = None):
+        """Apply the contact list filters; returns (query, search rank or None)"""
+        query = query.filter(
             and_(
                 Contact.is_active == True,
                 Contact.deleted_on.is_(None)
             )
         )
         
+        rank = None
         if search:
-            search_term = f"%{search}%"
-            query = query.join(Company).filter(
-                or_(
-                    Contact.full_name.ilike(search_term),
-                    Contact.email.ilike(search_term),
-                    Contact.designation.ilike(search_term),
-                    Company.name.ilike(search_term)
-                )
-            )
-        
-        return query.count()
\ No newline at end of file
+            query, rank = search_index.apply(query, Contact, search)
+        return query, rank
\ No newline at end of file
@@ -0,0 +1,109 @@
+"""
+Block-allocated sequential IDs backed by the id_sequences counter table
+
+Each worker process reserves a block of values with one atomic
+``UPDATE id_sequences SET next_value = next_value + :block ... RETURNING``
+in its own short transaction, then hands them out from memory. Values are
+unique across workers and processes without a SELECT per ID; a worker that
+exits leaves a gap of at most one block, which is fine for display IDs.
+
+POT IDs keep the ``POT-`` prefix. The legacy random IDs were
+POT-1000..POT-9999, so the sequence starts at 10000 and new IDs simply
+grow in width (POT-10000, POT-10001, ...); existing IDs stay valid.
+"""
+import os
+import threading
+from typing import Tuple
+
+from sqlalchemy import event, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models import IdSequence, Opportunity
+
+POT_ID_PREFIX = "POT-"
+POT_ID_SEQUENCE = "pot_id"
+# First sequential POT number, above the legacy random POT-1000..POT-9999 range
+POT_ID_START = 10000
+
+
+class BlockIdAllocator:
+    """Hands out values of one named sequence, reserving them in blocks"""
+
+    def __init__(self, name: str, start: int, block_size: int):
+        self.name = name
+        self.start = start
+        self.block_size = max(1, block_size)
+        self._next = 0
+        self._end = 0
+        self._lock = threading.Lock()
+        # A forked worker must not hand out the parent's cached block
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def allocate(self, bind) -> int:
+        """Next value; ``bind`` is the engine used to reserve a new block"""
+        with self._lock:
+            if self._next >= self._end:
+                self._next, self._end = self._reserve_block(bind)
+            value = self._next
+            self._next += 1
+            return value
+
+    def reset(self):
+        """Drop the cached block (e.g. after fork, or when switching databases)"""
+        with self._lock:
+            self._next = self._end = 0
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        self._next = self._end = 0
+
+    def _reserve_block(self, bind) -> Tuple[int, int]:
+        table = IdSequence.__table__
+        reserve = (
+            update(table)
+            .where(table.c.name == self.name)
+            .values(next_value=table.c.next_value + self.block_size)
+            .returning(table.c.next_value)
+        )
+        for _ in range(2):
+            # Separate transaction: the block stays reserved even if the
+            # caller's transaction rolls back, and the row lock is short
+            with bind.begin() as conn:
+                end = conn.execute(reserve).scalar()
+            if end is not None:
+                return end - self.block_size, end
+            self._create_sequence(bind)
+        raise RuntimeError(f"Could not reserve a block from sequence {self.name}")
+
+    def _create_sequence(self, bind):
+        try:
+            with bind.begin() as conn:
+                conn.execute(
+                    insert(IdSequence.__table__).values(name=self.name, next_value=self.start)
+                )
+        except IntegrityError:
+            pass  # another worker created it first
+
+
+pot_id_allocator = BlockIdAllocator(POT_ID_SEQUENCE, POT_ID_START, settings.POT_ID_BLOCK_SIZE)
+
+
+def format_pot_id(number: int) -> str:
+    """POT-{number}, at least four digits (legacy IDs are POT-1000..POT-9999)"""
+    return f"{POT_ID_PREFIX}{number:04d}"
+
+
+def next_pot_id(db: Session) -> str:
+    """Allocate the next POT ID using ``db``'s engine"""
+    return format_pot_id(pot_id_allocator.allocate(db.get_bind()))
+
+
+# Opportunities added without a POT ID get one when they are flushed
+@event.listens_for(Session, "before_flush")
+def _assign_pot_ids(session, flush_context, instances):
+    for obj in session.new:
+        if isinstance(obj, Opportunity) and not obj.pot_id:
+            obj.pot_id = next_pot_id(session)
@@ -0,0 +1,308 @@
+"""
+Bulk lead import from CSV / XLSX files
+
+Rows are read lazily from the uploaded file (csv.reader over an
+incremental UTF-8 decoder, openpyxl in read-only mode for XLSX), so
+memory use is bounded by the chunk size rather than the file size. Each chunk of
+LEAD_IMPORT_CHUNK_SIZE rows is:
+
+  1. mapped to LeadCreate fields (company_name / end_customer_name are
+     resolved to ids through a per-import cached lookup, one query per
+     chunk for the names it hasn't seen yet),
+  2. validated against LeadCreate, collecting per-row errors,
+  3. inserted with one executemany INSERT and committed. If the batch
+     fails in the database, its rows are retried one by one in
+     savepoints so only the offending rows are reported.
+
+Core inserts bypass the ORM flush hooks, so each chunk reindexes its
+leads for search in the same transaction and the lead stats cache is
+cleared after the commits.
+
+Columns are LeadCreate field names (case and spaces don't matter). List
+fields take JSON arrays; products_services also takes a ";" separated
+list. A single contact can be given as contact_first_name,
+contact_last_name, contact_email, contact_phone (and optionally
+contact_designation) instead of a JSON contacts column.
+"""
+import codecs
+import csv
+import json
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import func, insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models import Company, Lead
+from ..schemas.lead import LeadCreate
+from .lead_service import LeadService, lead_stats_cache
+from .search_index import search_index
+
+try:
+    import openpyxl
+except ImportError:  # optional: only needed for .xlsx imports
+    openpyxl = None
+
+# LeadCreate fields stored in JSON columns, given as JSON arrays in a cell
+JSON_LIST_FIELDS = (
+    "products_services", "partners_data", "important_dates", "clauses",
+    "competitors", "documents", "contacts",
+)
+JSON_FIELD_SET = set(JSON_LIST_FIELDS)
+# Flat columns describing a single contact
+CONTACT_COLUMNS = {
+    "contact_first_name": "first_name",
+    "contact_last_name": "last_name",
+    "contact_email": "email",
+    "contact_phone": "primary_phone",
+    "contact_designation": "designation",
+}
+# Name columns resolved to the id fields LeadCreate requires
+COMPANY_NAME_COLUMNS = {
+    "company_name": "company_id",
+    "end_customer_name": "end_customer_id",
+}
+
+
+class LeadImportError(ValueError):
+    """The file itself can't be imported (format, encoding, missing dependency)"""
+
+
+def _header(name: Any) -> str:
+    return "_".join(str(name or "").strip().lower().split())
+
+
+def read_rows(file, filename: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (row number, {normalized column: value}) from a binary CSV or XLSX file"""
+    if filename.lower().endswith(".xlsx"):
+        yield from _read_xlsx(file)
+    elif filename.lower().endswith(".csv"):
+        yield from _read_csv(file)
+    else:
+        raise LeadImportError("Only .csv and .xlsx files can be imported")
+
+
+def _read_csv(file) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    # Incremental decoding keeps this lazy; utf-8-sig drops an Excel BOM
+    decoder = codecs.getreader("utf-8-sig")(file)
+    reader = csv.reader(decoder)
+    try:
+        headers = [_header(name) for name in next(reader, [])]
+        for row in reader:
+            if any(cell.strip() for cell in row):
+                yield reader.line_num, dict(zip(headers, row))
+    except UnicodeDecodeError as e:
+        raise LeadImportError(f"CSV files must be UTF-8 encoded: {e}")
+
+
+def _read_xlsx(file) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    if openpyxl is None:
+        raise LeadImportError("XLSX import needs the openpyxl package; upload a CSV instead")
+    workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        headers = [_header(name) for name in next(rows, ())]
+        for number, row in enumerate(rows, start=2):
+            if any(cell not in (None, "") for cell in row):
+                yield number, dict(zip(headers, row))
+    finally:
+        workbook.close()
+
+
+class CompanyLookup:
+    """Active company name -> id (case-insensitive) and id existence, cached per import"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.by_name: Dict[str, Optional[int]] = {}
+        self.ids: Dict[int, bool] = {}
+        self.queries = 0
+
+    def _active(self, query):
+        return query.filter(Company.is_active == True, Company.deleted_on.is_(None))
+
+    def load_names(self, names: Set[str]):
+        missing = {name for name in names if name not in self.by_name}
+        if not missing:
+            return
+        self.queries += 1
+        rows = self._active(
+            self.db.query(Company.id, func.lower(Company.name))
+            .filter(func.lower(Company.name).in_(missing))
+        )
+        for company_id, name in rows:
+            self.by_name[name] = company_id
+            self.ids[company_id] = True
+        for name in missing:
+            self.by_name.setdefault(name, None)
+
+    def load_ids(self, ids: Set[int]):
+        missing = {i for i in ids if i not in self.ids}
+        if not missing:
+            return
+        self.queries += 1
+        found = {row.id for row in self._active(self.db.query(Company.id).filter(Company.id.in_(missing)))}
+        for company_id in missing:
+            self.ids[company_id] = company_id in found
+
+
+class LeadImporter:
+    """Streams rows through validation and batched inserts"""
+
+    def __init__(
+        self,
+        db: Session,
+        created_by: Optional[int] = None,
+        chunk_size: int = settings.LEAD_IMPORT_CHUNK_SIZE,
+        max_errors: int = settings.LEAD_IMPORT_MAX_ERRORS,
+    ):
+        self.db = db
+        self.created_by = created_by
+        self.chunk_size = max(1, chunk_size)
+        self.max_errors = max_errors
+        self.companies = CompanyLookup(db)
+        self.rows = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+
+    def run(self, rows: Iterable[Tuple[int, Dict[str, Any]]]) -> dict:
+        """Import every row; returns counts, per-row errors and throughput"""
+        start = time.perf_counter()
+        chunk = []
+        try:
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) >= self.chunk_size:
+                    self._import_chunk(chunk)
+                    chunk = []
+            if chunk:
+                self._import_chunk(chunk)
+        finally:
+            if self.imported:
+                lead_stats_cache.clear()
+        elapsed = time.perf_counter() - start
+        return {
+            "rows": self.rows,
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(self.rows / elapsed, 1) if elapsed else None,
+        }
+
+    def _error(self, row_number: int, errors: List[dict]):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row_number, "errors": errors})
+
+    # Validation
+
+    def _import_chunk(self, chunk: List[Tuple[int, Dict[str, Any]]]):
+        self.rows += len(chunk)
+        names = {
+            str(raw[column]).strip().lower()
+            for _, raw in chunk for column in COMPANY_NAME_COLUMNS
+            if raw.get(column) not in (None, "")
+        }
+        self.companies.load_names(names)
+
+        candidates = []
+        for row_number, raw in chunk:
+            data, errors = self._map_row(raw)
+            if not errors:
+                try:
+                    lead = LeadCreate(**data)
+                except ValidationError as e:
+                    errors = [
+                        {"field": ".".join(str(part) for part in error["loc"]), "message": error["msg"]}
+                        for error in e.errors()
+                    ]
+            if errors:
+                self._error(row_number, errors)
+            else:
+                candidates.append((row_number, lead))
+
+        self.companies.load_ids(
+            {lead.company_id for _, lead in candidates} | {lead.end_customer_id for _, lead in candidates}
+        )
+        batch = []
+        for row_number, lead in candidates:
+            unknown = [
+                {"field": field, "message": f"Company {getattr(lead, field)} does not exist"}
+                for field in ("company_id", "end_customer_id")
+                if not self.companies.ids.get(getattr(lead, field))
+            ]
+            if unknown:
+                self._error(row_number, unknown)
+                continue
+            data = lead.dict()
+            # JSON columns need plain values (dates, decimals as strings)
+            data.update(lead.model_dump(mode="json", include=JSON_FIELD_SET))
+            batch.append((row_number, LeadService.lead_values(data, self.created_by)))
+
+        if batch:
+            self._insert(batch)
+
+    def _map_row(self, raw: Dict[str, Any]) -> Tuple[dict, List[dict]]:
+        data, errors = {}, []
+        for column, value in raw.items():
+            if isinstance(value, str):
+                value = value.strip()
+            if value in (None, "") or not column:
+                continue
+            if column in COMPANY_NAME_COLUMNS:
+                field = COMPANY_NAME_COLUMNS[column]
+                company_id = self.companies.by_name.get(str(value).lower())
+                if company_id is None:
+                    errors.append({"field": column, "message": f"Unknown company '{value}'"})
+                data.setdefault(field, company_id)
+            elif column in CONTACT_COLUMNS:
+                data.setdefault("_contact", {})[CONTACT_COLUMNS[column]] = value
+            elif column in JSON_LIST_FIELDS and isinstance(value, str):
+                if value.startswith("["):
+                    try:
+                        data[column] = json.loads(value)
+                    except ValueError as e:
+                        errors.append({"field": column, "message": f"Invalid JSON: {e}"})
+                elif column == "products_services":
+                    data[column] = [item.strip() for item in value.split(";") if item.strip()]
+                else:
+                    errors.append({"field": column, "message": "Expected a JSON array"})
+            else:
+                data[column] = value
+        contact = data.pop("_contact", None)
+        if contact and "contacts" not in data:
+            data["contacts"] = [contact]
+        return data, errors
+
+    # Inserts
+
+    def _insert(self, batch: List[Tuple[int, dict]]):
+        table = Lead.__table__
+        statement = insert(table).returning(table.c.id)
+        try:
+            ids = list(self.db.execute(statement, [values for _, values in batch]).scalars())
+            search_index.reindex(self.db, Lead, ids)
+            self.db.commit()
+            self.imported += len(ids)
+            return
+        except SQLAlchemyError:
+            self.db.rollback()
+
+        # Find the failing rows: one savepoint per row
+        ids = []
+        for row_number, values in batch:
+            try:
+                with self.db.begin_nested():
+                    ids.append(self.db.execute(statement, values).scalar_one())
+            except SQLAlchemyError as e:
+                message = str(getattr(e, "orig", None) or e).splitlines()[0]
+                self._error(row_number, [{"field": None, "message": message}])
+        search_index.reindex(self.db, Lead, ids)
+        self.db.commit()
+        self.imported += len(ids)
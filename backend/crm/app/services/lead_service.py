@@ -1,15 +1,53 @@
 """
 Enhanced Lead management service with conversion workflow
 """
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable
 from datetime import datetime
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, and_, func
+from sqlalchemy import and_, func, event
 from ..models import (
     Lead, Company, User, LeadStatus, ReviewStatus, 
     LeadSource, LeadSubType, TenderSubType, SubmissionType,
     LeadPriority
 )
+from ..utils.pagination import keyset_page, ranked_page, Page, TOTAL_NONE
+from ..utils.etag import query_version
+from .search_index import search_index
+from .loader_profiles import loader_options, LEAD_LIST, LEAD_FIELD_SOURCES
+from ..utils.principal_cache import PrincipalCache
+from ..config import settings
+
+LEAD_STATS_FIELDS = (
+    "total", "new", "contacted", "qualified", "converted",
+    "pending_review", "approved_for_conversion", "total_value",
+)
+LEAD_STATS_BREAKDOWNS = ("company", "sales_person")
+
+# Short-lived dashboard stats keyed by breakdown ("all", "company", "sales_person")
+lead_stats_cache = PrincipalCache(
+    ttl_seconds=settings.LEAD_STATS_CACHE_TTL_SECONDS,
+    max_size=len(LEAD_STATS_BREAKDOWNS) + 1,
+    enabled=settings.LEAD_STATS_CACHE_TTL_SECONDS > 0,
+)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_lead_writes(session, flush_context):
+    """Remember that this transaction wrote leads"""
+    if any(isinstance(obj, Lead) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info["leads_written"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_lead_stats(session):
+    """Drop cached stats once lead writes are visible to other sessions"""
+    if session.info.pop("leads_written", False):
+        lead_stats_cache.clear()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_lead_writes(session):
+    session.info.pop("leads_written", None)
 
 
 class LeadService:
@@ -19,7 +57,17 @@ class LeadService:
     def create_lead(self, lead_data: dict, created_by: Optional[int] = None) -> Lead:
         """Create a new lead"""
         
-        db_lead = Lead(
+        db_lead = Lead(**self.lead_values(lead_data, created_by))
+        
+        self.db.add(db_lead)
+        self.db.commit()
+        self.db.refresh(db_lead)
+        return db_lead
+    
+    @staticmethod
+    def lead_values(lead_data: dict, created_by: Optional[int] = None) -> dict:
+        """Lead column values for validated LeadCreate data (shared with the bulk importer)"""
+        return dict(
             project_title=lead_data.get('project_title'),
             lead_source=LeadSource(lead_data.get('lead_source')),
             lead_sub_type=LeadSubType(lead_data.get('lead_sub_type')),
@@ -56,11 +104,6 @@ class LeadService:
             contacts=lead_data.get('contacts', []),
             created_by=created_by
         )
-        
-        self.db.add(db_lead)
-        self.db.commit()
-        self.db.refresh(db_lead)
-        return db_lead
     
     def get_lead_by_id(self, lead_id: int) -> Optional[Lead]:
         """Get lead by ID with related details"""
@@ -111,44 +154,76 @@ class LeadService:
     def get_leads(self, skip: int = 0, limit: int = 100, search: str = None, 
                  status: str = None, company_id: str = None, review_status: str = None) -> List[Lead]:
         """Get all leads with pagination and filtering"""
-        query = self.db.query(Lead).options(
-            joinedload(Lead.company),
-            joinedload(Lead.end_customer),
-            joinedload(Lead.creator),
-            joinedload(Lead.conversion_requester),
-            joinedload(Lead.reviewer)
-        ).filter(
-            and_(
-                Lead.is_active == True,
-                Lead.deleted_on.is_(None)
-            )
+        return self.get_leads_page(skip, limit, search, status, company_id, review_status)[0]
+
+    def get_leads_page(self, skip: int = 0, limit: int = 100, search: str = None,
+                       status: str = None, company_id: str = None, review_status: str = None,
+                       cursor: Optional[str] = None, include_total: str = TOTAL_NONE,
+                       fields: Optional[Iterable[str]] = None) -> Page:
+        """
+        Get a page of leads (offset or cursor) and the cursor for the next page;
+        ``fields`` limits the loaded columns to those a sparse fieldset reads
+        """
+        query, rank = self._filter_leads(
+            self.db.query(Lead).options(
+                *loader_options(LEAD_LIST, fields, LEAD_FIELD_SOURCES, required=(Lead.id, Lead.updated_on))
+            ),
+            search, status, company_id, review_status,
         )
         
-        if status:
-            query = query.filter(Lead.status == LeadStatus(status))
-        
-        if company_id:
-            query = query.filter(Lead.company_id == company_id)
-            
-        if review_status:
-            query = query.filter(Lead.review_status == ReviewStatus(review_status))
-        
-        if search:
-            search_term = f"%{search}%"
-            query = query.join(Company, Lead.company_id == Company.id).filter(
-                or_(
-                    Lead.project_title.ilike(search_term),
-                    Company.name.ilike(search_term),
-                    Lead.tender_authority.ilike(search_term)
-                )
+        if rank is not None:
+            return ranked_page(
+                query, rank, Lead.id, "leads:search", limit,
+                cursor=cursor, skip=skip, include_total=include_total,
             )
-        
-        return query.order_by(Lead.updated_on.desc()).offset(skip).limit(limit).all()
+        return keyset_page(
+            query, Lead.updated_on, Lead.id, "leads:updated_on", limit,
+            cursor=cursor, skip=skip, descending=True, include_total=include_total
+        )
     
     def get_leads_count(self, search: str = None, status: str = None, 
                        company_id: str = None, review_status: str = None) -> int:
         """Get total count of leads"""
-        query = self.db.query(Lead).filter(
+        query, _ = self._filter_leads(
+            self.db.query(Lead), search, status, company_id, review_status
+        )
+        return query.count()
+    
+    def get_leads_version(self, search: str = None, status: str = None,
+                          company_id: str = None, review_status: str = None) -> tuple:
+        """(max updated_on, count) of the leads a list request selects, for its ETag"""
+        query, _ = self._filter_leads(
+            self.db.query(Lead), search, status, company_id, review_status
+        )
+        return query_version(query, Lead.updated_on, Lead.id)
+    
+    def get_leads_export_query(self, search: str = None, status: str = None,
+                               company_id: str = None, review_status: str = None,
+                               fields: Optional[Iterable[str]] = None):
+        """Query of every lead a list request selects, in id order, for streaming exports"""
+        query, _ = self._filter_leads(
+            self.db.query(Lead).options(
+                *loader_options(LEAD_LIST, fields, LEAD_FIELD_SOURCES, required=(Lead.id,))
+            ),
+            search, status, company_id, review_status,
+        )
+        return query.order_by(Lead.id)
+    
+    def get_lead_version(self, lead_id: int) -> Optional[tuple]:
+        """(id, updated_on) of an active lead, for its ETag"""
+        return self.db.query(Lead.id, Lead.updated_on).filter(
+            and_(
+                Lead.id == lead_id,
+                Lead.is_active == True,
+                Lead.deleted_on.is_(None)
+            )
+        ).first()
+    
+    @staticmethod
+    def _filter_leads(query, search: str = None, status: str = None,
+                      company_id: str = None, review_status: str = None):
+        """Apply the lead list filters; returns (query, search rank or None)"""
+        query = query.filter(
             and_(
                 Lead.is_active == True,
                 Lead.deleted_on.is_(None)
@@ -164,95 +239,76 @@ class LeadService:
         if review_status:
             query = query.filter(Lead.review_status == ReviewStatus(review_status))
         
+        rank = None
         if search:
-            search_term = f"%{search}%"
-            query = query.join(Company, Lead.company_id == Company.id).filter(
-                or_(
-                    Lead.project_title.ilike(search_term),
-                    Company.name.ilike(search_term),
-                    Lead.tender_authority.ilike(search_term)
-                )
-            )
-        
-        return query.count()
+            query, rank = search_index.apply(query, Lead, search)
+        return query, rank
     
-    def get_lead_stats(self) -> dict:
-        """Get lead statistics"""
-        total = self.db.query(Lead).filter(
-            and_(
-                Lead.is_active == True,
-                Lead.deleted_on.is_(None)
-            )
-        ).count()
-        
-        new = self.db.query(Lead).filter(
-            and_(
-                Lead.status == LeadStatus.NEW,
-                Lead.is_active == True,
-                Lead.deleted_on.is_(None)
-            )
-        ).count()
-        
-        contacted = self.db.query(Lead).filter(
-            and_(
-                Lead.status == LeadStatus.CONTACTED,
-                Lead.is_active == True,
-                Lead.deleted_on.is_(None)
-            )
-        ).count()
-        
-        qualified = self.db.query(Lead).filter(
-            and_(
-                Lead.status == LeadStatus.QUALIFIED,
-                Lead.is_active == True,
-                Lead.deleted_on.is_(None)
-            )
-        ).count()
-        
-        converted = self.db.query(Lead).filter(
-            and_(
-                Lead.converted == True,
-                Lead.is_active == True,
-                Lead.deleted_on.is_(None)
-            )
-        ).count()
-        
-        pending_review = self.db.query(Lead).filter(
-            and_(
-                Lead.conversion_requested == True,
-                Lead.reviewed == False,
-                Lead.is_active == True,
-                Lead.deleted_on.is_(None)
-            )
-        ).count()
-        
-        approved_for_conversion = self.db.query(Lead).filter(
-            and_(
-                Lead.review_status == ReviewStatus.APPROVED,
-                Lead.converted == False,
-                Lead.is_active == True,
-                Lead.deleted_on.is_(None)
-            )
-        ).count()
-        
-        # Calculate total value
-        total_value = self.db.query(func.sum(Lead.expected_revenue)).filter(
-            and_(
-                Lead.is_active == True,
-                Lead.deleted_on.is_(None)
-            )
-        ).scalar() or 0
-        
-        return {
-            "total": total,
-            "new": new,
-            "contacted": contacted,
-            "qualified": qualified,
-            "converted": converted,
-            "pending_review": pending_review,
-            "approved_for_conversion": approved_for_conversion,
-            "total_value": total_value
-        }
+    def get_lead_stats(self, breakdown: Optional[str] = None) -> dict:
+        """
+        Get lead statistics in a single aggregate query.
+
+        ``breakdown`` ("company" or "sales_person") groups the same query and
+        adds a per-group list; the overall figures are summed from the groups.
+        Results are cached for LEAD_STATS_CACHE_TTL_SECONDS and invalidated
+        whenever a lead write commits.
+        """
+        if breakdown is not None and breakdown not in LEAD_STATS_BREAKDOWNS:
+            raise ValueError(f"breakdown must be one of {', '.join(LEAD_STATS_BREAKDOWNS)}")
+
+        cache_key = breakdown or "all"
+        cached = lead_stats_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        active = and_(Lead.is_active == True, Lead.deleted_on.is_(None))
+        columns = [
+            func.count(Lead.id).label("total"),
+            func.count(Lead.id).filter(Lead.status == LeadStatus.NEW).label("new"),
+            func.count(Lead.id).filter(Lead.status == LeadStatus.CONTACTED).label("contacted"),
+            func.count(Lead.id).filter(Lead.status == LeadStatus.QUALIFIED).label("qualified"),
+            func.count(Lead.id).filter(Lead.converted == True).label("converted"),
+            func.count(Lead.id).filter(
+                and_(Lead.conversion_requested == True, Lead.reviewed == False)
+            ).label("pending_review"),
+            func.count(Lead.id).filter(
+                and_(Lead.review_status == ReviewStatus.APPROVED, Lead.converted == False)
+            ).label("approved_for_conversion"),
+            func.coalesce(func.sum(Lead.expected_revenue), 0).label("total_value"),
+        ]
+
+        if breakdown is None:
+            row = self.db.query(*columns).filter(active).one()
+            stats = self._stats_from_row(row)
+        else:
+            if breakdown == "company":
+                group_id, group_name = Lead.company_id, Company.name
+                query = self.db.query(group_id, group_name, *columns).outerjoin(
+                    Company, Lead.company_id == Company.id
+                )
+            else:
+                group_id, group_name = Lead.sales_person_id, User.name
+                query = self.db.query(group_id, group_name, *columns).outerjoin(
+                    User, Lead.sales_person_id == User.id
+                )
+            rows = query.filter(active).group_by(group_id, group_name).all()
+
+            groups = []
+            stats = dict.fromkeys(LEAD_STATS_FIELDS, 0)
+            for row in rows:
+                group = self._stats_from_row(row)
+                for field in LEAD_STATS_FIELDS:
+                    stats[field] += group[field]
+                groups.append({f"{breakdown}_id": row[0], f"{breakdown}_name": row[1], **group})
+            groups.sort(key=lambda group: group["total"], reverse=True)
+            stats[f"by_{breakdown}"] = groups
+
+        lead_stats_cache.set(cache_key, stats)
+        return stats
+
+    @staticmethod
+    def _stats_from_row(row) -> dict:
+        return {field: getattr(row, field) or 0 for field in LEAD_STATS_FIELDS}
     
     def get_leads_pending_review(self) -> List[Lead]:
         """Get leads pending admin review"""
@@ -338,12 +394,13 @@ class LeadService:
         if not db_lead:
             return None
         
-        documents = db_lead.documents or []
-        documents.append({
+        # A new list: appending to the loaded one in place isn't seen as a
+        # change to the JSON column, so the document would never be saved
+        documents = list(db_lead.documents or []) + [{
             **document_data,
             "uploaded_on": datetime.utcnow().isoformat(),
             "uploaded_by": added_by
-        })
+        }]
         
         db_lead.documents = documents
         db_lead.updated_by = added_by
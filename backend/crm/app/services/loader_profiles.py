@@ -0,0 +1,185 @@
+"""
+Declarative relationship loading per endpoint
+
+Each profile maps the relationships an endpoint's serializer touches to a
+loading strategy, so list pages load them up front instead of issuing one
+lazy SELECT per row:
+
+    JOINED   - LEFT OUTER JOIN in the page query (small many-to-one targets)
+    SELECTIN - one extra "WHERE id IN (...)" query per relationship, which
+               keeps the page query narrow when several relationships point
+               at the same table
+    LAZY     - default lazy loading (for attributes only some rows touch)
+    RAISE    - lazy access raises, to catch serializers that drift from
+               their profile
+
+A profile entry may also be ``(strategy, columns)`` to load only those
+columns of the related row.
+
+Services apply a profile with ``query.options(*loader_options(PROFILE))``.
+For a sparse fieldset (``?fields=`` on list endpoints) pass the requested
+output fields too: only the columns and relationships those fields read
+are loaded, so unrequested JSON blobs never leave the database.
+"""
+from typing import Dict, Iterable, List, Optional, FrozenSet
+from sqlalchemy.orm import joinedload, selectinload, lazyload, raiseload, load_only
+from ..models import Lead, Opportunity, Contact, Company, User
+
+JOINED = "joined"
+SELECTIN = "selectin"
+LAZY = "lazy"
+RAISE = "raise"
+
+_STRATEGIES = {
+    JOINED: joinedload,
+    SELECTIN: selectinload,
+    LAZY: lazyload,
+    RAISE: raiseload,
+}
+
+
+class InvalidFieldsError(ValueError):
+    """Raised when a sparse fieldset names fields the endpoint doesn't serialize"""
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> Optional[FrozenSet[str]]:
+    """
+    Parse a comma separated ``fields`` parameter against the serializer's
+    field names; None (serialize everything) when no fields are given.
+    ``id`` is always included.
+    """
+    if not fields:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    if not requested:
+        return None
+    unknown = requested - set(allowed)
+    if unknown:
+        raise InvalidFieldsError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return frozenset(requested | {"id"})
+
+
+def _relationship_option(relationship, entry):
+    strategy, columns = entry if isinstance(entry, tuple) else (entry, None)
+    option = _STRATEGIES[strategy](relationship)
+    if columns and strategy in (JOINED, SELECTIN):
+        option = option.load_only(*columns)
+    return option
+
+
+def loader_options(
+    profile: Dict,
+    fields: Optional[Iterable[str]] = None,
+    sources: Optional[Dict] = None,
+    required: tuple = (),
+) -> List:
+    """
+    Build loader options for ``query.options`` from a profile.
+
+    Without ``fields`` every column and every profile relationship is
+    loaded. With ``fields`` the query is narrowed with ``load_only``:
+    ``sources`` maps output fields to the model attributes (columns or
+    relationships) they read, any other field is the column of the same
+    name, and ``required`` columns (id, sort key) are always loaded.
+    """
+    if fields is None:
+        return [_relationship_option(relationship, entry) for relationship, entry in profile.items()]
+
+    model = required[0].class_
+    sources = sources or {}
+    columns, relationships = list(required), set()
+    for field in fields:
+        for attribute in sources[field] if field in sources else (getattr(model, field),):
+            if attribute.property in _relationship_properties(profile):
+                relationships.add(attribute.property)
+                # Foreign keys are needed to resolve many-to-one selectin loads
+                columns.extend(getattr(model, column.key) for column in attribute.property.local_columns)
+            else:
+                columns.append(attribute)
+
+    options = [load_only(*dict.fromkeys(columns))]
+    options.extend(
+        _relationship_option(relationship, entry)
+        for relationship, entry in profile.items()
+        if relationship.property in relationships
+    )
+    return options
+
+
+def _relationship_properties(profile: Dict):
+    return {relationship.property for relationship in profile}
+
+
+# GET /api/opportunities/ (transform_opportunity)
+OPPORTUNITY_LIST = {
+    Opportunity.company: JOINED,
+    Opportunity.contact: JOINED,
+    Opportunity.lead: (JOINED, (Lead.id, Lead.lead_source)),
+    Opportunity.creator: SELECTIN,
+    Opportunity.qualification_completer: SELECTIN,
+    Opportunity.delivery_team_member: SELECTIN,
+}
+
+# Output fields of transform_opportunity that don't map to a column of the same name
+OPPORTUNITY_FIELD_SOURCES = {
+    "company_name": (Opportunity.company,),
+    "contact_name": (Opportunity.contact,),
+    "contact_email": (Opportunity.contact,),
+    "lead_source": (Opportunity.lead,),
+    "created_by_name": (Opportunity.creator,),
+    "qualification_completer_name": (Opportunity.qualification_completer,),
+    "delivery_team_member_name": (Opportunity.delivery_team_member,),
+    "stage_percentage": (Opportunity.stage,),
+    "stage_display_name": (Opportunity.stage,),
+}
+
+# GET /api/opportunities/?company_id= and ?lead_id= serialize the same fields
+OPPORTUNITY_BY_COMPANY = OPPORTUNITY_LIST
+OPPORTUNITY_BY_LEAD = OPPORTUNITY_LIST
+
+# GET /api/leads/ (transform_lead)
+LEAD_LIST = {
+    Lead.company: JOINED,
+    Lead.end_customer: JOINED,
+    Lead.creator: SELECTIN,
+    Lead.conversion_requester: SELECTIN,
+    Lead.reviewer: SELECTIN,
+}
+
+# Output fields of transform_lead that don't map to a column of the same name
+LEAD_FIELD_SOURCES = {
+    "company_name": (Lead.company,),
+    "end_customer_name": (Lead.end_customer,),
+    "creator_name": (Lead.creator,),
+    "conversion_requester_name": (Lead.conversion_requester,),
+    "reviewer_name": (Lead.reviewer,),
+    "can_request_conversion": (Lead.status, Lead.converted, Lead.conversion_requested),
+    "can_convert_to_opportunity": (Lead.status, Lead.converted, Lead.reviewed, Lead.review_status),
+    "needs_admin_review": (Lead.status, Lead.conversion_requested, Lead.reviewed),
+}
+
+# GET /api/contacts/
+CONTACT_LIST = {
+    Contact.company: JOINED,
+}
+
+# Output fields of contact_serializer that don't map to a column of the same name
+CONTACT_FIELD_SOURCES = {
+    "company_name": (Contact.company,),
+}
+
+# GET /api/companies/export
+COMPANY_EXPORT = {
+    Company.parent_company: (JOINED, (Company.id, Company.name)),
+}
+
+# Output fields of company_serializer that don't map to a column of the same name
+COMPANY_FIELD_SOURCES = {
+    "parent_company_name": (Company.parent_company,),
+}
+
+# GET /api/users/
+USER_LIST = {
+    User.role: JOINED,
+    User.department: JOINED,
+}
@@ -2,10 +2,10 @@
 Enhanced Opportunity management service with stage-specific functionality
 """
 
-from typing import Optional, List, Dict, Any
-from datetime import datetime
+from typing import Optional, List, Dict, Any, Iterable
+from datetime import date, datetime
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, and_, func
+from sqlalchemy import and_, func, update
 from ..models import (
     Opportunity,
     Lead,
@@ -19,7 +19,36 @@ from ..models import (
     GoNoGoStatus,
     QuotationStatus,
 )
+from ..models.opportunity import STAGE_DISPLAY_NAMES, STAGE_PERCENTAGES
 from decimal import Decimal
+from ..utils.pagination import keyset_page, ranked_page, Page, TOTAL_NONE
+from ..utils.etag import query_version
+from .search_index import search_index
+from .id_allocator import next_pot_id
+from ..utils.response_cache import response_cache
+from .loader_profiles import (
+    loader_options, OPPORTUNITY_LIST, OPPORTUNITY_BY_COMPANY, OPPORTUNITY_BY_LEAD,
+    OPPORTUNITY_FIELD_SOURCES,
+)
+
+# Supported get_opportunity_metrics breakdowns
+METRICS_GROUP_BY = ("month", "created_by", "company")
+# Additive counters the metrics are derived from
+METRICS_SUM_FIELDS = (
+    "total", "won", "lost", "won_value", "pipeline_value", "forecasted_revenue",
+)
+
+# Uploaded document types recorded in their own file path column
+DOCUMENT_FIELDS = {
+    "quotation": "quotation_file_path",
+    "proposal": "proposal_file_path",
+    "updated_proposal": "updated_proposal_file_path",
+    "negotiated_quotation": "negotiated_quotation_file_path",
+    "loi": "loi_file_path",
+}
+
+# Cached pipeline summaries are dropped when an opportunity write commits
+response_cache.track(Opportunity, "opportunities")
 
 
 class OpportunityService:
@@ -29,7 +58,7 @@ class OpportunityService:
     def create_opportunity(
         self, opportunity_data: dict, created_by: Optional[int] = None
     ) -> Opportunity:
-        """Create a new opportunity with POT-{4digit} ID"""
+        """Create a new opportunity with a sequential POT ID"""
         # Validate that contact is a Decision Maker
         contact = (
             self.db.query(Contact)
@@ -42,7 +71,7 @@ class OpportunityService:
                 "Opportunity can only be created with a Decision Maker contact"
             )
 
-        # Generate unique POT ID
+        # Allocate the next sequential POT ID
         pot_id = self._generate_unique_pot_id()
 
         db_opportunity = Opportunity(
@@ -141,16 +170,8 @@ class OpportunityService:
         return db_opportunity
 
     def _generate_unique_pot_id(self) -> str:
-        """Generate unique POT-{4digit} ID"""
-        import random
-
-        while True:
-            pot_id = f"POT-{random.randint(1000, 9999)}"
-            existing = (
-                self.db.query(Opportunity).filter(Opportunity.pot_id == pot_id).first()
-            )
-            if not existing:
-                return pot_id
+        """Allocate a unique POT ID from this worker's reserved block"""
+        return next_pot_id(self.db)
 
     def get_opportunity_by_id(self, opportunity_id: int) -> Optional[Opportunity]:
         """Get opportunity by ID with related details"""
@@ -221,6 +242,18 @@ class OpportunityService:
         self.db.refresh(db_opportunity)
         return db_opportunity
 
+    def attach_document(
+        self, opportunity_id: int, document_type: str, file_path: str, updated_by: Optional[int] = None
+    ) -> Optional[Opportunity]:
+        """Record an uploaded document's path in its DOCUMENT_FIELDS column"""
+        if document_type not in DOCUMENT_FIELDS:
+            raise ValueError(
+                f"Unknown document type '{document_type}', expected one of: {', '.join(DOCUMENT_FIELDS)}"
+            )
+        return self.update_opportunity(
+            opportunity_id, {DOCUMENT_FIELDS[document_type]: file_path}, updated_by
+        )
+
     def update_stage(
         self,
         opportunity_id: int,
@@ -239,17 +272,7 @@ class OpportunityService:
         db_opportunity.updated_by = updated_by
 
         # Update probability based on stage
-        stage_probabilities = {
-            OpportunityStage.L1_PROSPECT: 5,
-            OpportunityStage.L1_QUALIFICATION: 15,
-            OpportunityStage.L2_NEED_ANALYSIS: 40,
-            OpportunityStage.L3_PROPOSAL: 60,
-            OpportunityStage.L4_NEGOTIATION: 80,
-            OpportunityStage.L5_WON: 100,
-            OpportunityStage.L6_LOST: 0,
-            OpportunityStage.L7_DROPPED: 0,
-        }
-        db_opportunity.probability = stage_probabilities.get(
+        db_opportunity.probability = STAGE_PERCENTAGES.get(
             OpportunityStage(stage), db_opportunity.probability
         )
 
@@ -450,6 +473,104 @@ class OpportunityService:
         self.db.refresh(db_opportunity)
         return db_opportunity
 
+    def bulk_transition(
+        self, transitions: List[Dict[str, Any]], updated_by: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Apply update_stage / close_opportunity changes to many opportunities
+        in one transaction: one set-based UPDATE per transition. Returns one
+        result per requested id, in request order.
+        """
+        results = []
+        seen = set()
+        now = datetime.utcnow()
+        for transition in transitions:
+            ids = [i for i in dict.fromkeys(transition["ids"]) if i not in seen]
+            updated = {}
+            if ids:
+                rows = self.db.execute(
+                    update(Opportunity)
+                    .where(
+                        Opportunity.id.in_(ids),
+                        Opportunity.is_active == True,
+                        Opportunity.deleted_on.is_(None),
+                    )
+                    .values(**self._transition_values(transition, updated_by, now))
+                    .returning(
+                        Opportunity.id, Opportunity.pot_id, Opportunity.stage,
+                        Opportunity.status, Opportunity.probability,
+                    ),
+                    execution_options={"synchronize_session": False},
+                )
+                updated = {row.id: row for row in rows}
+
+            for opportunity_id in transition["ids"]:
+                row = updated.pop(opportunity_id, None)
+                if row is not None:
+                    results.append({
+                        "id": row.id,
+                        "success": True,
+                        "pot_id": row.pot_id,
+                        "stage": row.stage.value,
+                        "stage_display_name": STAGE_DISPLAY_NAMES.get(row.stage, row.stage.value),
+                        "status": row.status.value,
+                        "probability": row.probability,
+                    })
+                elif opportunity_id in seen:
+                    results.append({
+                        "id": opportunity_id,
+                        "success": False,
+                        "error": "Opportunity listed more than once",
+                    })
+                else:
+                    results.append({
+                        "id": opportunity_id, "success": False, "error": "Opportunity not found"
+                    })
+                seen.add(opportunity_id)
+
+        self.db.commit()
+        if any(result["success"] for result in results):
+            # Core UPDATEs don't go through the flush hooks; stage and status
+            # aren't part of the search / suggest documents
+            response_cache.invalidate("opportunities")
+        return results
+
+    @staticmethod
+    def _transition_values(
+        transition: Dict[str, Any], updated_by: int, now: datetime
+    ) -> Dict[str, Any]:
+        """UPDATE values for one bulk transition, as update_stage / close_opportunity set them"""
+        values = {"updated_by": updated_by, "updated_on": now}
+        notes = transition.get("notes")
+        status = transition.get("status")
+        if status:
+            values.update(
+                status=OpportunityStatus(status),
+                close_date=transition["close_date"],
+            )
+            if status == OpportunityStatus.WON:
+                values["stage"] = OpportunityStage.L5_WON
+            elif status == OpportunityStatus.LOST:
+                values.update(
+                    stage=OpportunityStage.L6_LOST,
+                    lost_reason=transition.get("lost_reason"),
+                    competitor_name=transition.get("competitor_name"),
+                )
+            elif status == OpportunityStatus.DROPPED:
+                values.update(
+                    stage=OpportunityStage.L7_DROPPED,
+                    drop_reason=transition.get("drop_reason"),
+                )
+            note = f"\n[Closed as {status}]: {notes}"
+        else:
+            stage = OpportunityStage(transition["stage"])
+            values.update(stage=stage, probability=STAGE_PERCENTAGES[stage])
+            note = f"\n[Stage updated to {stage.value}]: {notes}"
+
+        if notes:
+            values["notes"] = func.coalesce(Opportunity.notes, "") + note
+        return values
+
     def delete_opportunity(
         self, opportunity_id: int, deleted_by: Optional[int] = None
     ) -> bool:
@@ -475,55 +596,61 @@ class OpportunityService:
         search: str = None,
     ) -> List[Opportunity]:
         """Get all opportunities with pagination and filtering"""
+        return self.get_opportunities_page(skip, limit, stage, status, search)[0]
+
+    def get_opportunities_page(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        stage: str = None,
+        status: str = None,
+        search: str = None,
+        cursor: Optional[str] = None,
+        include_total: str = TOTAL_NONE,
+        fields: Optional[Iterable[str]] = None,
+    ) -> Page:
+        """
+        Get a page of opportunities (offset or cursor) and the next cursor;
+        ``fields`` limits the loaded columns to those a sparse fieldset reads
+        """
         query = (
             self.db.query(Opportunity)
-            .options(
-                joinedload(Opportunity.company),
-                joinedload(Opportunity.contact),
-                joinedload(Opportunity.creator),
-                joinedload(Opportunity.qualification_completer),
-                joinedload(Opportunity.delivery_team_member),
-            )
-            .filter(
-                and_(Opportunity.is_active == True, Opportunity.deleted_on.is_(None))
-            )
+            .options(*loader_options(
+                OPPORTUNITY_LIST, fields, OPPORTUNITY_FIELD_SOURCES,
+                required=(Opportunity.id, Opportunity.updated_on),
+            ))
         )
+        query, rank = self._filter_opportunities(query, stage, status, search)
 
-        if stage:
-            query = query.filter(Opportunity.stage == stage)
-
-        if status:
-            query = query.filter(Opportunity.status == status)
-
-        if search:
-            search_term = f"%{search}%"
-            query = (
-                query.join(Company)
-                .join(Contact)
-                .filter(
-                    or_(
-                        Opportunity.name.ilike(search_term),
-                        Opportunity.pot_id.ilike(search_term),
-                        Company.name.ilike(search_term),
-                        Contact.full_name.ilike(search_term),
-                    )
-                )
+        if rank is not None:
+            return ranked_page(
+                query, rank, Opportunity.id, "opportunities:search", limit,
+                cursor=cursor, skip=skip, include_total=include_total,
             )
-
-        return (
-            query.order_by(Opportunity.updated_on.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
+        return keyset_page(
+            query, Opportunity.updated_on, Opportunity.id, "opportunities:updated_on",
+            limit, cursor=cursor, skip=skip, descending=True,
+            include_total=include_total,
         )
 
     def get_opportunities_by_company(
         self, company_id: int, skip: int = 0, limit: int = 100
     ) -> List[Opportunity]:
         """Get opportunities by company"""
-        return (
+        return self.get_opportunities_by_company_page(company_id, skip, limit)[0]
+
+    def get_opportunities_by_company_page(
+        self, company_id: int, skip: int = 0, limit: int = 100,
+        cursor: Optional[str] = None, include_total: str = TOTAL_NONE,
+        fields: Optional[Iterable[str]] = None,
+    ) -> Page:
+        """Get a page of a company's opportunities and the next cursor"""
+        query = (
             self.db.query(Opportunity)
-            .options(joinedload(Opportunity.company), joinedload(Opportunity.contact))
+            .options(*loader_options(
+                OPPORTUNITY_BY_COMPANY, fields, OPPORTUNITY_FIELD_SOURCES,
+                required=(Opportunity.id, Opportunity.created_on),
+            ))
             .filter(
                 and_(
                     Opportunity.company_id == company_id,
@@ -531,19 +658,31 @@ class OpportunityService:
                     Opportunity.deleted_on.is_(None),
                 )
             )
-            .order_by(Opportunity.created_on.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
+        )
+        return keyset_page(
+            query, Opportunity.created_on, Opportunity.id, "opportunities:created_on",
+            limit, cursor=cursor, skip=skip, descending=True,
+            include_total=include_total,
         )
 
     def get_opportunities_by_lead(
         self, lead_id: int, skip: int = 0, limit: int = 100
     ) -> List[Opportunity]:
         """Get opportunities by lead"""
-        return (
+        return self.get_opportunities_by_lead_page(lead_id, skip, limit)[0]
+
+    def get_opportunities_by_lead_page(
+        self, lead_id: int, skip: int = 0, limit: int = 100,
+        cursor: Optional[str] = None, include_total: str = TOTAL_NONE,
+        fields: Optional[Iterable[str]] = None,
+    ) -> Page:
+        """Get a page of a lead's opportunities and the next cursor"""
+        query = (
             self.db.query(Opportunity)
-            .options(joinedload(Opportunity.company), joinedload(Opportunity.contact))
+            .options(*loader_options(
+                OPPORTUNITY_BY_LEAD, fields, OPPORTUNITY_FIELD_SOURCES,
+                required=(Opportunity.id, Opportunity.created_on),
+            ))
             .filter(
                 and_(
                     Opportunity.lead_id == lead_id,
@@ -551,17 +690,93 @@ class OpportunityService:
                     Opportunity.deleted_on.is_(None),
                 )
             )
-            .order_by(Opportunity.created_on.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
+        )
+        return keyset_page(
+            query, Opportunity.created_on, Opportunity.id, "opportunities:created_on",
+            limit, cursor=cursor, skip=skip, descending=True,
+            include_total=include_total,
         )
 
     def get_opportunity_count(
         self, stage: str = None, status: str = None, search: str = None
     ) -> int:
         """Get total count of opportunities"""
-        query = self.db.query(Opportunity).filter(
+        query, _ = self._filter_opportunities(
+            self.db.query(Opportunity), stage, status, search
+        )
+        return query.count()
+
+    def get_opportunities_version(
+        self,
+        stage: str = None,
+        status: str = None,
+        search: str = None,
+        company_id: int = None,
+        lead_id: int = None,
+    ) -> tuple:
+        """
+        (max updated_on, count) of the opportunities a list request selects,
+        for its ETag; company_id / lead_id take precedence like in the list
+        """
+        query = self._filter_opportunity_list(
+            self.db.query(Opportunity), stage, status, search, company_id, lead_id
+        )
+        return query_version(query, Opportunity.updated_on, Opportunity.id)
+
+    def get_opportunities_export_query(
+        self,
+        stage: str = None,
+        status: str = None,
+        search: str = None,
+        company_id: int = None,
+        lead_id: int = None,
+        fields: Optional[Iterable[str]] = None,
+    ):
+        """Query of every opportunity a list request selects, in id order, for streaming exports"""
+        query = self.db.query(Opportunity).options(*loader_options(
+            OPPORTUNITY_LIST, fields, OPPORTUNITY_FIELD_SOURCES, required=(Opportunity.id,),
+        ))
+        query = self._filter_opportunity_list(query, stage, status, search, company_id, lead_id)
+        return query.order_by(Opportunity.id)
+
+    def get_opportunity_version(self, opportunity_id: int) -> Optional[tuple]:
+        """(id, updated_on) of an active opportunity, for its ETag"""
+        return (
+            self.db.query(Opportunity.id, Opportunity.updated_on)
+            .filter(
+                and_(
+                    Opportunity.id == opportunity_id,
+                    Opportunity.is_active == True,
+                    Opportunity.deleted_on.is_(None),
+                )
+            )
+            .first()
+        )
+
+    def _filter_opportunity_list(
+        self, query, stage: str = None, status: str = None, search: str = None,
+        company_id: int = None, lead_id: int = None,
+    ):
+        """The list endpoint's filters: company_id, else lead_id, else stage / status / search"""
+        if company_id:
+            return query.filter(
+                Opportunity.company_id == company_id,
+                Opportunity.is_active == True,
+                Opportunity.deleted_on.is_(None),
+            )
+        if lead_id:
+            return query.filter(
+                Opportunity.lead_id == lead_id,
+                Opportunity.is_active == True,
+                Opportunity.deleted_on.is_(None),
+            )
+        query, _ = self._filter_opportunities(query, stage, status, search)
+        return query
+
+    @staticmethod
+    def _filter_opportunities(query, stage: str = None, status: str = None, search: str = None):
+        """Apply the opportunity list filters; returns (query, search rank or None)"""
+        query = query.filter(
             and_(Opportunity.is_active == True, Opportunity.deleted_on.is_(None))
         )
 
@@ -571,26 +786,19 @@ class OpportunityService:
         if status:
             query = query.filter(Opportunity.status == status)
 
+        rank = None
         if search:
-            search_term = f"%{search}%"
-            query = (
-                query.join(Company)
-                .join(Contact)
-                .filter(
-                    or_(
-                        Opportunity.name.ilike(search_term),
-                        Opportunity.pot_id.ilike(search_term),
-                        Company.name.ilike(search_term),
-                        Contact.full_name.ilike(search_term),
-                    )
-                )
-            )
-
-        return query.count()
+            query, rank = search_index.apply(query, Opportunity, search)
+        return query, rank
 
     def get_pipeline_summary(self, user_id: int = None) -> dict:
-        """Get enhanced opportunity pipeline summary"""
-        query = self.db.query(Opportunity).filter(
+        """Get enhanced opportunity pipeline summary (one GROUP BY stage query)"""
+        query = self.db.query(
+            Opportunity.stage,
+            func.count(Opportunity.id).label("count"),
+            func.coalesce(func.sum(Opportunity.amount), 0).label("value"),
+            func.coalesce(func.sum(Opportunity.scoring), 0).label("scoring"),
+        ).filter(
             and_(
                 Opportunity.is_active == True,
                 Opportunity.deleted_on.is_(None),
@@ -601,41 +809,32 @@ class OpportunityService:
         if user_id:
             query = query.filter(Opportunity.created_by == user_id)
 
-        opportunities = query.all()
+        rows = query.group_by(Opportunity.stage).all()
+        stage_order = list(OpportunityStage)
+        rows.sort(key=lambda row: stage_order.index(row.stage))
 
-        total_opportunities = len(opportunities)
-        total_value = sum(opp.amount or 0 for opp in opportunities)
+        total_opportunities = sum(row.count for row in rows)
+        total_value = sum(row.value for row in rows)
+        total_scoring = sum(row.scoring for row in rows)
         avg_scoring = (
-            sum(opp.scoring for opp in opportunities) / total_opportunities
-            if total_opportunities > 0
-            else 0
+            total_scoring / total_opportunities if total_opportunities > 0 else 0
         )
-        closing_stage_count = len(
-            [
-                opp
-                for opp in opportunities
-                if opp.stage
-                in [OpportunityStage.L4_NEGOTIATION, OpportunityStage.L5_WON]
-            ]
+        closing_stage_count = sum(
+            row.count
+            for row in rows
+            if row.stage in (OpportunityStage.L4_NEGOTIATION, OpportunityStage.L5_WON)
         )
 
-        # Enhanced stage-wise breakdown
-        stage_breakdown = {}
-        for opp in opportunities:
-            stage = opp.stage.value
-            stage_display = opp.stage_display_name
-            if stage not in stage_breakdown:
-                stage_breakdown[stage] = {
-                    "stage": stage,
-                    "stage_display": stage_display,
-                    "count": 0,
-                    "value": 0,
-                    "percentage": opp.stage_percentage,
-                }
-            stage_breakdown[stage]["count"] += 1
-            stage_breakdown[stage]["value"] += opp.amount or 0
-
-        stage_breakdown_list = list(stage_breakdown.values())
+        stage_breakdown_list = [
+            {
+                "stage": row.stage.value,
+                "stage_display": STAGE_DISPLAY_NAMES.get(row.stage, row.stage.value),
+                "count": row.count,
+                "value": row.value,
+                "percentage": STAGE_PERCENTAGES.get(row.stage, 0),
+            }
+            for row in rows
+        ]
 
         return {
             "summary": {
@@ -647,56 +846,111 @@ class OpportunityService:
             "stage_breakdown": stage_breakdown_list,
         }
 
-    def get_opportunity_metrics(self, user_id: int = None) -> dict:
-        """Get enhanced opportunity metrics and analytics"""
-        query = self.db.query(Opportunity).filter(
+    def get_opportunity_metrics(
+        self,
+        user_id: int = None,
+        group_by: Optional[str] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+    ) -> dict:
+        """
+        Get enhanced opportunity metrics and analytics in one aggregate query.
+
+        ``group_by`` ("month" of close_date, "created_by" or "company") adds a
+        per-group breakdown under "groups"; the overall metrics are summed
+        from the same rows. ``date_from``/``date_to`` bound close_date.
+        """
+        if group_by is not None and group_by not in METRICS_GROUP_BY:
+            raise ValueError(f"group_by must be one of {', '.join(METRICS_GROUP_BY)}")
+
+        amount = func.coalesce(Opportunity.amount, 0)
+        columns = [
+            func.count(Opportunity.id).label("total"),
+            func.count(Opportunity.id)
+            .filter(Opportunity.status == OpportunityStatus.WON)
+            .label("won"),
+            func.count(Opportunity.id)
+            .filter(Opportunity.status == OpportunityStatus.LOST)
+            .label("lost"),
+            func.sum(amount)
+            .filter(Opportunity.status == OpportunityStatus.WON)
+            .label("won_value"),
+            func.sum(amount)
+            .filter(Opportunity.status == OpportunityStatus.OPEN)
+            .label("pipeline_value"),
+            func.sum(amount * func.coalesce(Opportunity.probability, 0) / 100)
+            .filter(Opportunity.status == OpportunityStatus.OPEN)
+            .label("forecasted_revenue"),
+        ]
+
+        group_columns = []
+        query = None
+        if group_by == "month":
+            if self.db.get_bind().dialect.name == "postgresql":
+                month = func.to_char(Opportunity.close_date, "YYYY-MM")
+            else:
+                month = func.strftime("%Y-%m", Opportunity.close_date)
+            group_columns = [month.label("key"), month.label("label")]
+            query = self.db.query(*group_columns, *columns)
+        elif group_by == "created_by":
+            group_columns = [Opportunity.created_by.label("key"), User.name.label("label")]
+            query = self.db.query(*group_columns, *columns).outerjoin(
+                User, Opportunity.created_by == User.id
+            )
+        elif group_by == "company":
+            group_columns = [Opportunity.company_id.label("key"), Company.name.label("label")]
+            query = self.db.query(*group_columns, *columns).outerjoin(
+                Company, Opportunity.company_id == Company.id
+            )
+        else:
+            query = self.db.query(*columns)
+
+        query = query.filter(
             and_(Opportunity.is_active == True, Opportunity.deleted_on.is_(None))
         )
-
         if user_id:
             query = query.filter(Opportunity.created_by == user_id)
+        if date_from:
+            query = query.filter(Opportunity.close_date >= date_from)
+        if date_to:
+            query = query.filter(Opportunity.close_date <= date_to)
+
+        if not group_columns:
+            return self._metrics_from_totals(query.one()._mapping)
+
+        rows = query.group_by(*[column.element for column in group_columns]).all()
+        totals = dict.fromkeys(METRICS_SUM_FIELDS, 0)
+        groups = []
+        for row in rows:
+            for field in METRICS_SUM_FIELDS:
+                totals[field] += getattr(row, field) or 0
+            groups.append(
+                {"key": row.key, "label": row.label, **self._metrics_from_totals(row._mapping)}
+            )
 
-        opportunities = query.all()
-
-        total_opportunities = len(opportunities)
-        won_opportunities = len(
-            [opp for opp in opportunities if opp.status == OpportunityStatus.WON]
-        )
-        lost_opportunities = len(
-            [opp for opp in opportunities if opp.status == OpportunityStatus.LOST]
-        )
-
-        win_rate = (
-            (won_opportunities / total_opportunities * 100)
-            if total_opportunities > 0
-            else 0
-        )
-
-        won_opps = [opp for opp in opportunities if opp.status == OpportunityStatus.WON]
-        avg_deal_size = (
-            sum(opp.amount or Decimal(0) for opp in won_opps) / len(won_opps)
-            if won_opps
-            else Decimal(0)
-        )
-
-        pipeline_value = sum(
-            opp.amount or Decimal(0)
-            for opp in opportunities
-            if opp.status == OpportunityStatus.OPEN
-        )
-
-        forecasted_revenue = sum(
-            (opp.amount or Decimal(0)) * (Decimal(opp.probability) / Decimal(100))
-            for opp in opportunities
-            if opp.status == OpportunityStatus.OPEN
-        )
-
+        if group_by == "month":
+            # Chronological, with opportunities lacking a close_date last
+            groups.sort(key=lambda group: (group["key"] is None, group["key"] or ""))
+        else:
+            groups.sort(key=lambda group: group["total_opportunities"], reverse=True)
+
+        metrics = self._metrics_from_totals(totals)
+        metrics["group_by"] = group_by
+        metrics["groups"] = groups
+        return metrics
+
+    @staticmethod
+    def _metrics_from_totals(totals) -> dict:
+        """Derive the metric set from summed counters (a row mapping or dict)"""
+        total = totals.get("total") or 0
+        won = totals.get("won") or 0
+        won_value = Decimal(totals.get("won_value") or 0)
         return {
-            "total_opportunities": total_opportunities,
-            "won_opportunities": won_opportunities,
-            "lost_opportunities": lost_opportunities,
-            "win_rate": round(win_rate, 2),
-            "avg_deal_size": float(avg_deal_size),
-            "pipeline_value": float(pipeline_value),
-            "forecasted_revenue": float(forecasted_revenue),
+            "total_opportunities": total,
+            "won_opportunities": won,
+            "lost_opportunities": totals.get("lost") or 0,
+            "win_rate": round(won / total * 100, 2) if total > 0 else 0,
+            "avg_deal_size": float(won_value / won) if won else 0.0,
+            "pipeline_value": float(totals.get("pipeline_value") or 0),
+            "forecasted_revenue": float(totals.get("forecasted_revenue") or 0),
         }
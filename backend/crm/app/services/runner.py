@@ -0,0 +1,32 @@
+"""
+Run service-layer calls on the configured data path
+"""
+from typing import Callable, Type, TypeVar, Any
+from sqlalchemy.ext.asyncio import AsyncSession
+
+S = TypeVar("S")
+
+
+class ServiceRunner:
+    """
+    Wraps a service class and the request's session.
+
+    With a sync Session the callback runs inline. With an AsyncSession
+    (DATABASE_ASYNC=true) it runs through AsyncSession.run_sync, so every
+    query - including lazy loads touched while serializing - is awaited on
+    the async driver instead of blocking the event loop. Keep ORM access
+    inside the callback and return plain data.
+    """
+
+    def __init__(self, service_cls: Type[S], db):
+        self.service_cls = service_cls
+        self.db = db
+
+    @property
+    def is_async(self) -> bool:
+        return isinstance(self.db, AsyncSession)
+
+    async def run(self, fn: Callable[[S], Any]) -> Any:
+        if self.is_async:
+            return await self.db.run_sync(lambda session: fn(self.service_cls(session)))
+        return fn(self.service_cls(self.db))
@@ -0,0 +1,284 @@
+"""
+Full-text search index for leads, opportunities, contacts and companies
+
+Each searchable entity has a mirror table holding one text document per
+row (its own searchable columns plus the names of the company/contact it
+points at), so a search no longer ILIKE-scans the entity joined to its
+related tables:
+
+    PostgreSQL  search_<table>(id, content, tsv) with a GIN tsvector index
+                for word/prefix matches and a GIN pg_trgm index that serves
+                the substring (ILIKE) match; ranked by ts_rank + similarity
+    SQLite      FTS5 virtual table search_<table>(content) using the trigram
+                tokenizer (substring matches), rowid = entity id; ranked by
+                bm25
+
+Documents are rewritten in the same transaction as the rows they mirror
+(Session after_flush), including dependents when a company or contact
+name changes. Writes that bypass the ORM (Core bulk inserts) must call
+``search_index.reindex``. When the mirror tables don't exist (e.g. the
+pg_trgm extension can't be installed) searches fall back to ILIKE over
+the same document text, unranked.
+"""
+import re
+from itertools import chain
+from typing import Callable, Dict, Iterable, NamedTuple, Optional, Tuple
+
+from sqlalchemy import (
+    bindparam, column, delete, event, func, insert, inspect, literal, literal_column,
+    or_, select, table,
+)
+from sqlalchemy.orm import Session
+
+from ..models import Lead, Opportunity, Contact, Company
+
+# Searches shorter than this can't use the trigram index on SQLite
+MIN_TRIGRAM_LENGTH = 3
+# Reindex ids in chunks to keep IN lists bounded
+REINDEX_CHUNK_SIZE = 1000
+
+
+def _document(*columns):
+    """Space separated document text from nullable columns"""
+    content = func.coalesce(columns[0], "")
+    for col in columns[1:]:
+        content = content + " " + func.coalesce(col, "")
+    return content.label("content")
+
+
+class SearchEntity(NamedTuple):
+    """How one model is mirrored into its search table"""
+    table_name: str
+    documents: Callable[[], "Select"]
+    # Referenced model -> this model's foreign key to it, for reindexing
+    # dependents when the referenced row's indexed text changes
+    references: Dict[type, object]
+
+
+# Mirrors the columns the list endpoints used to ILIKE
+SEARCH_ENTITIES: Dict[type, SearchEntity] = {
+    Lead: SearchEntity(
+        "search_leads",
+        lambda: select(
+            Lead.id, _document(Lead.project_title, Lead.tender_authority, Company.name)
+        ).select_from(Lead).outerjoin(Company, Lead.company_id == Company.id),
+        {Company: Lead.company_id},
+    ),
+    Opportunity: SearchEntity(
+        "search_opportunities",
+        lambda: select(
+            Opportunity.id,
+            _document(Opportunity.name, Opportunity.pot_id, Company.name, Contact.full_name),
+        ).select_from(Opportunity)
+        .outerjoin(Company, Opportunity.company_id == Company.id)
+        .outerjoin(Contact, Opportunity.contact_id == Contact.id),
+        {Company: Opportunity.company_id, Contact: Opportunity.contact_id},
+    ),
+    Contact: SearchEntity(
+        "search_contacts",
+        lambda: select(
+            Contact.id,
+            _document(Contact.full_name, Contact.email, Contact.designation, Company.name),
+        ).select_from(Contact).outerjoin(Company, Contact.company_id == Company.id),
+        {Company: Contact.company_id},
+    ),
+    Company: SearchEntity(
+        "search_companies",
+        lambda: select(
+            Company.id, _document(Company.name, Company.industry_category, Company.city)
+        ),
+        {},
+    ),
+}
+
+# Columns of referenced models that appear in other entities' documents
+REFERENCED_COLUMNS = {
+    Company: ("name",),
+    Contact: ("full_name",),
+}
+
+
+class SearchIndex:
+    """Creates, maintains and queries the search mirror tables"""
+
+    def __init__(self):
+        # Database URL -> whether the mirror tables exist there
+        self._available: Dict[str, bool] = {}
+
+    # Schema
+
+    def ensure(self, engine):
+        """Create missing mirror tables (and their indexes) and fill new ones"""
+        try:
+            with engine.begin() as conn:
+                existing = set(inspect(conn).get_table_names())
+                if conn.dialect.name == "postgresql":
+                    conn.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+                for model, entity in SEARCH_ENTITIES.items():
+                    if entity.table_name in existing:
+                        continue
+                    for statement in self._ddl(conn.dialect.name, entity.table_name):
+                        conn.exec_driver_sql(statement)
+                    self._reindex(conn, model)
+                    print(f"✅ Built search index {entity.table_name}")
+            self._available[str(engine.url)] = True
+        except Exception as e:
+            self._available[str(engine.url)] = False
+            print(f"❌ Search index unavailable, searches fall back to ILIKE: {e}")
+
+    @staticmethod
+    def _ddl(dialect: str, name: str):
+        if dialect == "postgresql":
+            return [
+                f"CREATE TABLE {name} (id INTEGER PRIMARY KEY, content TEXT NOT NULL, "
+                f"tsv TSVECTOR GENERATED ALWAYS AS (to_tsvector('simple', content)) STORED)",
+                f"CREATE INDEX ix_{name}_tsv ON {name} USING GIN (tsv)",
+                f"CREATE INDEX ix_{name}_trgm ON {name} USING GIN (content gin_trgm_ops)",
+            ]
+        if dialect == "sqlite":
+            return [f"CREATE VIRTUAL TABLE {name} USING fts5(content, tokenize='trigram')"]
+        raise NotImplementedError(f"No search index for {dialect}")
+
+    def is_available(self, connection) -> bool:
+        key = str(connection.engine.url)
+        if key not in self._available:
+            names = set(inspect(connection).get_table_names())
+            self._available[key] = all(
+                entity.table_name in names for entity in SEARCH_ENTITIES.values()
+            )
+        return self._available[key]
+
+    @staticmethod
+    def _table(dialect: str, model):
+        id_column = "rowid" if dialect == "sqlite" else "id"
+        return table(SEARCH_ENTITIES[model].table_name, column(id_column), column("content"), column("tsv"))
+
+    # Maintenance
+
+    def reindex(self, db: Session, model, ids: Optional[Iterable[int]] = None):
+        """Rewrite the documents of ``ids`` (every row when None) in ``db``'s transaction"""
+        connection = db.connection()
+        if self.is_available(connection):
+            self._reindex(connection, model, ids)
+
+    def _reindex(self, connection, model, ids=None, where=None):
+        search_table = self._table(connection.dialect.name, model)
+        id_column = list(search_table.c)[0]
+        documents = SEARCH_ENTITIES[model].documents()
+
+        if ids is None and where is None:
+            connection.execute(delete(search_table))
+            connection.execute(insert(search_table).from_select([id_column, search_table.c.content], documents))
+            return
+
+        if where is not None:
+            selected = select(model.id).where(where)
+            connection.execute(delete(search_table).where(id_column.in_(selected)))
+            connection.execute(insert(search_table).from_select(
+                [id_column, search_table.c.content], documents.where(where)
+            ))
+            return
+
+        ids = list(ids)
+        for start in range(0, len(ids), REINDEX_CHUNK_SIZE):
+            chunk = ids[start:start + REINDEX_CHUNK_SIZE]
+            connection.execute(delete(search_table).where(id_column.in_(chunk)))
+            connection.execute(insert(search_table).from_select(
+                [id_column, search_table.c.content], documents.where(model.id.in_(chunk))
+            ))
+
+    def remove(self, connection, model, ids: Iterable[int]):
+        search_table = self._table(connection.dialect.name, model)
+        connection.execute(delete(search_table).where(list(search_table.c)[0].in_(list(ids))))
+
+    # Queries
+
+    def apply(self, query, model, term: str) -> Tuple[object, Optional[object]]:
+        """
+        Restrict an ORM ``query`` on ``model`` to rows matching ``term``.
+
+        Returns (query, rank): rank is a column to order by (higher is more
+        relevant), or None when the index is unavailable and the query
+        falls back to an unranked ILIKE over the document text.
+        """
+        term = term.strip()
+        connection = query.session.connection()
+        if not self.is_available(connection):
+            documents = SEARCH_ENTITIES[model].documents().subquery()
+            matched = select(documents.c.id).where(documents.c.content.ilike(f"%{term}%"))
+            return query.filter(model.id.in_(matched)), None
+
+        matches = self._matches(connection.dialect.name, model, term)
+        query = query.join(matches, model.id == matches.c.id)
+        return query, matches.c.rank
+
+    def _matches(self, dialect: str, model, term: str):
+        search_table = self._table(dialect, model)
+        pattern = f"%{term}%"
+
+        if dialect == "postgresql":
+            words = re.findall(r"\w+", term)
+            condition = search_table.c.content.ilike(pattern)
+            rank = func.similarity(search_table.c.content, term)
+            if words:
+                tsquery = func.to_tsquery("simple", " & ".join(f"{word}:*" for word in words))
+                condition = or_(search_table.c.tsv.op("@@")(tsquery), condition)
+                rank = func.ts_rank(search_table.c.tsv, tsquery) + rank
+            return select(
+                search_table.c.id.label("id"), rank.label("rank")
+            ).where(condition).subquery()
+
+        if len(term) < MIN_TRIGRAM_LENGTH:
+            return select(
+                search_table.c.rowid.label("id"), literal(0.0).label("rank")
+            ).where(search_table.c.content.like(pattern)).subquery()
+
+        fts = literal_column(search_table.name)
+        phrase = '"' + term.replace('"', '""') + '"'
+        return select(
+            search_table.c.rowid.label("id"), (-func.bm25(fts)).label("rank")
+        ).where(fts.op("MATCH")(bindparam("search_phrase", phrase))).subquery()
+
+
+search_index = SearchIndex()
+
+
+# Keep documents in step with ORM writes, in the same transaction
+@event.listens_for(Session, "after_flush")
+def _reindex_flushed(session, flush_context):
+    changed: Dict[type, set] = {}
+    renamed: Dict[type, set] = {}
+    removed: Dict[type, set] = {}
+
+    for obj in chain(session.new, session.dirty):
+        model = type(obj)
+        if model not in SEARCH_ENTITIES:
+            continue
+        if obj not in session.new and not session.is_modified(obj, include_collections=False):
+            continue
+        changed.setdefault(model, set()).add(obj.id)
+        columns = REFERENCED_COLUMNS.get(model, ())
+        if obj not in session.new and any(
+            inspect(obj).attrs[name].history.has_changes() for name in columns
+        ):
+            renamed.setdefault(model, set()).add(obj.id)
+
+    for obj in session.deleted:
+        if type(obj) in SEARCH_ENTITIES:
+            removed.setdefault(type(obj), set()).add(obj.id)
+
+    if not (changed or removed):
+        return
+    connection = session.connection()
+    if not search_index.is_available(connection):
+        return
+
+    for model, ids in removed.items():
+        search_index.remove(connection, model, ids)
+    for model, ids in changed.items():
+        search_index._reindex(connection, model, ids)
+    for referenced, ids in renamed.items():
+        for model, entity in SEARCH_ENTITIES.items():
+            foreign_key = entity.references.get(referenced)
+            if foreign_key is not None:
+                search_index._reindex(connection, model, where=foreign_key.in_(ids))
@@ -0,0 +1,201 @@
+"""
+Typeahead suggestions for the company / contact / user / opportunity pickers
+
+Served from an in-process PrefixIndex instead of the list endpoints: the
+index is built at startup, kept current from ORM writes (changes captured
+at flush, applied once the transaction commits) and rebuilt every
+SUGGEST_INDEX_REFRESH_SECONDS so writes made by other worker processes
+show up too.
+"""
+import asyncio
+from typing import Callable, Dict, Iterable, NamedTuple, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database.engine import get_sessionmaker
+from ..models import Company, Contact, User, Opportunity
+from ..utils.prefix_index import PrefixIndex, terms_for
+
+SUGGEST_COMPANY = "company"
+SUGGEST_CONTACT = "contact"
+SUGGEST_USER = "user"
+SUGGEST_OPPORTUNITY = "opportunity"
+
+
+class SuggestSource(NamedTuple):
+    """What one model contributes to the index"""
+    kind: str
+    model: type
+    columns: Tuple[str, ...]
+    # row (ORM object or column tuple) -> (terms, payload)
+    document: Callable
+    # Permission needed to see these suggestions
+    permission: str
+
+
+def _pot_number(pot_id: Optional[str]) -> Optional[str]:
+    return pot_id.split("-", 1)[1] if pot_id and "-" in pot_id else None
+
+
+SUGGEST_SOURCES: Dict[type, SuggestSource] = {
+    Company: SuggestSource(
+        SUGGEST_COMPANY, Company, ("id", "name"),
+        lambda row: (
+            terms_for(row.name),
+            {"type": SUGGEST_COMPANY, "id": row.id, "label": row.name},
+        ),
+        "companies:read",
+    ),
+    Contact: SuggestSource(
+        SUGGEST_CONTACT, Contact, ("id", "full_name", "email", "company_id"),
+        lambda row: (
+            terms_for(row.full_name, row.email),
+            {
+                "type": SUGGEST_CONTACT, "id": row.id, "label": row.full_name,
+                "sublabel": row.email, "company_id": row.company_id,
+            },
+        ),
+        "contacts:read",
+    ),
+    User: SuggestSource(
+        SUGGEST_USER, User, ("id", "name", "username", "email"),
+        lambda row: (
+            terms_for(row.name, row.username, row.email),
+            {"type": SUGGEST_USER, "id": row.id, "label": row.name, "sublabel": row.email},
+        ),
+        "users:read",
+    ),
+    Opportunity: SuggestSource(
+        SUGGEST_OPPORTUNITY, Opportunity, ("id", "pot_id", "name"),
+        lambda row: (
+            terms_for(row.pot_id, _pot_number(row.pot_id)),
+            {"type": SUGGEST_OPPORTUNITY, "id": row.id, "label": row.pot_id, "sublabel": row.name},
+        ),
+        "opportunities:read",
+    ),
+}
+
+SUGGEST_TYPES = tuple(source.kind for source in SUGGEST_SOURCES.values())
+SUGGEST_PERMISSIONS = {source.kind: source.permission for source in SUGGEST_SOURCES.values()}
+
+
+class SuggestIndex:
+    """PrefixIndex over SUGGEST_SOURCES plus its refresh task"""
+
+    def __init__(self, refresh_interval: float = 300.0):
+        self.refresh_interval = refresh_interval
+        self.index = PrefixIndex()
+        self._task: Optional[asyncio.Task] = None
+        self.lookups = 0
+        self.builds = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def rebuild(self):
+        """Load every active row of every source (one narrow query each)"""
+        def load():
+            db = get_sessionmaker()()
+            try:
+                for model, source in SUGGEST_SOURCES.items():
+                    columns = [getattr(model, name) for name in source.columns]
+                    rows = db.query(*columns).filter(
+                        model.is_active == True, model.deleted_on.is_(None)
+                    )
+                    for row in rows.yield_per(5000):
+                        terms, payload = source.document(row)
+                        yield (source.kind, row.id), terms, payload
+            finally:
+                db.close()
+
+        self.index.replace_all(load)
+        self.builds += 1
+
+    async def start(self):
+        """Build the index and start periodic rebuilds (called from the app lifespan)"""
+        await asyncio.to_thread(self.rebuild)
+        print(f"✅ Suggest index built: {len(self.index)} entries in {self.index.last_build_ms:.0f}ms")
+        if self.refresh_interval > 0 and not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if not self.running:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await asyncio.to_thread(self.rebuild)
+            except Exception as e:
+                print(f"❌ Suggest index rebuild failed: {e}")
+
+    def suggest(self, prefix: str, limit: int = 10, types: Iterable[str] = SUGGEST_TYPES):
+        """Top ``limit`` suggestions of the given types for ``prefix``"""
+        self.lookups += 1
+        types = frozenset(types)
+        if types.issuperset(SUGGEST_TYPES):
+            return self.index.search(prefix, limit)
+        return self.index.search(prefix, limit, accept=lambda payload: payload["type"] in types)
+
+    def apply(self, changes: Iterable[tuple]):
+        """Apply (key, terms, payload) changes; terms None removes the entry"""
+        for key, terms, payload in changes:
+            if terms is None:
+                self.index.remove(key)
+            else:
+                self.index.add(key, terms, payload)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.index),
+            "builds": self.builds,
+            "last_build_ms": round(self.index.last_build_ms, 2),
+            "lookups": self.lookups,
+            "refresh_interval_seconds": self.refresh_interval,
+        }
+
+
+suggest_index = SuggestIndex(settings.SUGGEST_INDEX_REFRESH_SECONDS)
+
+
+# Capture changes at flush (attributes are still loaded), apply them only
+# once the transaction commits
+@event.listens_for(Session, "after_flush")
+def _capture_suggest_changes(session, flush_context):
+    changes = []
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        source = SUGGEST_SOURCES.get(type(obj))
+        if source is None:
+            continue
+        if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+            continue
+        key = (source.kind, obj.id)
+        if obj in session.deleted or not obj.is_active or obj.deleted_on is not None:
+            changes.append((key, None, None))
+        else:
+            terms, payload = source.document(obj)
+            changes.append((key, terms, payload))
+    if changes:
+        session.info.setdefault("suggest_changes", []).extend(changes)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_suggest_changes(session):
+    changes = session.info.pop("suggest_changes", None)
+    if changes:
+        suggest_index.apply(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_suggest_changes(session):
+    session.info.pop("suggest_changes", None)
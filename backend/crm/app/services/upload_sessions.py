@@ -0,0 +1,394 @@
+"""
+Resumable chunked uploads for large (tender) documents
+
+A client opens a session for a lead or opportunity document
+(POST /api/leads/{id}/upload-sessions, /api/opportunities/{id}/upload-sessions),
+PUTs the parts to /api/uploads/{session}/parts/{n} - in any order, in
+parallel, retrying any that fail - and completes it with
+POST /api/uploads/{session}/complete. Each part is its own short request, so
+a slow multi-gigabyte upload never holds one request (or a database
+connection) open for minutes, and an interrupted upload resumes from
+GET /api/uploads/{session}, which lists the parts already received.
+
+Parts go straight to the storage backend's multipart upload (part files
+on local storage, a native multipart upload on S3); the database only
+holds the session row. Completion assembles / commits the parts and
+attaches the document exactly like a direct upload. Sessions expire
+UPLOAD_SESSION_TTL_SECONDS after they are opened; the janitor marks them
+expired and discards their parts every UPLOAD_SESSION_CLEANUP_SECONDS.
+"""
+import asyncio
+import mimetypes
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import and_, or_, update
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database.engine import get_sessionmaker
+from ..models import Lead, Opportunity, UploadSession
+from ..models.upload_session import (
+    UPLOAD_OPEN, UPLOAD_COMPLETING, UPLOAD_COMPLETED, UPLOAD_ABORTED, UPLOAD_EXPIRED,
+)
+from ..utils.storage import storage, document_key, UploadedPart
+from .lead_service import LeadService
+from .opportunity_service import OpportunityService, DOCUMENT_FIELDS
+
+# Entity type -> URL / storage key prefix
+UPLOAD_ENTITIES = {"lead": "leads", "opportunity": "opportunities"}
+# S3 allows at most 10000 parts; larger files get larger parts
+MAX_PARTS = 10000
+# A session stuck "completing" (worker died mid-completion) is expired this
+# long after its expiry time
+COMPLETING_GRACE = timedelta(hours=1)
+
+
+class UploadSessionError(ValueError):
+    """The request doesn't fit the session (bad part number, parts missing)"""
+
+
+class UploadSessionNotFound(LookupError):
+    """No such session for this user, or its lead / opportunity is gone"""
+
+
+class UploadSessionGone(Exception):
+    """The session was completed, aborted or has expired"""
+
+
+class UploadSessionService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def create_session(
+        self, entity_type: str, entity_id: int, data: dict, created_by: Optional[int] = None
+    ) -> UploadSession:
+        """Open a session and its multipart upload for a document of data["total_size"] bytes"""
+        if not self._entity_exists(entity_type, entity_id):
+            raise UploadSessionNotFound(f"{entity_type.capitalize()} not found")
+        if entity_type == "opportunity" and data["document_type"] not in DOCUMENT_FIELDS:
+            raise UploadSessionError(
+                f"Unknown document type '{data['document_type']}', expected one of: {', '.join(DOCUMENT_FIELDS)}"
+            )
+        total_size = data["total_size"]
+        if total_size > settings.UPLOAD_SESSION_MAX_BYTES:
+            raise UploadSessionError(
+                f"Files can be at most {settings.UPLOAD_SESSION_MAX_BYTES} bytes"
+            )
+        part_size = max(
+            settings.UPLOAD_SESSION_PART_SIZE,
+            storage.backend.min_part_size,
+            -(-total_size // MAX_PARTS),
+        )
+        key = document_key(
+            f"{UPLOAD_ENTITIES[entity_type]}/{entity_id}",
+            f"{data['document_type']}_{data['file_name']}",
+        )
+        content_type = (
+            data.get("content_type") or mimetypes.guess_type(key)[0] or "application/octet-stream"
+        )
+        upload_id = storage.backend.create_multipart(key, content_type)
+
+        now = datetime.utcnow()
+        session = UploadSession(
+            id=uuid.uuid4().hex,
+            entity_type=entity_type,
+            entity_id=entity_id,
+            document_type=data["document_type"],
+            file_name=data["file_name"],
+            content_type=content_type,
+            quotation_name=data.get("quotation_name"),
+            description=data.get("description"),
+            total_size=total_size,
+            part_size=part_size,
+            storage_key=key,
+            upload_id=upload_id,
+            status=UPLOAD_OPEN,
+            created_by=created_by,
+            created_on=now,
+            expires_at=now + timedelta(seconds=settings.UPLOAD_SESSION_TTL_SECONDS),
+        )
+        self.db.add(session)
+        try:
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            storage.backend.abort_multipart(key, upload_id)
+            raise
+        self.db.refresh(session)
+        return session
+
+    def get_session(self, session_id: str, user_id: int) -> UploadSession:
+        """The session if ``user_id`` opened it"""
+        session = self.db.get(UploadSession, session_id)
+        if session is None or session.created_by != user_id:
+            raise UploadSessionNotFound("Upload session not found")
+        return session
+
+    def get_open_session(self, session_id: str, user_id: int) -> UploadSession:
+        """The session if it still takes parts"""
+        session = self.get_session(session_id, user_id)
+        if session.status != UPLOAD_OPEN:
+            raise UploadSessionGone(f"Upload session is {session.status}")
+        if session.expires_at <= datetime.utcnow():
+            raise UploadSessionGone("Upload session has expired")
+        return session
+
+    def part_target(self, session_id: str, user_id: int, number: int) -> tuple:
+        """(entity type, storage key, multipart upload id, expected size) for storing part ``number``"""
+        session = self.get_open_session(session_id, user_id)
+        if not 1 <= number <= session.part_count:
+            raise UploadSessionError(f"Part numbers run from 1 to {session.part_count}")
+        target = (session.entity_type, session.storage_key, session.upload_id, session.part_length(number))
+        # Release the connection before the part body streams in
+        self.db.commit()
+        return target
+
+    def describe(self, session: UploadSession, parts: Optional[List[UploadedPart]] = None) -> dict:
+        """Session state for the client; with ``parts``, what has been received so far"""
+        data = {
+            "session_id": session.id,
+            "entity_type": session.entity_type,
+            "entity_id": session.entity_id,
+            "document_type": session.document_type,
+            "file_name": session.file_name,
+            "status": session.status,
+            "total_size": session.total_size,
+            "part_size": session.part_size,
+            "part_count": session.part_count,
+            "expires_at": session.expires_at,
+            "part_url": f"/api/uploads/{session.id}/parts/{{part_number}}",
+        }
+        if parts is not None:
+            received = {part.number for part in parts}
+            data["parts"] = [{"part_number": part.number, "size": part.size} for part in parts]
+            data["received_bytes"] = sum(part.size for part in parts)
+            data["missing_parts"] = [
+                number for number in range(1, session.part_count + 1) if number not in received
+            ]
+        return data
+
+    def session_status(self, session_id: str, user_id: int) -> dict:
+        """describe() including the parts received, for resuming an upload"""
+        session = self.get_session(session_id, user_id)
+        parts = None
+        if session.status == UPLOAD_OPEN:
+            parts = storage.backend.list_parts(session.storage_key, session.upload_id)
+        return self.describe(session, parts)
+
+    def complete(self, session_id: str, user_id: int) -> dict:
+        """Assemble the parts into the document and attach it to its lead / opportunity"""
+        session = self.get_open_session(session_id, user_id)
+        if not self._entity_exists(session.entity_type, session.entity_id):
+            raise UploadSessionNotFound(f"{session.entity_type.capitalize()} not found")
+
+        parts = storage.backend.list_parts(session.storage_key, session.upload_id)
+        received = {part.number: part for part in parts}
+        missing = [n for n in range(1, session.part_count + 1) if n not in received]
+        if missing:
+            raise UploadSessionError(f"Parts not received yet: {missing[:50]}")
+        wrong = [
+            n for n in range(1, session.part_count + 1)
+            if received[n].size != session.part_length(n)
+        ]
+        if wrong:
+            raise UploadSessionError(f"Parts with the wrong size, upload them again: {wrong[:50]}")
+        parts = [received[n] for n in range(1, session.part_count + 1)]
+
+        # Claim the session so a concurrent complete / expiry can't run too
+        claimed = self.db.execute(
+            update(UploadSession)
+            .where(
+                UploadSession.id == session.id,
+                UploadSession.status == UPLOAD_OPEN,
+                UploadSession.expires_at > datetime.utcnow(),
+            )
+            .values(status=UPLOAD_COMPLETING)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        self.db.commit()
+        if not claimed:
+            raise UploadSessionGone("Upload session is no longer open")
+
+        try:
+            sha256 = storage.complete_multipart(session.storage_key, session.upload_id, parts)
+        except Exception:
+            self._set_status(session.id, UPLOAD_OPEN)
+            raise
+
+        prefix = UPLOAD_ENTITIES[session.entity_type]
+        file_path = (
+            f"/api/{prefix}/{session.entity_id}/documents/{session.storage_key.rsplit('/', 1)[-1]}"
+        )
+        try:
+            if session.entity_type == "lead":
+                attached = LeadService(self.db).add_document(session.entity_id, {
+                    "document_type": session.document_type,
+                    "quotation_name": session.quotation_name or "",
+                    "file_path": file_path,
+                    "description": session.description or "",
+                    "file_name": session.file_name,
+                    "storage_key": session.storage_key,
+                    "size": session.total_size,
+                    "sha256": sha256,
+                    "content_type": session.content_type,
+                }, user_id)
+            else:
+                attached = OpportunityService(self.db).attach_document(
+                    session.entity_id, session.document_type, file_path, user_id
+                )
+            if attached is None:
+                raise UploadSessionNotFound(f"{session.entity_type.capitalize()} not found")
+            if not self._document_recorded(session, file_path):
+                raise RuntimeError(f"The document was not recorded on the {session.entity_type}")
+        except Exception:
+            self.db.rollback()
+            storage.backend.delete(session.storage_key)
+            self._set_status(session.id, UPLOAD_ABORTED)
+            raise
+
+        self._set_status(session.id, UPLOAD_COMPLETED, completed_on=datetime.utcnow())
+        return {
+            "session_id": session.id,
+            "file_path": file_path,
+            "document_type": session.document_type,
+            "size": session.total_size,
+            "sha256": sha256,
+        }
+
+    def abort(self, session_id: str, user_id: int):
+        """Discard an open session and the parts received"""
+        session = self.get_session(session_id, user_id)
+        if session.status != UPLOAD_OPEN:
+            raise UploadSessionGone(f"Upload session is {session.status}")
+        if self._claim(session.id, UPLOAD_OPEN, UPLOAD_ABORTED):
+            storage.backend.abort_multipart(session.storage_key, session.upload_id)
+
+    def expire_sessions(self, limit: int = 500) -> int:
+        """Expire open sessions past their expiry time and discard their parts"""
+        now = datetime.utcnow()
+        rows = (
+            self.db.query(
+                UploadSession.id, UploadSession.status,
+                UploadSession.storage_key, UploadSession.upload_id,
+            )
+            .filter(
+                or_(
+                    and_(UploadSession.status == UPLOAD_OPEN, UploadSession.expires_at <= now),
+                    and_(
+                        UploadSession.status == UPLOAD_COMPLETING,
+                        UploadSession.expires_at <= now - COMPLETING_GRACE,
+                    ),
+                )
+            )
+            .limit(limit)
+            .all()
+        )
+        expired = 0
+        for row in rows:
+            if not self._claim(row.id, row.status, UPLOAD_EXPIRED):
+                continue
+            expired += 1
+            try:
+                storage.backend.abort_multipart(row.storage_key, row.upload_id)
+            except Exception as e:
+                print(f"❌ Could not discard the parts of upload session {row.id}: {e}")
+        return expired
+
+    def _claim(self, session_id: str, current: str, status: str) -> bool:
+        """Move the session from ``current`` to ``status``; False if another request got there first"""
+        claimed = self.db.execute(
+            update(UploadSession)
+            .where(UploadSession.id == session_id, UploadSession.status == current)
+            .values(status=status)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        self.db.commit()
+        return bool(claimed)
+
+    def _set_status(self, session_id: str, status: str, completed_on: Optional[datetime] = None):
+        values = {"status": status}
+        if completed_on:
+            values["completed_on"] = completed_on
+        self.db.execute(
+            update(UploadSession)
+            .where(UploadSession.id == session_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+
+    def _document_recorded(self, session: UploadSession, file_path: str) -> bool:
+        """Whether the committed lead / opportunity row references the assembled document"""
+        if session.entity_type == "lead":
+            documents = (
+                self.db.query(Lead.documents).filter(Lead.id == session.entity_id).scalar() or []
+            )
+            return any(document.get("storage_key") == session.storage_key for document in documents)
+        column = getattr(Opportunity, DOCUMENT_FIELDS[session.document_type])
+        return (
+            self.db.query(column).filter(Opportunity.id == session.entity_id).scalar() == file_path
+        )
+
+    def _entity_exists(self, entity_type: str, entity_id: int) -> bool:
+        if entity_type == "lead":
+            return LeadService(self.db).get_lead_version(entity_id) is not None
+        return OpportunityService(self.db).get_opportunity_version(entity_id) is not None
+
+
+class UploadSessionJanitor:
+    """Periodically expires abandoned upload sessions"""
+
+    def __init__(self, interval: float = 3600.0):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.expired = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def run_once(self) -> int:
+        db = get_sessionmaker()()
+        try:
+            expired = UploadSessionService(db).expire_sessions()
+        finally:
+            db.close()
+        self.runs += 1
+        self.expired += expired
+        return expired
+
+    async def start(self):
+        """Start periodic cleanup (called from the app lifespan)"""
+        if self.interval > 0 and not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if not self.running:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(self.run_once)
+            except Exception as e:
+                print(f"❌ Upload session cleanup failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "expired": self.expired,
+            "interval_seconds": self.interval,
+        }
+
+
+upload_session_janitor = UploadSessionJanitor(settings.UPLOAD_SESSION_CLEANUP_SECONDS)
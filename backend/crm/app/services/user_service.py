@@ -3,19 +3,70 @@ User management service using SQLAlchemy ORM
 """
 from typing import Optional, List
 from datetime import datetime
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, and_
+from sqlalchemy.orm import Session, joinedload, object_session
+from sqlalchemy import or_, and_, event, update
 from ..models import User, Role, Department
 from ..utils.auth import hash_password
+from ..utils.principal_cache import principal_cache, token_version_cache
+from ..utils.response_cache import response_cache
+from ..utils.pagination import keyset_page, Page, TOTAL_NONE
+from .loader_profiles import loader_options, USER_LIST
 from ..schemas.user import UserCreate, UserUpdate
 
+
+@event.listens_for(Role, "after_update")
+@event.listens_for(Role, "after_delete")
+def _invalidate_role_principals(mapper, connection, target):
+    """Role permissions are embedded in cached principals and self-contained tokens"""
+    connection.execute(
+        update(User.__table__)
+        .where(User.__table__.c.role_id == target.id)
+        .values(token_version=User.__table__.c.token_version + 1)
+    )
+    object_session(target).info["principals_stale"] = True
+
+
+@event.listens_for(Department, "after_update")
+def _invalidate_department_principals(mapper, connection, target):
+    """Department names are embedded in cached principals and self-contained tokens"""
+    connection.execute(
+        update(User.__table__)
+        .where(User.__table__.c.department_id == target.id)
+        .values(token_version=User.__table__.c.token_version + 1)
+    )
+    object_session(target).info["principals_stale"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _clear_stale_principals(session):
+    """
+    Drop cached principals and token versions once the role / department
+    change (and the token_version bump made in the flush) is visible to
+    other sessions
+    """
+    if session.info.pop("principals_stale", False):
+        principal_cache.clear()
+        token_version_cache.clear()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_stale_principals(session):
+    session.info.pop("principals_stale", None)
+
+
+# Cached role lists are dropped when a role write commits
+response_cache.track(Role, "roles")
+
+
 class UserService:
     def __init__(self, db: Session):
         self.db = db
     
-    def create_user(self, user_data: UserCreate, created_by: Optional[int] = None) -> User:
-        """Create a new user"""
-        password_hash = hash_password(user_data.password)
+    def create_user(self, user_data: UserCreate, created_by: Optional[int] = None,
+                    password_hash: Optional[str] = None) -> User:
+        """Create a new user (pass password_hash when already hashed off the event loop)"""
+        if password_hash is None:
+            password_hash = hash_password(user_data.password)
         
         db_user = User(
             name=user_data.name,
@@ -71,6 +122,16 @@ class UserService:
             )
         ).first()
     
+    def get_token_version(self, user_id: int) -> Optional[int]:
+        """Get the current token_version of an active user (None if inactive/missing)"""
+        return self.db.query(User.token_version).filter(
+            and_(
+                User.id == user_id,
+                User.is_active == True,
+                User.deleted_on.is_(None)
+            )
+        ).scalar()
+    
     def update_user(self, user_id: int, user_data: UserUpdate, updated_by: Optional[int] = None) -> Optional[User]:
         """Update user information"""
         db_user = self.get_user_by_id(user_id)
@@ -81,10 +142,16 @@ class UserService:
         for field, value in update_data.items():
             setattr(db_user, field, value)
         
+        if update_data:
+            # Every updatable field is embedded in self-contained tokens
+            db_user.token_version = (db_user.token_version or 0) + 1
+        
         if updated_by:
             db_user.updated_by = updated_by
         
         self.db.commit()
+        principal_cache.invalidate(user_id)
+        token_version_cache.invalidate(user_id)
         self.db.refresh(db_user)
         return db_user
     
@@ -96,17 +163,24 @@ class UserService:
         
         db_user.is_active = False
         db_user.deleted_on = datetime.utcnow()
+        db_user.token_version = (db_user.token_version or 0) + 1
         if deleted_by:
             db_user.deleted_by = deleted_by
         
         self.db.commit()
+        principal_cache.invalidate(user_id)
+        token_version_cache.invalidate(user_id)
         return True
     
     def get_users(self, skip: int = 0, limit: int = 100, search: str = None) -> List[User]:
         """Get all users with pagination and search"""
+        return self.get_users_page(skip, limit, search)[0]
+
+    def get_users_page(self, skip: int = 0, limit: int = 100, search: str = None,
+                       cursor: Optional[str] = None, include_total: str = TOTAL_NONE) -> Page:
+        """Get a page of users (offset or cursor) and the next cursor"""
         query = self.db.query(User).options(
-            joinedload(User.role),
-            joinedload(User.department)
+            *loader_options(USER_LIST)
         ).filter(
             and_(
                 User.is_active == True,
@@ -124,7 +198,10 @@ class UserService:
                 )
             )
         
-        return query.order_by(User.name).offset(skip).limit(limit).all()
+        return keyset_page(
+            query, User.name, User.id, "users:name", limit,
+            cursor=cursor, skip=skip, include_total=include_total
+        )
     
     def get_user_count(self, search: str = None) -> int:
         """Get total count of users"""
@@ -165,6 +242,13 @@ class UserService:
             db_user.failed_login_attempts = 0
             self.db.commit()
     
+    def update_password_hash(self, user_id: int, password_hash: str):
+        """Replace a user's password hash (rehash-on-login)"""
+        db_user = self.get_user_by_id(user_id)
+        if db_user:
+            db_user.password_hash = password_hash
+            self.db.commit()
+    
     def increment_failed_login(self, user_id: int):
         """Increment failed login attempts"""
         db_user = self.get_user_by_id(user_id)
@@ -0,0 +1,101 @@
+"""
+Shared fixtures: the app on a throwaway SQLite database with the seed data
+(admin user, sample companies / contacts) and local document storage in a
+temporary directory. Settings are read at import time, so the environment
+is set before anything from the app is imported.
+"""
+import os
+import tempfile
+
+_tmp = tempfile.mkdtemp(prefix="crm-tests-")
+os.environ["POSTGRES_URL"] = f"sqlite:///{os.path.join(_tmp, 'crm.db')}"
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:1/crm_logs?serverSelectionTimeoutMS=100")
+os.environ["STORAGE_BACKEND"] = "local"
+os.environ["STORAGE_LOCAL_ROOT"] = os.path.join(_tmp, "uploads")
+os.environ.setdefault("DATABASE_ASYNC", "false")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from ..main import app
+from ..dependencies.database import get_mongo_db
+
+
+@pytest.fixture(scope="session")
+def client():
+    app.dependency_overrides[get_mongo_db] = lambda: None
+    with TestClient(app) as test_client:
+        yield test_client
+    app.dependency_overrides.pop(get_mongo_db, None)
+
+
+@pytest.fixture(scope="session")
+def auth_headers(client):
+    response = client.post("/api/login", json={"email_or_username": "admin", "password": "admin123"})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['data']['token']}"}
+
+
+@pytest.fixture(scope="session")
+def list_data(client):
+    """
+    20 leads and 20 opportunities under one company, each row pointing at
+    different users / contacts / leads, so a relationship that isn't
+    batch-loaded costs one query per row. The first lead has 5
+    opportunities (the ?lead_id= page). Returns the company, first lead and
+    first (decision maker) contact ids.
+    """
+    from ..database.engine import get_sessionmaker
+    from ..models import Company, Contact, RoleType, User
+    from ..services.lead_service import LeadService
+    from ..services.opportunity_service import OpportunityService
+
+    db = get_sessionmaker()()
+    try:
+        company = Company(name="Query Budget Co")
+        db.add(company)
+        db.flush()
+        users = [
+            User(name=f"Budget User {i}", username=f"budget{i}", email=f"budget{i}@example.com", password_hash="-")
+            for i in range(60)
+        ]
+        contacts = [
+            Contact(
+                full_name=f"Budget Contact {i}", email=f"budget.contact{i}@example.com",
+                company_id=company.id, role_type=RoleType.DECISION_MAKER,
+            )
+            for i in range(20)
+        ]
+        db.add_all(users + contacts)
+        db.commit()
+
+        leads = []
+        for i in range(20):
+            lead = LeadService(db).create_lead({
+                "project_title": f"Budget lead {i}",
+                "lead_source": "Referral",
+                "lead_sub_type": "Pre-Tender",
+                "tender_sub_type": "GeM Tender",
+                "company_id": company.id,
+                "end_customer_id": company.id,
+                "expected_revenue": 1000,
+                "contacts": [],
+            }, users[i].id)
+            lead.conversion_requested_by = users[20 + i].id
+            lead.reviewed_by = users[40 + i].id
+            leads.append(lead)
+        db.commit()
+
+        for i in range(20):
+            opportunity = OpportunityService(db).create_opportunity({
+                "name": f"Budget opportunity {i}",
+                "company_id": company.id,
+                "contact_id": contacts[i].id,
+                "lead_id": leads[0 if i < 5 else i].id,
+            }, users[i].id)
+            opportunity.qualification_completed_by = users[20 + i].id
+            opportunity.delivery_team_assigned = users[40 + i].id
+        db.commit()
+        return {"company_id": company.id, "lead_id": leads[0].id, "contact_id": contacts[0].id}
+    finally:
+        db.close()
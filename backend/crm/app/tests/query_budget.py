@@ -0,0 +1,88 @@
+"""
+Query-count assertions for endpoints and service calls
+
+Wrap a request (or any block) to fail when it issues more SQL statements
+than its budget, so an N+1 lazy load sneaking back into a serializer
+shows up as a failing test rather than a slow page:
+
+    with assert_max_queries(5):
+        client.get("/api/opportunities/?limit=500", headers=headers)
+
+    # every entry in ENDPOINT_QUERY_BUDGETS, {placeholders} filled from url_params
+    check_endpoint_budgets(client, headers, company_id=1, lead_id=1)
+
+Statements are counted on every Engine (including the sync side of the
+async engine), so the count covers authentication as well as the
+endpoint itself.
+"""
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Maximum statements per request with a cold principal cache: user lookup for
+# authentication, the ETag version query (lead / opportunity lists), the
+# page query (rows + window total) and one query per SELECTIN relationship
+# in the endpoint's loader profile. Only meaningful on pages whose rows
+# reference many distinct related rows.
+ENDPOINT_QUERY_BUDGETS: Dict[str, int] = {
+    "/api/opportunities/?limit=500": 6,
+    "/api/opportunities/?company_id={company_id}&limit=500": 6,
+    "/api/opportunities/?lead_id={lead_id}&limit=500": 6,
+    "/api/leads/?limit=500": 6,
+    "/api/contacts/?limit=500": 2,
+    "/api/users/?limit=500": 2,
+}
+
+
+class QueryCounter:
+    """Collects the SQL statements executed while active"""
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def report(self) -> str:
+        return "\n".join(f"{i + 1}. {statement}" for i, statement in enumerate(self.statements))
+
+
+@contextmanager
+def count_queries():
+    """Count statements executed inside the block"""
+    counter = QueryCounter()
+    event.listen(Engine, "before_cursor_execute", counter._before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(Engine, "before_cursor_execute", counter._before_cursor_execute)
+
+
+@contextmanager
+def assert_max_queries(limit: int, label: Optional[str] = None):
+    """Fail if the block executes more than ``limit`` statements"""
+    with count_queries() as counter:
+        yield counter
+    if counter.count > limit:
+        raise AssertionError(
+            f"{label or 'block'} executed {counter.count} queries (budget {limit}):\n"
+            f"{counter.report()}"
+        )
+
+
+def check_endpoint_budgets(client, headers: Dict[str, str], budgets: Dict[str, int] = None, **url_params):
+    """GET each endpoint with ``client`` and assert it stays within its budget"""
+    from ..utils.principal_cache import principal_cache
+
+    for url, limit in (budgets or ENDPOINT_QUERY_BUDGETS).items():
+        url = url.format(**url_params)
+        principal_cache.clear()
+        with assert_max_queries(limit, label=f"GET {url}"):
+            response = client.get(url, headers=headers)
+        assert response.status_code == 200, f"GET {url} returned {response.status_code}"
@@ -0,0 +1,66 @@
+"""
+Lead document uploads are recorded on the lead
+"""
+from ..database.engine import get_sessionmaker
+from ..models import Contact, Lead
+from ..services.lead_service import LeadService
+from ..utils.storage import storage
+
+
+def _create_lead() -> int:
+    db = get_sessionmaker()()
+    try:
+        contact = db.query(Contact).first()
+        lead = LeadService(db).create_lead({
+            "project_title": "Document test lead",
+            "lead_source": "Referral",
+            "lead_sub_type": "Pre-Tender",
+            "tender_sub_type": "GeM Tender",
+            "company_id": contact.company_id,
+            "end_customer_id": contact.company_id,
+            "expected_revenue": 1000,
+            "contacts": [{"first_name": "A", "last_name": "B", "email": "a@example.com", "primary_phone": "9"}],
+        })
+        return lead.id
+    finally:
+        db.close()
+
+
+def _stored_documents(lead_id: int) -> list:
+    db = get_sessionmaker()()
+    try:
+        return db.get(Lead, lead_id).documents or []
+    finally:
+        db.close()
+
+
+def test_every_upload_is_recorded(client, auth_headers):
+    lead_id = _create_lead()
+    paths = []
+    for name, body in (("first.pdf", b"first"), ("second.pdf", b"second document")):
+        response = client.post(
+            f"/api/leads/{lead_id}/upload?document_type=rfp",
+            headers=auth_headers,
+            files={"file": (name, body, "application/pdf")},
+        )
+        assert response.status_code == 200, response.text
+        paths.append(response.json()["data"]["file_path"])
+
+    documents = _stored_documents(lead_id)
+    assert [document["file_path"] for document in documents] == paths
+    assert [document["file_name"] for document in documents] == ["first.pdf", "second.pdf"]
+    assert client.get(paths[1], headers=auth_headers).content == b"second document"
+
+
+def test_document_names_cannot_leave_the_lead(client, auth_headers):
+    lead_id = _create_lead()
+    response = client.post(
+        f"/api/leads/{lead_id}/upload?document_type=rfp",
+        headers=auth_headers,
+        files={"file": ("doc.pdf", b"doc", "application/pdf")},
+    )
+    assert response.status_code == 200, response.text
+    for name in ("%2E%2E", "%2E", ".hidden", "..%5C..%5Cconfig.py"):
+        assert client.get(f"/api/leads/{lead_id}/documents/{name}", headers=auth_headers).status_code == 404
+    # A key naming a directory isn't an object
+    assert storage.backend.info(f"leads/{lead_id}") is None
@@ -0,0 +1,72 @@
+"""
+LogWriter writes every queued entry on shutdown
+"""
+import asyncio
+import threading
+import time
+
+from ..utils.logger import LogWriter
+
+
+class SlowCollection:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.documents = []
+        self._lock = threading.Lock()
+
+    def insert_many(self, documents, ordered=True):
+        time.sleep(self.delay)
+        with self._lock:
+            self.documents.extend(documents)
+
+    def insert_one(self, document):
+        self.insert_many([document])
+
+
+class FakeDatabase(dict):
+    def __missing__(self, name):
+        self[name] = SlowCollection(0.05)
+        return self[name]
+
+
+async def _fill(writer: LogWriter, db: FakeDatabase, count: int):
+    for i in range(count):
+        for collection in ("request_logs", "activity_logs", "error_logs"):
+            await writer.enqueue(db, collection, {"i": i})
+
+
+def test_stop_flushes_the_batch_in_flight_and_the_queue():
+    async def scenario():
+        db = FakeDatabase()
+        writer = LogWriter(batch_size=50, flush_interval=0.01)
+        await writer.start()
+        await _fill(writer, db, 40)
+        # Let the first batch reach insert_many, then stop mid-flush
+        await asyncio.sleep(0.06)
+        await writer.stop()
+        await writer.enqueue(db, "request_logs", {"i": "after stop"})
+        return db, writer
+
+    db, writer = asyncio.run(scenario())
+    assert [len(db[name].documents) for name in ("request_logs", "activity_logs", "error_logs")] == [41, 40, 40]
+    assert writer.written == 120 and writer.failed == 0
+
+
+def test_cancelled_flush_requeues_unstarted_groups():
+    async def scenario():
+        db = FakeDatabase()
+        writer = LogWriter(batch_size=500, flush_interval=0.01)
+        await writer.start()
+        await _fill(writer, db, 10)
+        await asyncio.sleep(0.03)
+        writer._task.cancel()
+        try:
+            await writer._task
+        except asyncio.CancelledError:
+            pass
+        # The insert interrupted by the cancel still completes in its thread
+        await asyncio.sleep(0.1)
+        return db
+
+    db = asyncio.run(scenario())
+    assert sorted(len(db[name].documents) for name in ("request_logs", "activity_logs", "error_logs")) == [10, 10, 10]
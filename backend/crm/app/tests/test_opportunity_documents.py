@@ -0,0 +1,56 @@
+"""
+Opportunity document uploads are recorded on the opportunity
+"""
+import os
+
+from ..config import settings
+from ..database.engine import get_sessionmaker
+from ..models import Contact, Opportunity
+from ..services.opportunity_service import OpportunityService
+
+
+def _create_opportunity() -> int:
+    db = get_sessionmaker()()
+    try:
+        contact = db.query(Contact).first()
+        opportunity = OpportunityService(db).create_opportunity({
+            "name": "Document test opportunity",
+            "company_id": contact.company_id,
+            "contact_id": contact.id,
+        })
+        return opportunity.id
+    finally:
+        db.close()
+
+
+def _stored_objects(opportunity_id: int) -> list:
+    directory = os.path.join(settings.STORAGE_LOCAL_ROOT, "opportunities", str(opportunity_id))
+    return os.listdir(directory) if os.path.isdir(directory) else []
+
+
+def test_known_document_type_is_recorded(client, auth_headers):
+    opportunity_id = _create_opportunity()
+    response = client.post(
+        f"/api/opportunities/{opportunity_id}/upload?document_type=quotation",
+        headers=auth_headers,
+        files={"file": ("quote.txt", b"quote", "text/plain")},
+    )
+    assert response.status_code == 200, response.text
+    db = get_sessionmaker()()
+    try:
+        stored = db.get(Opportunity, opportunity_id).quotation_file_path
+    finally:
+        db.close()
+    assert stored == response.json()["data"]["file_path"]
+    assert client.get(stored, headers=auth_headers).content == b"quote"
+
+
+def test_unknown_document_type_is_rejected_before_storing(client, auth_headers):
+    opportunity_id = _create_opportunity()
+    response = client.post(
+        f"/api/opportunities/{opportunity_id}/upload?document_type=brochure",
+        headers=auth_headers,
+        files={"file": ("brochure.pdf", b"brochure", "application/pdf")},
+    )
+    assert response.status_code == 400
+    assert _stored_objects(opportunity_id) == []
@@ -0,0 +1,64 @@
+"""
+Opportunities created in parallel by several workers get distinct,
+sequential (non-legacy) POT IDs
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from ..database.engine import get_sessionmaker
+from ..services import id_allocator
+from ..services.id_allocator import BlockIdAllocator, POT_ID_PREFIX, POT_ID_SEQUENCE, POT_ID_START
+from ..services.opportunity_service import OpportunityService
+
+WORKERS = 2
+THREADS_PER_WORKER = 4
+PER_THREAD = 50
+
+
+class _WorkerAllocators:
+    """Stands in for pot_id_allocator: each thread allocates through its worker's own instance"""
+
+    def __init__(self, count: int, block_size: int):
+        self.allocators = [BlockIdAllocator(POT_ID_SEQUENCE, POT_ID_START, block_size) for _ in range(count)]
+        self.current = threading.local()
+
+    def allocate(self, bind) -> int:
+        return self.allocators[self.current.worker].allocate(bind)
+
+
+def _create_many(workers, worker, data):
+    workers.current.worker = worker
+    db = get_sessionmaker()()
+    try:
+        service = OpportunityService(db)
+        return [
+            service.create_opportunity({
+                "name": f"POT allocation {worker} {threading.get_ident()} {i}",
+                "company_id": data["company_id"],
+                "contact_id": data["contact_id"],
+            }).pot_id
+            for i in range(PER_THREAD)
+        ]
+    finally:
+        db.close()
+
+
+def test_parallel_creates_get_unique_sequential_pot_ids(client, list_data, monkeypatch):
+    # Small blocks, so the workers keep reserving new ones while the others do too
+    workers = _WorkerAllocators(WORKERS, block_size=7)
+    monkeypatch.setattr(id_allocator, "pot_id_allocator", workers)
+
+    with ThreadPoolExecutor(max_workers=WORKERS * THREADS_PER_WORKER) as pool:
+        futures = [
+            pool.submit(_create_many, workers, worker, list_data)
+            for worker in range(WORKERS)
+            for _ in range(THREADS_PER_WORKER)
+        ]
+        pot_ids = [pot_id for future in futures for pot_id in future.result()]
+
+    assert len(pot_ids) == WORKERS * THREADS_PER_WORKER * PER_THREAD
+    assert len(set(pot_ids)) == len(pot_ids)
+    numbers = [int(pot_id[len(POT_ID_PREFIX):]) for pot_id in pot_ids]
+    assert all(pot_id.startswith(POT_ID_PREFIX) for pot_id in pot_ids)
+    assert not [number for number in numbers if 1000 <= number <= 9999]
+    assert min(numbers) >= POT_ID_START
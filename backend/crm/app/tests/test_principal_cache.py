@@ -0,0 +1,47 @@
+"""
+Role / department edits drop cached principals only once they commit
+"""
+from ..database.engine import get_sessionmaker
+from ..models import Role
+from ..utils.principal_cache import principal_cache, token_version_cache
+
+SENTINEL_USER = -1
+
+
+def _edit_role(finish: str):
+    db = get_sessionmaker()()
+    try:
+        role = db.query(Role).first()
+        role.description = f"{role.description or ''} "
+        db.flush()
+        # A concurrent request may still refill the cache from the old,
+        # committed row here, so nothing may be cleared yet
+        assert principal_cache.get(SENTINEL_USER) is not None
+        assert token_version_cache.get(SENTINEL_USER) is not None
+        getattr(db, finish)()
+    finally:
+        db.close()
+
+
+def test_role_edit_clears_principals_after_commit(client):
+    principal_cache.set(SENTINEL_USER, {"id": SENTINEL_USER})
+    token_version_cache.set(SENTINEL_USER, {"token_version": 0})
+    _edit_role("commit")
+    assert principal_cache.get(SENTINEL_USER) is None
+    assert token_version_cache.get(SENTINEL_USER) is None
+
+
+def test_rolled_back_role_edit_keeps_principals(client):
+    principal_cache.set(SENTINEL_USER, {"id": SENTINEL_USER})
+    token_version_cache.set(SENTINEL_USER, {"token_version": 0})
+    _edit_role("rollback")
+    assert principal_cache.get(SENTINEL_USER) is not None
+    # The rolled back flag mustn't leak into the session's next commit
+    db = get_sessionmaker()()
+    try:
+        db.commit()
+    finally:
+        db.close()
+    assert principal_cache.get(SENTINEL_USER) is not None
+    principal_cache.invalidate(SENTINEL_USER)
+    token_version_cache.invalidate(SENTINEL_USER)
@@ -0,0 +1,12 @@
+"""
+List endpoints stay within their ENDPOINT_QUERY_BUDGETS
+"""
+from .query_budget import ENDPOINT_QUERY_BUDGETS, check_endpoint_budgets
+
+
+def test_list_endpoint_query_budgets(client, auth_headers, list_data):
+    # The budgets only catch N+1 loads on pages with many related rows
+    for url in ENDPOINT_QUERY_BUDGETS:
+        data = client.get(url.format(**list_data), headers=auth_headers).json()["data"]
+        assert data["total"] >= 5, url
+    check_endpoint_budgets(client, auth_headers, **list_data)
@@ -0,0 +1,61 @@
+"""
+Resumable upload sessions attach their document on completion
+"""
+from ..database.engine import get_sessionmaker
+from ..models import Lead
+from .test_lead_documents import _create_lead
+from .test_opportunity_documents import _create_opportunity
+
+
+def _upload(client, headers, url: str, name: str, body: bytes, document_type: str = "rfp"):
+    response = client.post(
+        url, headers=headers,
+        json={"file_name": name, "total_size": len(body), "document_type": document_type},
+    )
+    assert response.status_code == 200, response.text
+    session = response.json()["data"]
+    part_size = session["part_size"]
+    # Parts out of order
+    for number in range(session["part_count"], 0, -1):
+        part = body[(number - 1) * part_size: number * part_size]
+        response = client.put(
+            f"/api/uploads/{session['session_id']}/parts/{number}", headers=headers, content=part
+        )
+        assert response.status_code == 200, response.text
+    response = client.post(f"/api/uploads/{session['session_id']}/complete", headers=headers)
+    assert response.status_code == 200, response.text
+    return session["session_id"], response.json()["data"]
+
+
+def test_completed_sessions_are_recorded_on_the_lead(client, auth_headers):
+    lead_id = _create_lead()
+    url = f"/api/leads/{lead_id}/upload-sessions"
+    completed = [
+        _upload(client, auth_headers, url, "first.pdf", b"a" * 1000),
+        _upload(client, auth_headers, url, "second.pdf", b"b" * 2000),
+    ]
+
+    db = get_sessionmaker()()
+    try:
+        documents = db.get(Lead, lead_id).documents
+    finally:
+        db.close()
+    assert [document["file_path"] for document in documents] == [data["file_path"] for _, data in completed]
+    for session_id, data in completed:
+        status = client.get(f"/api/uploads/{session_id}", headers=auth_headers).json()["data"]
+        assert status["status"] == "completed"
+        assert len(client.get(data["file_path"], headers=auth_headers).content) == data["size"]
+
+
+def test_unrecordable_opportunity_document_type_is_rejected(client, auth_headers):
+    opportunity_id = _create_opportunity()
+    response = client.post(
+        f"/api/opportunities/{opportunity_id}/upload-sessions",
+        headers=auth_headers,
+        json={"file_name": "brochure.pdf", "total_size": 10, "document_type": "brochure"},
+    )
+    assert response.status_code == 400
+    _upload(
+        client, auth_headers, f"/api/opportunities/{opportunity_id}/upload-sessions",
+        "quote.pdf", b"q" * 10, document_type="quotation",
+    )
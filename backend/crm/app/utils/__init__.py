@@ -1,7 +1,10 @@
 """
 Utility functions for CRM application
 """
-from .auth import hash_password, verify_password, create_access_token, verify_token
-from .logger import log_activity
+from .auth import (
+    hash_password, verify_password, hash_password_async, verify_password_async,
+    create_access_token, verify_token
+)
+from .logger import log_activity, log_writer
 
-__all__ = ["hash_password", "verify_password", "create_access_token", "verify_token", "log_activity"]
\ No newline at end of file
+__all__ = ["hash_password", "verify_password", "hash_password_async", "verify_password_async", "create_access_token", "verify_token", "log_activity", "log_writer"]
\ No newline at end of file
@@ -1,14 +1,29 @@
 """
 Authentication utilities
 """
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
 from datetime import datetime, timedelta
+from typing import Optional, Tuple
 from passlib.context import CryptContext
 from jose import jwt, JWTError
 from fastapi import HTTPException
 from ..config import settings
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing context. min/max rounds pin the cost so hashes made with a
+# different BCRYPT_ROUNDS are reported by needs_update and rehashed on login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+
+# Dedicated pool for bcrypt work; the semaphore caps in-flight jobs so a login
+# storm queues here (with a timeout) instead of piling onto the pool.
+_password_executor: Optional[Executor] = None
+_password_slots = asyncio.Semaphore(settings.PASSWORD_HASH_MAX_CONCURRENCY)
 
 def hash_password(password: str) -> str:
     """Hash a password"""
@@ -18,6 +33,56 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password and return a new hash if the stored one uses an outdated cost"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+def get_password_executor() -> Executor:
+    """Lazily create the password hashing pool (thread or process)"""
+    global _password_executor
+    if _password_executor is None:
+        if settings.PASSWORD_HASH_EXECUTOR == "process":
+            _password_executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+        else:
+            _password_executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+            )
+    return _password_executor
+
+def shutdown_password_executor():
+    """Shut the password hashing pool down (app shutdown)"""
+    global _password_executor
+    if _password_executor is not None:
+        _password_executor.shutdown(wait=False, cancel_futures=True)
+        _password_executor = None
+
+async def _run_password_job(func, *args):
+    try:
+        await asyncio.wait_for(
+            _password_slots.acquire(), settings.PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=503, detail="Authentication service busy, please retry"
+        )
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_password_executor(), func, *args)
+    finally:
+        _password_slots.release()
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the password hashing pool"""
+    return await _run_password_job(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the password hashing pool"""
+    return await _run_password_job(verify_password, plain_password, hashed_password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """verify_and_update_password on the password hashing pool"""
+    return await _run_password_job(verify_and_update_password, plain_password, hashed_password)
+
 def create_access_token(data: dict) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -26,6 +91,17 @@ def create_access_token(data: dict) -> str:
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
     return encoded_jwt
 
+def build_embedded_claims(user) -> dict:
+    """Principal claims for self-contained tokens (JWT_EMBED_CLAIMS)"""
+    permissions = user.role.permissions if user.role and user.role.permissions else []
+    return {
+        "name": user.name,
+        "role": user.role.name if user.role else None,
+        "perms": sorted(set(permissions)),
+        "dept": user.department.name if user.department else None,
+        "ver": user.token_version or 0,
+    }
+
 def verify_token(token: str) -> dict:
     """Verify and decode a JWT token"""
     try:
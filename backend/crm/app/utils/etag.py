@@ -0,0 +1,51 @@
+"""
+Weak ETags and If-None-Match handling for conditional GETs
+
+Detail responses are versioned by (id, updated_on) and list responses by
+(max updated_on, row count) of the filtered rows plus a hash of the
+request's query parameters, so a client polling an unchanged resource
+costs one indexed metadata query and an empty 304.
+
+The tags are weak: they follow the entity rows themselves, not embedded
+related data (e.g. a company rename doesn't change a lead's ETag).
+"""
+import hashlib
+from typing import Any, Optional, Tuple
+
+import orjson
+from fastapi.responses import Response
+from sqlalchemy import func
+
+
+def weak_etag(*parts: Any) -> str:
+    """W/"<hash>" over ``parts`` (datetimes, numbers, strings, dicts)"""
+    digest = hashlib.blake2b(
+        orjson.dumps(parts, option=orjson.OPT_SORT_KEYS, default=str), digest_size=12
+    ).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of ``etag`` against an If-None-Match header value"""
+    if not if_none_match:
+        return False
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+def query_version(query, updated_column, id_column) -> Tuple[Any, int]:
+    """(max updated_on, count) of the rows an ORM ``query`` selects"""
+    latest, count = query.with_entities(func.max(updated_column), func.count(id_column)).one()
+    return latest, count
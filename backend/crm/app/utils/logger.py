@@ -1,9 +1,237 @@
 """
 Logging utilities
+
+Log entries are queued in memory and written to MongoDB in batches by a
+background task (see LogWriter), so request handlers never wait on a
+Mongo round trip.
 """
+import asyncio
+import json
+import time
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from fastapi import Request
+from ..config import settings
+
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_BLOCK = "block"
+OVERFLOW_SPILL = "spill"
+
+# Queued by stop(): everything ahead of it is flushed, then the task exits
+_STOP = object()
+
+
+class LogWriter:
+    """
+    Bounded queue of pending log documents drained by a background task.
+
+    A batch is flushed with insert_many when it reaches ``batch_size`` or
+    ``flush_interval`` seconds after its first entry, whichever comes first.
+    When the queue is full the overflow policy decides what happens:
+        drop_oldest - discard the oldest queued entry
+        block       - wait for room in the queue
+        spill       - append the entry to a local NDJSON file
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        overflow_policy: str = OVERFLOW_DROP_OLDEST,
+        spill_path: str = "log_spill.ndjson",
+    ):
+        if overflow_policy not in (OVERFLOW_DROP_OLDEST, OVERFLOW_BLOCK, OVERFLOW_SPILL):
+            raise ValueError(f"Unknown log overflow policy: {overflow_policy}")
+
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.spill_path = spill_path
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._pending: List[tuple] = []
+        self._stopping = False
+
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.failed = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        """Start the background flusher (called from the app lifespan)"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+        print("✅ Log writer started")
+
+    async def stop(self):
+        """Flush everything still queued and stop the background task"""
+        if not self.running:
+            return
+        # Let the task drain the queue and finish its last insert rather
+        # than cancelling it mid-flush; entries logged from now on are
+        # written directly
+        self._stopping = True
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+        print("📴 Log writer stopped")
+
+    async def enqueue(self, mongo_db, collection: str, document: Dict[str, Any]):
+        """Queue a document for ``mongo_db[collection]``"""
+        if not self.running or self._stopping:
+            # No background task (e.g. standalone scripts, shutdown): write directly, off the event loop
+            await asyncio.to_thread(mongo_db[collection].insert_one, document)
+            return
+
+        item = (mongo_db, collection, document)
+        self.enqueued += 1
+
+        if not self._queue.full():
+            self._queue.put_nowait(item)
+        elif self.overflow_policy == OVERFLOW_BLOCK:
+            await self._queue.put(item)
+        elif self.overflow_policy == OVERFLOW_SPILL:
+            self._spill([item])
+        else:
+            self._queue.get_nowait()
+            self.dropped += 1
+            self._queue.put_nowait(item)
+
+    async def _run(self):
+        try:
+            stop = False
+            while not stop:
+                stop = await self._collect()
+                await self._flush()
+        except asyncio.CancelledError:
+            while not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is not _STOP:
+                    self._pending.append(item)
+            await self._flush()
+            raise
+
+    async def _collect(self) -> bool:
+        """
+        Fill self._pending until batch_size or flush_interval is reached;
+        True once the stop marker was taken off the queue
+        """
+        item = await self._queue.get()
+        if item is _STOP:
+            return True
+        self._pending.append(item)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+
+        while len(self._pending) < self.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            if item is _STOP:
+                return True
+            self._pending.append(item)
+        return False
+
+    async def _flush(self):
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        groups: Dict[tuple, tuple] = {}
+        for mongo_db, collection, document in batch:
+            key = (id(mongo_db), collection)
+            if key not in groups:
+                groups[key] = (mongo_db, collection, [])
+            groups[key][2].append(document)
+
+        start = time.perf_counter()
+        remaining = list(groups.values())
+        while remaining:
+            mongo_db, collection, documents = remaining.pop(0)
+            try:
+                await asyncio.to_thread(mongo_db[collection].insert_many, documents, ordered=False)
+                self.written += len(documents)
+            except asyncio.CancelledError:
+                # The interrupted insert still finishes in its thread; put
+                # the groups not started yet back so the final flush writes them
+                self._pending.extend(
+                    (mongo_db, collection, document)
+                    for mongo_db, collection, documents in remaining for document in documents
+                )
+                raise
+            except Exception as e:
+                self.failed += len(documents)
+                print(f"Failed to write {len(documents)} log entries: {e}")
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.flushes += 1
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self._total_flush_ms += elapsed_ms
+
+    def _spill(self, items: List[tuple]):
+        try:
+            with open(self.spill_path, "a", encoding="utf-8") as spill_file:
+                for _, collection, document in items:
+                    spill_file.write(
+                        json.dumps({"collection": collection, "document": document}, default=str)
+                        + "\n"
+                    )
+            self.spilled += len(items)
+        except Exception as e:
+            self.dropped += len(items)
+            print(f"Failed to spill log entries: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and flush latency for monitoring"""
+        return {
+            "running": self.running,
+            "overflow_policy": self.overflow_policy,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "queue_max_size": self.max_size,
+            "pending_batch": len(self._pending),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "spilled": self.spilled,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "max_flush_ms": round(self.max_flush_ms, 3),
+            "avg_flush_ms": round(self._total_flush_ms / self.flushes, 3) if self.flushes else 0.0,
+        }
+
+
+log_writer = LogWriter(
+    max_size=settings.LOG_QUEUE_MAX_SIZE,
+    batch_size=settings.LOG_BATCH_SIZE,
+    flush_interval=settings.LOG_FLUSH_INTERVAL_SECONDS,
+    overflow_policy=settings.LOG_OVERFLOW_POLICY,
+    spill_path=settings.LOG_SPILL_PATH,
+)
+
 
 async def log_activity(mongo_db, user_id: int, action: str, details: Optional[Dict[str, Any]] = None, request: Optional[Request] = None):
     """Log user activity to MongoDB"""
@@ -17,11 +245,11 @@ async def log_activity(mongo_db, user_id: int, action: str, details: Optional[Di
                 "ip_address": request.client.host if request else None,
                 "user_agent": request.headers.get("user-agent") if request else None
             }
-            mongo_db.activity_logs.insert_one(log_entry)
+            await log_writer.enqueue(mongo_db, "activity_logs", log_entry)
     except Exception as e:
         print(f"Failed to log activity: {e}")
 
-async def log_request(mongo_db, method: str, url: str, status_code: int, 
+async def log_request(mongo_db, method: str, url: str, status_code: int,
                      process_time: float, ip_address: str, user_agent: str):
     """Log HTTP request to MongoDB"""
     try:
@@ -35,7 +263,7 @@ async def log_request(mongo_db, method: str, url: str, status_code: int,
                 "ip_address": ip_address,
                 "user_agent": user_agent
             }
-            mongo_db.request_logs.insert_one(log_entry)
+            await log_writer.enqueue(mongo_db, "request_logs", log_entry)
     except Exception as e:
         print(f"Failed to log request: {e}")
 
@@ -43,7 +271,7 @@ async def log_error(mongo_db, error_id: int, url: str, method: str, error_detail
     """Log error to MongoDB"""
     try:
         if mongo_db is not None:
-            mongo_db.error_logs.insert_one({
+            await log_writer.enqueue(mongo_db, "error_logs", {
                 "error_id": error_id,
                 "url": url,
                 "method": method,
@@ -51,4 +279,4 @@ async def log_error(mongo_db, error_id: int, url: str, method: str, error_detail
                 "timestamp": datetime.utcnow()
             })
     except Exception as e:
-        print(f"Failed to log error: {e}")
\ No newline at end of file
+        print(f"Failed to log error: {e}")
@@ -0,0 +1,208 @@
+"""
+Keyset (cursor) pagination helpers
+
+A cursor is an opaque, URL-safe token holding the sort key name plus the
+(sort value, id) of the last row on a page. The next page seeks past that
+row with a (sort key, id) predicate instead of OFFSET, so deep pages cost
+the same as the first one and rows don't shift when records are updated.
+"""
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import func, tuple_
+
+# include_total modes for list endpoints
+TOTAL_NONE = "false"
+TOTAL_EXACT = "exact"
+TOTAL_ESTIMATE = "estimate"
+TOTAL_MODES = (TOTAL_NONE, TOTAL_EXACT, TOTAL_ESTIMATE)
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a cursor cannot be decoded or belongs to another ordering"""
+
+
+class Page(NamedTuple):
+    """One page of a list: rows, cursor for the next page, optional total"""
+    items: List[Any]
+    next_cursor: Optional[str]
+    total: Optional[int] = None
+
+
+def encode_cursor(key: str, sort_value: Any, row_id: int) -> str:
+    """Build an opaque cursor for the row (sort_value, row_id)"""
+    if isinstance(sort_value, (datetime, date)):
+        sort_value = sort_value.isoformat()
+    payload = json.dumps({"k": key, "v": [sort_value, row_id]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, key: str, sort_column) -> Tuple[Any, int]:
+    """Return (sort_value, id) from a cursor produced for ``key``"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        sort_value, row_id = payload["v"]
+        cursor_key = payload["k"]
+    except Exception:
+        raise InvalidCursorError("Invalid cursor")
+
+    if cursor_key != key:
+        raise InvalidCursorError("Cursor does not match this listing's sort order")
+
+    if sort_value is not None and sort_column is not None and _python_type(sort_column) is datetime:
+        try:
+            sort_value = datetime.fromisoformat(sort_value)
+        except (TypeError, ValueError):
+            raise InvalidCursorError("Invalid cursor")
+    return sort_value, int(row_id)
+
+
+def _python_type(column):
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        return None
+
+
+def estimate_count(query, id_column) -> int:
+    """
+    Planner row estimate for ``query`` (PostgreSQL EXPLAIN); other
+    databases have no cheap estimate, so they fall back to an exact count
+    """
+    session = query.session
+    bind = session.get_bind()
+    count_query = query.with_entities(id_column).order_by(None)
+    if bind.dialect.name != "postgresql":
+        return count_query.count()
+
+    compiled = count_query.statement.compile(dialect=bind.dialect)
+    plan = session.connection().exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def keyset_page(
+    query,
+    sort_column,
+    id_column,
+    key: str,
+    limit: Optional[int],
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    descending: bool = False,
+    include_total: str = TOTAL_NONE,
+) -> Page:
+    """
+    Fetch one page ordered by (sort_column, id_column).
+
+    With a cursor the page starts after the cursor row (``skip`` is
+    ignored); without one it falls back to OFFSET ``skip``. One extra row
+    is fetched to decide whether there is a next page; ``next_cursor`` is
+    None on the last page, and ``limit=None`` returns every remaining row.
+    ``sort_column`` must be NOT NULL (or always populated), otherwise NULL
+    rows are skipped by the seek predicate.
+
+    ``include_total``:
+        false    - no total (None)
+        exact    - COUNT(*) OVER () in the same query as the page; cursor
+                   pages (and offsets past the end) need a separate count
+        estimate - planner estimate, see estimate_count
+    """
+    if include_total not in TOTAL_MODES:
+        raise ValueError(f"include_total must be one of {', '.join(TOTAL_MODES)}")
+
+    def ordered(q):
+        if descending:
+            return q.order_by(sort_column.desc(), id_column.desc())
+        return q.order_by(sort_column.asc(), id_column.asc())
+
+    filtered = query
+    query = ordered(query)
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor, key, sort_column)
+        # Row-value comparison so the (sort key, id) index serves a single range scan
+        row, last_row = tuple_(sort_column, id_column), tuple_(sort_value, last_id)
+        query = query.filter(row < last_row if descending else row > last_row)
+    elif skip:
+        query = query.offset(skip)
+
+    window_total = include_total == TOTAL_EXACT and not cursor
+    if window_total:
+        # Count and pick the page's ids on the base rows only, then eager-load
+        # just those rows: still one round trip, but the window doesn't have
+        # to run over every joined row
+        page_ids = query.with_entities(id_column, func.count().over().label("total_count"))
+        if limit is not None:
+            page_ids = page_ids.limit(limit + 1)
+        page_ids = page_ids.subquery()
+        query = ordered(filtered.join(page_ids, id_column == page_ids.c.id))
+        query = query.add_columns(page_ids.c.total_count)
+    elif limit is not None:
+        query = query.limit(limit + 1)
+    rows = query.all()
+
+    total = None
+    if window_total:
+        total = rows[0].total_count if rows else 0
+        rows = [row[0] for row in rows]
+        if not rows and skip:
+            total = filtered.order_by(None).count()
+    elif include_total == TOTAL_EXACT:
+        total = filtered.order_by(None).count()
+    elif include_total == TOTAL_ESTIMATE:
+        total = estimate_count(filtered, id_column)
+
+    if limit is None or len(rows) <= limit:
+        return Page(rows, None, total)
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return Page(rows, encode_cursor(key, getattr(last, sort_column.key), last.id), total)
+
+
+def ranked_page(
+    query,
+    rank_column,
+    id_column,
+    key: str,
+    limit: Optional[int],
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    include_total: str = TOTAL_NONE,
+) -> Page:
+    """
+    Fetch one page ordered by relevance (``rank_column`` descending, then id).
+
+    Relevance depends on the search term, so there is no stable row value
+    to seek from: the cursor carries the next offset instead (search result
+    sets are small and filtered by the search index).
+    """
+    if include_total not in TOTAL_MODES:
+        raise ValueError(f"include_total must be one of {', '.join(TOTAL_MODES)}")
+
+    offset = skip
+    if cursor:
+        offset, _ = decode_cursor(cursor, key, None)
+        if not isinstance(offset, int) or offset < 0:
+            raise InvalidCursorError("Invalid cursor")
+
+    page = query.order_by(rank_column.desc(), id_column.asc()).offset(offset)
+    if limit is not None:
+        page = page.limit(limit + 1)
+    rows = page.all()
+
+    total = None
+    if include_total == TOTAL_EXACT:
+        total = query.order_by(None).count()
+    elif include_total == TOTAL_ESTIMATE:
+        total = estimate_count(query, id_column)
+
+    if limit is None or len(rows) <= limit:
+        return Page(rows, None, total)
+    return Page(rows[:limit], encode_cursor(key, offset + limit, 0), total)
@@ -0,0 +1,88 @@
+"""
+Permission compiler for RBAC checks
+
+Role permissions are stored as a JSON list such as
+["leads:read", "opportunities:all"] or ["all"]. They are compiled once per
+distinct list into a CompiledPermissions object so route checks are set
+operations instead of list scans.
+
+Wildcards:
+    "all" / "*"      -> every permission
+    "<resource>:all" -> every action on <resource>
+"""
+import json
+from functools import lru_cache
+from typing import Iterable, FrozenSet, Optional, Tuple
+
+SUPERUSER_PERMISSIONS = frozenset({"all", "*"})
+WILDCARD_ACTION = "all"
+
+
+class CompiledPermissions:
+    """Immutable, pre-expanded view of a role's permissions"""
+
+    __slots__ = ("granted", "superuser")
+
+    def __init__(self, granted: FrozenSet[str], superuser: bool):
+        self.granted = granted
+        self.superuser = superuser
+
+    def allows(self, accepted: FrozenSet[str]) -> bool:
+        """True if any token in ``accepted`` is granted (see accepted_tokens)"""
+        return self.superuser or not self.granted.isdisjoint(accepted)
+
+    def __repr__(self):
+        return f"<CompiledPermissions(superuser={self.superuser}, granted={sorted(self.granted)})>"
+
+
+EMPTY_PERMISSIONS = CompiledPermissions(frozenset(), False)
+
+
+@lru_cache(maxsize=1024)
+def _compile(permissions: Tuple[str, ...]) -> CompiledPermissions:
+    granted = frozenset(p for p in permissions if isinstance(p, str))
+    return CompiledPermissions(granted, not granted.isdisjoint(SUPERUSER_PERMISSIONS))
+
+
+def compile_permissions(permissions) -> CompiledPermissions:
+    """
+    Compile a Role.permissions value (list, JSON string or None).
+    Results are memoised on the permission list, so each role version is
+    compiled once per process.
+    """
+    if not permissions:
+        return EMPTY_PERMISSIONS
+    if isinstance(permissions, str):
+        try:
+            permissions = json.loads(permissions)
+        except ValueError:
+            return EMPTY_PERMISSIONS
+    if not isinstance(permissions, (list, tuple, set, frozenset)):
+        return EMPTY_PERMISSIONS
+    return _compile(tuple(sorted(p for p in permissions if isinstance(p, str))))
+
+
+def accepted_tokens(permission: str) -> FrozenSet[str]:
+    """Granted tokens that satisfy ``permission`` (itself plus its resource wildcard)"""
+    resource, _, action = permission.partition(":")
+    if action and action != WILDCARD_ACTION:
+        return frozenset({permission, f"{resource}:{WILDCARD_ACTION}"})
+    return frozenset({permission})
+
+
+def accepted_any(permissions: Iterable[str]) -> FrozenSet[str]:
+    """Union of accepted tokens for an any-of requirement"""
+    accepted = set()
+    for permission in permissions:
+        accepted |= accepted_tokens(permission)
+    return frozenset(accepted)
+
+
+def get_compiled_permissions(user: Optional[dict]) -> CompiledPermissions:
+    """Compiled permissions of a principal dict, compiling on demand"""
+    if not user:
+        return EMPTY_PERMISSIONS
+    compiled = user.get("compiled_permissions")
+    if compiled is None:
+        compiled = compile_permissions(user.get("permissions"))
+    return compiled
@@ -0,0 +1,161 @@
+"""
+In-process prefix index for typeahead lookups
+
+Terms are kept in one sorted list of (term, key) pairs. A lookup bisects
+to the first term >= the prefix and scans while terms still start with
+it, so the cost is O(log n + matches scanned) with no per-character
+nodes to allocate. Each entry is indexed under its full text and under
+the suffix starting at every later word, so "corp" finds "Tech Corp Ltd".
+
+Writers take a lock; readers grab the current state reference and never
+block. ``replace_all`` rebuilds off to the side and replays writes that
+happened during the rebuild before swapping the new state in.
+"""
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+_WORD_START = re.compile(r"(?<![\w])\w")
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def terms_for(*texts: Optional[str]) -> Dict[str, bool]:
+    """
+    Index terms for ``texts``: each text from every word start onwards,
+    mapped to whether the term is a whole text (ranked first on a match)
+    """
+    terms: Dict[str, bool] = {}
+    for text in texts:
+        if not text:
+            continue
+        text = normalize(text)
+        for match in _WORD_START.finditer(text):
+            start = match.start()
+            terms[text[start:]] = terms.get(text[start:], False) or start == 0
+    return terms
+
+
+class _State:
+    __slots__ = ("terms", "entries")
+
+    def __init__(self):
+        self.terms: List[Tuple[str, Hashable]] = []
+        self.entries: Dict[Hashable, Tuple[Dict[str, bool], Any]] = {}
+
+    def add(self, key, terms: Dict[str, bool], payload):
+        self.remove(key)
+        self.entries[key] = (terms, payload)
+        for term in terms:
+            insort(self.terms, (term, key))
+
+    def remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for term in entry[0]:
+            i = bisect_left(self.terms, (term, key))
+            if i < len(self.terms) and self.terms[i] == (term, key):
+                del self.terms[i]
+
+
+class PrefixIndex:
+    """Maps entry keys to payloads, searchable by term prefix"""
+
+    def __init__(self):
+        self._state = _State()
+        self._lock = threading.Lock()
+        self._journal: Optional[List[tuple]] = None
+        self.last_build_ms = 0.0
+
+    def __len__(self):
+        return len(self._state.entries)
+
+    def add(self, key: Hashable, terms: Dict[str, bool], payload: Any):
+        """Insert or replace ``key``"""
+        with self._lock:
+            self._state.add(key, terms, payload)
+            if self._journal is not None:
+                self._journal.append((key, terms, payload))
+
+    def remove(self, key: Hashable):
+        with self._lock:
+            self._state.remove(key)
+            if self._journal is not None:
+                self._journal.append((key, None, None))
+
+    def replace_all(self, load: Callable[[], Iterable[Tuple[Hashable, Dict[str, bool], Any]]]):
+        """Rebuild from ``load()`` (key, terms, payload) triples, keeping concurrent writes"""
+        start = time.perf_counter()
+        with self._lock:
+            self._journal = []
+        try:
+            state = _State()
+            pairs = []
+            for key, terms, payload in load():
+                state.entries[key] = (terms, payload)
+                pairs.extend((term, key) for term in terms)
+            pairs.sort()
+            state.terms = pairs
+
+            with self._lock:
+                for key, terms, payload in self._journal:
+                    if terms is None:
+                        state.remove(key)
+                    else:
+                        state.add(key, terms, payload)
+                self._state = state
+        finally:
+            with self._lock:
+                self._journal = None
+        self.last_build_ms = (time.perf_counter() - start) * 1000
+
+    def search(
+        self,
+        prefix: str,
+        limit: int = 10,
+        accept: Optional[Callable[[Any], bool]] = None,
+        scan_limit: int = 200,
+    ) -> List[Any]:
+        """
+        Up to ``limit`` payloads matching ``prefix``: entries whose whole
+        text starts with it first, then word-start matches. At most
+        ``scan_limit`` terms are examined.
+        """
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        state = self._state
+        terms = state.terms
+        i = bisect_left(terms, (prefix,))
+        end = min(len(terms), i + scan_limit)
+
+        seen = set()
+        leading, other = [], []
+        while i < end and len(leading) < limit:
+            term, key = terms[i]
+            i += 1
+            if not term.startswith(prefix):
+                break
+            entry = state.entries.get(key)
+            if entry is None or key in seen or (accept is not None and not accept(entry[1])):
+                continue
+            if entry[0].get(term):
+                seen.add(key)
+                leading.append(entry[1])
+            elif len(other) < limit:
+                # A later whole-text term may still promote this entry
+                other.append((key, entry[1]))
+
+        results = leading
+        for key, payload in other:
+            if len(results) >= limit:
+                break
+            if key not in seen:
+                seen.add(key)
+                results.append(payload)
+        return results
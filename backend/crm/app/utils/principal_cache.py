@@ -0,0 +1,104 @@
+"""
+In-process cache of authenticated principals
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+from ..config import settings
+
+
+class PrincipalCache:
+    """
+    LRU cache with per-entry TTL for the principal dicts built by
+    get_current_user. Keyed by user id.
+
+    The cache is per process, so writes on one worker only invalidate that
+    worker's copy; the TTL bounds how stale the other workers can be.
+    """
+
+    def __init__(self, ttl_seconds: int = 60, max_size: int = 10000, enabled: bool = True):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self.enabled = enabled
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached principal or None on miss/expiry"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, principal = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return dict(principal)
+
+    def set(self, user_id: int, principal: Dict[str, Any]):
+        """Store a principal, evicting the least recently used entry if full"""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl_seconds, dict(principal))
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id: int):
+        """Drop a single user's principal"""
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        """Drop every cached principal (e.g. after a role permission change)"""
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    enabled=settings.PRINCIPAL_CACHE_ENABLED,
+)
+
+# Short-lived user id -> {"token_version": n} lookups for self-contained tokens
+token_version_cache = PrincipalCache(
+    ttl_seconds=settings.TOKEN_VERSION_CACHE_TTL_SECONDS,
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    enabled=settings.TOKEN_VERSION_CACHE_TTL_SECONDS > 0,
+)
@@ -0,0 +1,287 @@
+"""
+Tag-invalidated cache of rendered GET responses
+
+Endpoints look up a response by namespace + query parameters + the
+caller's permission scope, and on a miss store the rendered JSON bytes.
+Every entry is tagged with the entities it was built from ("companies",
+"contacts", ...). Tags are versioned: the versions current at lookup time
+are part of the key, so invalidating a tag (incrementing its version)
+makes every entry built from it unreachable at once, and a response
+rendered from data that was written mid-request is stored under the old,
+already dead, versions.
+
+Services register which models feed which tags (``track``); versions are
+bumped once a transaction writing those models commits. Core writes that
+bypass the ORM call ``invalidate`` themselves.
+
+Backends:
+    memory  per-process LRU; invalidations on one worker reach the other
+            workers only through the TTL
+    redis   shared by all workers (RESPONSE_CACHE_REDIS_URL); Redis errors
+            are counted and treated as misses
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import orjson
+from fastapi.responses import Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..serializers import dumps
+from .permissions import get_compiled_permissions
+
+try:
+    import redis
+except ImportError:  # optional: only needed for RESPONSE_CACHE_BACKEND=redis
+    redis = None
+
+
+class MemoryCacheBackend:
+    """In-process LRU with per-entry expiry and tag version counters"""
+
+    name = "memory"
+
+    def __init__(self, max_size: int = 5000):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl_seconds: int):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def tag_versions(self, tags: Sequence[str]) -> List[int]:
+        versions = self._versions
+        return [versions.get(tag, 0) for tag in tags]
+
+    def bump(self, tags: Iterable[str]):
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+
+    def close(self):
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"size": len(self._entries), "max_size": self.max_size, "evictions": self.evictions}
+
+
+class RedisCacheBackend:
+    """Entries and tag versions in Redis, shared across worker processes"""
+
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "crm:response:"):
+        self.url = url
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url, socket_timeout=0.25, socket_connect_timeout=0.25)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl_seconds: int):
+        self._client.set(self.prefix + key, value, ex=ttl_seconds)
+
+    def tag_versions(self, tags: Sequence[str]) -> List[int]:
+        values = self._client.mget([f"{self.prefix}tag:{tag}" for tag in tags])
+        return [int(value) if value is not None else 0 for value in values]
+
+    def bump(self, tags: Iterable[str]):
+        pipe = self._client.pipeline(transaction=False)
+        for tag in tags:
+            pipe.incr(f"{self.prefix}tag:{tag}")
+        pipe.execute()
+
+    def close(self):
+        self._client.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"url": self.url.rsplit("@", 1)[-1]}
+
+
+class CachedLookup:
+    """Result of ResponseCache.lookup: a hit to return or a key to store under"""
+
+    __slots__ = ("cache", "key", "value")
+
+    def __init__(self, cache: "ResponseCache", key: Optional[str], value: Optional[bytes]):
+        self.cache = cache
+        self.key = key
+        self.value = value
+
+    @property
+    def hit(self) -> bool:
+        return self.value is not None
+
+    def response(self) -> Response:
+        return Response(self.value, media_type="application/json", headers={"X-Cache": "HIT"})
+
+    def store(self, content: Any) -> Response:
+        """Render ``content``, cache it and return it as the response"""
+        body = dumps(content)
+        if self.key is not None:
+            self.cache._set(self.key, body)
+        return Response(body, media_type="application/json", headers={"X-Cache": "MISS"})
+
+
+class ResponseCache:
+    """Tag-versioned response cache over a pluggable backend"""
+
+    def __init__(self, backend, ttl_seconds: int = 60, enabled: bool = True):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        # Model -> tags invalidated when a transaction writing it commits
+        self.tracked: Dict[type, tuple] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    def track(self, model: type, *tags: str):
+        """Invalidate ``tags`` whenever a transaction writing ``model`` commits"""
+        self.tracked[model] = tuple(dict.fromkeys(self.tracked.get(model, ()) + tags))
+
+    @staticmethod
+    def scope(user: Optional[dict]) -> str:
+        """Cache scope of a principal: users with the same permissions share entries"""
+        compiled = get_compiled_permissions(user)
+        if compiled.superuser:
+            return "superuser"
+        return hashlib.blake2b(
+            "\n".join(sorted(compiled.granted)).encode(), digest_size=8
+        ).hexdigest()
+
+    def lookup(self, namespace: str, user: Optional[dict], tags: Sequence[str], **params) -> CachedLookup:
+        """Find the cached response for ``namespace`` + ``params`` in ``user``'s scope"""
+        if not self.enabled:
+            return CachedLookup(self, None, None)
+        try:
+            versions = self.backend.tag_versions(tags)
+            key = "|".join((
+                namespace,
+                self.scope(user),
+                ".".join(f"{tag}{version}" for tag, version in zip(tags, versions)),
+                hashlib.blake2b(
+                    orjson.dumps(params, option=orjson.OPT_SORT_KEYS, default=str), digest_size=12
+                ).hexdigest(),
+            ))
+            value = self.backend.get(key)
+        except Exception as e:
+            self._error(e)
+            return CachedLookup(self, None, None)
+
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return CachedLookup(self, key, value)
+
+    def _set(self, key: str, value: bytes):
+        try:
+            self.backend.set(key, value, self.ttl_seconds)
+        except Exception as e:
+            self._error(e)
+
+    def invalidate(self, *tags: str):
+        """Make every entry tagged with any of ``tags`` unreachable"""
+        if not tags:
+            return
+        try:
+            self.backend.bump(tags)
+            with self._lock:
+                self.invalidations += 1
+        except Exception as e:
+            # Stale entries still expire after ttl_seconds
+            self._error(e)
+
+    def _error(self, e: Exception):
+        with self._lock:
+            self.errors += 1
+            first = self.errors == 1
+        if first:
+            print(f"❌ Response cache backend error (further errors only counted): {e}")
+
+    def close(self):
+        self.backend.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "enabled": self.enabled,
+                "backend": self.backend.name,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "errors": self.errors,
+            }
+        stats.update(self.backend.stats())
+        return stats
+
+
+def _build_backend():
+    if settings.RESPONSE_CACHE_BACKEND == "redis":
+        if redis is not None:
+            return RedisCacheBackend(settings.RESPONSE_CACHE_REDIS_URL)
+        print("❌ RESPONSE_CACHE_BACKEND=redis but the redis package is not installed, using memory")
+    return MemoryCacheBackend(settings.RESPONSE_CACHE_MAX_SIZE)
+
+
+response_cache = ResponseCache(
+    _build_backend(),
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+    enabled=settings.RESPONSE_CACHE_TTL_SECONDS > 0,
+)
+
+
+# Collect the tags a transaction's writes invalidate, bump them once it commits
+@event.listens_for(Session, "after_flush")
+def _collect_cache_tags(session, flush_context):
+    tracked = response_cache.tracked
+    if not tracked:
+        return
+    tags = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        tags.update(tracked.get(type(obj), ()))
+    if tags:
+        session.info.setdefault("response_cache_tags", set()).update(tags)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_cache_tags(session):
+    tags = session.info.pop("response_cache_tags", None)
+    if tags:
+        response_cache.invalidate(*sorted(tags))
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_cache_tags(session):
+    session.info.pop("response_cache_tags", None)
@@ -0,0 +1,636 @@
+"""
+Pluggable document storage
+
+Uploads are streamed from the request's spooled file to the backend in
+STORAGE_CHUNK_SIZE chunks while their SHA-256 and size are computed
+incrementally, so no whole file is held in memory:
+
+    local   files under STORAGE_LOCAL_ROOT, written to a temporary file
+            next to the target and renamed into place once complete
+    s3      S3 compatible object store (the MinIO service in
+            docker-compose.yml); files larger than S3_PART_SIZE go up as
+            a multipart upload, so memory is bounded by one part
+
+Downloads stream the object, or the byte range a Range header asks for
+(206 Partial Content), STORAGE_CHUNK_SIZE bytes at a time.
+
+Both backends also take multipart uploads (services/upload_sessions.py):
+parts arrive separately and in any order, possibly in parallel, and are
+committed as one object at the end. Local parts are files under
+"<root>/.multipart/<upload id>/", concatenated on completion; on S3 they
+are the parts of a native multipart upload.
+
+Keys are "<entity>/<id>/<random>-<file name>": never reused, so an
+object's ETag stays valid for as long as the object exists.
+"""
+import asyncio
+import hashlib
+import mimetypes
+import os
+import re
+import shutil
+import tempfile
+import threading
+import uuid
+from stat import S_ISREG
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from urllib.parse import quote
+
+from fastapi import UploadFile
+from fastapi.responses import Response, StreamingResponse
+
+from ..config import settings
+from .etag import etag_matches, not_modified
+
+try:
+    import boto3
+    from botocore.config import Config as BotoConfig
+    from botocore.exceptions import ClientError
+except ImportError:  # optional: only needed for STORAGE_BACKEND=s3
+    boto3 = None
+
+
+class StorageError(Exception):
+    """The storage backend failed"""
+
+
+class ObjectNotFound(StorageError):
+    """No object is stored under the key"""
+
+
+class UploadTooLarge(StorageError):
+    """The upload is larger than STORAGE_MAX_UPLOAD_BYTES"""
+
+
+class PartSizeMismatch(StorageError):
+    """A multipart upload part is not the size the upload expects"""
+
+
+class RangeNotSatisfiable(Exception):
+    """A Range header that lies outside the object"""
+
+
+class StoredObject(NamedTuple):
+    key: str
+    size: int
+    sha256: str
+    content_type: str
+
+
+class ObjectInfo(NamedTuple):
+    size: int
+    content_type: str
+    etag: str
+
+
+class UploadedPart(NamedTuple):
+    number: int
+    size: int
+    etag: str
+
+
+_UNSAFE_NAME = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def is_valid_key(key: str) -> bool:
+    """
+    True unless a segment of ``key`` is empty, starts with "." (".", ".."
+    and the backend's own temporary / multipart files) or holds a
+    backslash or NUL. document_key never produces such keys.
+    """
+    return all(
+        segment and not segment.startswith(".") and "\\" not in segment and "\0" not in segment
+        for segment in key.split("/")
+    )
+
+
+def document_key(prefix: str, filename: Optional[str]) -> str:
+    """A new key under ``prefix`` ending in a sanitized ``filename``"""
+    name = _UNSAFE_NAME.sub("_", os.path.basename(filename or "")).strip("._")[:100] or "file"
+    key = f"{prefix}/{uuid.uuid4().hex[:16]}-{name}"
+    if not is_valid_key(key):
+        raise ValueError(f"Invalid document prefix: {prefix!r}")
+    return key
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Inclusive (start, end) of a single "bytes=" range; None when the whole
+    object should be sent (no header, several ranges, or a malformed one)
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    spec = header[len("bytes="):].strip()
+    if "," in spec:
+        return None
+    first, separator, last = spec.partition("-")
+    if not separator:
+        return None
+    try:
+        if first == "":
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length <= 0 or size == 0:
+                raise RangeNotSatisfiable(header)
+            return max(size - length, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable(header)
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+class HashingReader:
+    """Reads a binary file in chunks, computing its SHA-256 and size as it goes"""
+
+    def __init__(self, file, chunk_size: int, max_bytes: int = 0):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._digest = hashlib.sha256()
+
+    def chunks(self) -> Iterator[bytes]:
+        while True:
+            chunk = self.file.read(self.chunk_size)
+            if not chunk:
+                return
+            self.size += len(chunk)
+            if self.max_bytes and self.size > self.max_bytes:
+                raise UploadTooLarge(f"Files can be at most {self.max_bytes} bytes")
+            self._digest.update(chunk)
+            yield chunk
+
+    @property
+    def sha256(self) -> str:
+        return self._digest.hexdigest()
+
+
+class LocalStorageBackend:
+    """Files under a root directory"""
+
+    name = "local"
+    # Smallest multipart part other than the last
+    min_part_size = 1
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def _path(self, key: str) -> str:
+        if not is_valid_key(key):
+            raise ObjectNotFound(key)
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ObjectNotFound(key)
+        return path
+
+    def start(self):
+        os.makedirs(self.root, exist_ok=True)
+
+    def put(self, key: str, chunks: Iterable[bytes], content_type: str):
+        path = self._path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temporary = tempfile.mkstemp(dir=directory, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    def info(self, key: str) -> Optional[ObjectInfo]:
+        try:
+            stat = os.stat(self._path(key))
+        except (FileNotFoundError, NotADirectoryError, ObjectNotFound):
+            return None
+        # Directories (e.g. a key naming a prefix) aren't objects
+        if not S_ISREG(stat.st_mode):
+            return None
+        content_type = mimetypes.guess_type(key)[0] or "application/octet-stream"
+        return ObjectInfo(stat.st_size, content_type, f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"')
+
+    def iter_range(self, key: str, start: int, end: int, chunk_size: int) -> Iterator[bytes]:
+        with open(self._path(key), "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(chunk_size, remaining))
+                if not chunk:
+                    return
+                remaining -= len(chunk)
+                yield chunk
+
+    def delete(self, key: str):
+        try:
+            os.unlink(self._path(key))
+        except (FileNotFoundError, ObjectNotFound):
+            pass
+
+    # Multipart uploads
+
+    def _parts_dir(self, upload_id: str) -> str:
+        if not re.fullmatch(r"[0-9a-f]{32}", upload_id):
+            raise ObjectNotFound(upload_id)
+        return os.path.join(self.root, ".multipart", upload_id)
+
+    def create_multipart(self, key: str, content_type: str) -> str:
+        upload_id = uuid.uuid4().hex
+        os.makedirs(self._parts_dir(upload_id))
+        return upload_id
+
+    def put_part(self, key: str, upload_id: str, number: int, file, size: int) -> str:
+        directory = self._parts_dir(upload_id)
+        if not os.path.isdir(directory):
+            raise ObjectNotFound(upload_id)
+        fd, temporary = tempfile.mkstemp(dir=directory, prefix=".part-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                shutil.copyfileobj(file, f, 1024 * 1024)
+            os.replace(temporary, os.path.join(directory, f"{number:05d}"))
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        return ""
+
+    def list_parts(self, key: str, upload_id: str) -> List[UploadedPart]:
+        directory = self._parts_dir(upload_id)
+        try:
+            names = [name for name in os.listdir(directory) if name.isdigit()]
+        except FileNotFoundError:
+            raise ObjectNotFound(upload_id)
+        return sorted(
+            UploadedPart(int(name), os.stat(os.path.join(directory, name)).st_size, "")
+            for name in names
+        )
+
+    def complete_multipart(self, key: str, upload_id: str, parts: List[UploadedPart]) -> Optional[str]:
+        """Concatenate the parts into ``key``; returns the object's SHA-256"""
+        directory = self._parts_dir(upload_id)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        digest = hashlib.sha256()
+        fd, temporary = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for part in parts:
+                    with open(os.path.join(directory, f"{part.number:05d}"), "rb") as f:
+                        while True:
+                            chunk = f.read(1024 * 1024)
+                            if not chunk:
+                                break
+                            digest.update(chunk)
+                            out.write(chunk)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        shutil.rmtree(directory, ignore_errors=True)
+        return digest.hexdigest()
+
+    def abort_multipart(self, key: str, upload_id: str):
+        shutil.rmtree(self._parts_dir(upload_id), ignore_errors=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"root": self.root}
+
+
+class S3StorageBackend:
+    """Objects in an S3 compatible bucket (AWS S3, MinIO)"""
+
+    name = "s3"
+    min_part_size = 5 * 1024 * 1024
+
+    def __init__(
+        self,
+        endpoint_url: str,
+        access_key: str,
+        secret_key: str,
+        bucket: str,
+        region: str,
+        part_size: int,
+    ):
+        self.endpoint_url = endpoint_url
+        self.bucket = bucket
+        # S3 parts other than the last must be at least 5MiB
+        self.part_size = max(part_size, self.min_part_size)
+        self._client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url or None,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key,
+            region_name=region,
+            config=BotoConfig(signature_version="s3v4", s3={"addressing_style": "path"}),
+        )
+
+    def start(self):
+        try:
+            self._client.head_bucket(Bucket=self.bucket)
+        except ClientError:
+            self._client.create_bucket(Bucket=self.bucket)
+
+    def put(self, key: str, chunks: Iterable[bytes], content_type: str):
+        buffer = bytearray()
+        chunks = iter(chunks)
+        # Small files (most documents) in a single PUT
+        for chunk in chunks:
+            buffer += chunk
+            if len(buffer) >= self.part_size:
+                break
+        else:
+            self._client.put_object(
+                Bucket=self.bucket, Key=key, Body=bytes(buffer), ContentType=content_type
+            )
+            return
+
+        upload_id = self._client.create_multipart_upload(
+            Bucket=self.bucket, Key=key, ContentType=content_type
+        )["UploadId"]
+        parts = []
+        try:
+            for chunk in chunks:
+                if len(buffer) >= self.part_size:
+                    parts.append(self._upload_part(key, upload_id, len(parts) + 1, buffer))
+                    buffer = bytearray()
+                buffer += chunk
+            parts.append(self._upload_part(key, upload_id, len(parts) + 1, buffer))
+            self._client.complete_multipart_upload(
+                Bucket=self.bucket, Key=key, UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        except BaseException:
+            self._client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+            raise
+
+    def _upload_part(self, key: str, upload_id: str, number: int, body: bytearray) -> dict:
+        response = self._client.upload_part(
+            Bucket=self.bucket, Key=key, UploadId=upload_id, PartNumber=number, Body=bytes(body)
+        )
+        return {"PartNumber": number, "ETag": response["ETag"]}
+
+    def info(self, key: str) -> Optional[ObjectInfo]:
+        try:
+            head = self._client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return ObjectInfo(
+            head["ContentLength"],
+            head.get("ContentType") or "application/octet-stream",
+            head["ETag"],
+        )
+
+    def iter_range(self, key: str, start: int, end: int, chunk_size: int) -> Iterator[bytes]:
+        try:
+            body = self._client.get_object(
+                Bucket=self.bucket, Key=key, Range=f"bytes={start}-{end}"
+            )["Body"]
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+                raise ObjectNotFound(key)
+            raise
+        try:
+            yield from body.iter_chunks(chunk_size)
+        finally:
+            body.close()
+
+    def delete(self, key: str):
+        self._client.delete_object(Bucket=self.bucket, Key=key)
+
+    # Multipart uploads
+
+    def create_multipart(self, key: str, content_type: str) -> str:
+        return self._client.create_multipart_upload(
+            Bucket=self.bucket, Key=key, ContentType=content_type
+        )["UploadId"]
+
+    def put_part(self, key: str, upload_id: str, number: int, file, size: int) -> str:
+        try:
+            return self._client.upload_part(
+                Bucket=self.bucket, Key=key, UploadId=upload_id, PartNumber=number,
+                Body=file, ContentLength=size,
+            )["ETag"]
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "NoSuchUpload":
+                raise ObjectNotFound(upload_id)
+            raise
+
+    def list_parts(self, key: str, upload_id: str) -> List[UploadedPart]:
+        parts = []
+        try:
+            pages = self._client.get_paginator("list_parts").paginate(
+                Bucket=self.bucket, Key=key, UploadId=upload_id
+            )
+            for page in pages:
+                parts.extend(
+                    UploadedPart(part["PartNumber"], part["Size"], part["ETag"])
+                    for part in page.get("Parts", [])
+                )
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "NoSuchUpload":
+                raise ObjectNotFound(upload_id)
+            raise
+        return sorted(parts)
+
+    def complete_multipart(self, key: str, upload_id: str, parts: List[UploadedPart]) -> Optional[str]:
+        """Commit the parts as ``key``; the object isn't re-read, so no SHA-256"""
+        self._client.complete_multipart_upload(
+            Bucket=self.bucket, Key=key, UploadId=upload_id,
+            MultipartUpload={"Parts": [{"PartNumber": part.number, "ETag": part.etag} for part in parts]},
+        )
+        return None
+
+    def abort_multipart(self, key: str, upload_id: str):
+        try:
+            self._client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") != "NoSuchUpload":
+                raise
+
+    def stats(self) -> Dict[str, Any]:
+        return {"endpoint_url": self.endpoint_url, "bucket": self.bucket, "part_size": self.part_size}
+
+
+class DocumentStorage:
+    """Streaming uploads and ranged downloads over a storage backend"""
+
+    def __init__(self, backend, chunk_size: int = 1024 * 1024, max_upload_bytes: int = 0):
+        self.backend = backend
+        self.chunk_size = chunk_size
+        self.max_upload_bytes = max_upload_bytes
+        self._lock = threading.Lock()
+        self.uploads = 0
+        self.parts = 0
+        self.uploaded_bytes = 0
+        self.downloads = 0
+        self.errors = 0
+
+    async def start(self):
+        """Create the local root / bucket; a failure is reported, not raised"""
+        try:
+            await asyncio.to_thread(self.backend.start)
+            print(f"✅ Document storage ready ({self.backend.name})")
+        except Exception as e:
+            print(f"❌ Document storage ({self.backend.name}) not ready: {e}")
+
+    def save(self, file, key: str, content_type: Optional[str] = None) -> StoredObject:
+        """Stream a binary file object to ``key``"""
+        content_type = (
+            content_type or mimetypes.guess_type(key)[0] or "application/octet-stream"
+        )
+        reader = HashingReader(file, self.chunk_size, self.max_upload_bytes)
+        try:
+            self.backend.put(key, reader.chunks(), content_type)
+        except UploadTooLarge:
+            raise
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            raise StorageError(f"Could not store {key}: {e}") from e
+        with self._lock:
+            self.uploads += 1
+            self.uploaded_bytes += reader.size
+        return StoredObject(key, reader.size, reader.sha256, content_type)
+
+    async def save_upload(self, upload: UploadFile, key: str) -> StoredObject:
+        """Stream an UploadFile (spooled by Starlette) to ``key`` off the event loop"""
+        await upload.seek(0)
+        return await asyncio.to_thread(self.save, upload.file, key, upload.content_type)
+
+    async def delete(self, key: str):
+        await asyncio.to_thread(self.backend.delete, key)
+
+    async def save_part(
+        self,
+        key: str,
+        upload_id: str,
+        number: int,
+        stream: AsyncIterator[bytes],
+        expected_size: int,
+    ) -> str:
+        """
+        Store one part of a multipart upload from a request body stream of
+        exactly ``expected_size`` bytes; returns the part's SHA-256. The
+        body is spooled to a temporary file (in memory up to
+        STORAGE_CHUNK_SIZE) so the backend gets a seekable part of known
+        length.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        with tempfile.SpooledTemporaryFile(max_size=self.chunk_size) as spool:
+            async for chunk in stream:
+                size += len(chunk)
+                if size > expected_size:
+                    raise PartSizeMismatch(f"Part {number} must be {expected_size} bytes")
+                digest.update(chunk)
+                spool.write(chunk)
+            if size != expected_size:
+                raise PartSizeMismatch(f"Part {number} must be {expected_size} bytes, got {size}")
+            spool.seek(0)
+            try:
+                await asyncio.to_thread(self.backend.put_part, key, upload_id, number, spool, size)
+            except ObjectNotFound:
+                raise
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                raise StorageError(f"Could not store part {number} of {key}: {e}") from e
+        with self._lock:
+            self.parts += 1
+            self.uploaded_bytes += size
+        return digest.hexdigest()
+
+    def complete_multipart(self, key: str, upload_id: str, parts: List[UploadedPart]) -> Optional[str]:
+        """Commit a multipart upload's parts as ``key``; the SHA-256 when the backend computes one"""
+        try:
+            sha256 = self.backend.complete_multipart(key, upload_id, parts)
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            raise StorageError(f"Could not assemble {key}: {e}") from e
+        with self._lock:
+            self.uploads += 1
+        return sha256
+
+    async def download(
+        self,
+        key: str,
+        range_header: Optional[str] = None,
+        if_none_match: Optional[str] = None,
+        filename: Optional[str] = None,
+    ) -> Response:
+        """
+        Streaming response for ``key``: 206 for a satisfiable Range, 416
+        for one outside the object, 304 when If-None-Match matches
+        """
+        if not is_valid_key(key):
+            raise ObjectNotFound(key)
+        info = await asyncio.to_thread(self.backend.info, key)
+        if info is None:
+            raise ObjectNotFound(key)
+        if etag_matches(if_none_match, info.etag):
+            return not_modified(info.etag)
+
+        headers = {"Accept-Ranges": "bytes", "ETag": info.etag}
+        if filename:
+            headers["Content-Disposition"] = f"attachment; filename*=utf-8''{quote(filename)}"
+        try:
+            byte_range = parse_range(range_header, info.size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{info.size}"})
+
+        start, end = byte_range or (0, info.size - 1)
+        if byte_range:
+            headers["Content-Range"] = f"bytes {start}-{end}/{info.size}"
+        headers["Content-Length"] = str(end - start + 1)
+        with self._lock:
+            self.downloads += 1
+        return StreamingResponse(
+            self.backend.iter_range(key, start, end, self.chunk_size) if end >= start else iter(()),
+            status_code=206 if byte_range else 200,
+            media_type=info.content_type,
+            headers=headers,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = {
+                "backend": self.backend.name,
+                "uploads": self.uploads,
+                "parts": self.parts,
+                "uploaded_bytes": self.uploaded_bytes,
+                "downloads": self.downloads,
+                "errors": self.errors,
+                "max_upload_bytes": self.max_upload_bytes,
+            }
+        stats.update(self.backend.stats())
+        return stats
+
+
+def _build_backend():
+    if settings.STORAGE_BACKEND == "s3":
+        if boto3 is not None:
+            return S3StorageBackend(
+                settings.S3_ENDPOINT_URL,
+                settings.S3_ACCESS_KEY,
+                settings.S3_SECRET_KEY,
+                settings.S3_BUCKET,
+                settings.S3_REGION,
+                settings.S3_PART_SIZE,
+            )
+        print("❌ STORAGE_BACKEND=s3 but the boto3 package is not installed, using local storage")
+    return LocalStorageBackend(settings.STORAGE_LOCAL_ROOT)
+
+
+storage = DocumentStorage(
+    _build_backend(),
+    chunk_size=settings.STORAGE_CHUNK_SIZE,
+    max_upload_bytes=settings.STORAGE_MAX_UPLOAD_BYTES,
+)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Load test: list endpoint throughput under concurrency
+
+Fires CONCURRENCY parallel GETs at each list endpoint for DURATION seconds
+and reports req/s and latency percentiles. Run once against a server
+started with DATABASE_ASYNC=false and once with DATABASE_ASYNC=true to
+compare the sync and AsyncSession data paths.
+
+Usage (against a running server):
+    python benchmarks/bench_list_throughput.py --base-url http://localhost:8000 \
+        --concurrency 32 --duration 10
+"""
+import argparse
+import statistics
+import threading
+import time
+
+import requests
+
+ENDPOINTS = [
+    "/api/leads/",
+    "/api/opportunities/",
+    "/api/contacts/",
+    "/api/companies/",
+    "/api/users/",
+]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def login(base_url, username, password):
+    response = requests.post(
+        f"{base_url}/api/login",
+        json={"email_or_username": username, "password": password},
+        timeout=60,
+    )
+    response.raise_for_status()
+    return response.json()["data"]["token"]
+
+
+def hammer(url, headers, deadline, samples, statuses, lock):
+    session = requests.Session()
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = session.get(url, headers=headers, timeout=60)
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            samples.append(elapsed)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+
+def run_endpoint(base_url, path, headers, concurrency, duration):
+    samples, statuses = [], {}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(
+            target=hammer, args=(f"{base_url}{path}", headers, deadline, samples, statuses, lock)
+        )
+        for _ in range(concurrency)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{path:<22} n={len(samples):<6} {len(samples) / elapsed:8.1f} req/s "
+        f"p50={statistics.median(samples):8.2f}ms "
+        f"p99={percentile(samples, 99):8.2f}ms statuses={statuses}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--endpoint", action="append", help="Override the endpoint list")
+    args = parser.parse_args()
+
+    headers = {"Authorization": f"Bearer {login(args.base_url, args.username, args.password)}"}
+    for path in args.endpoint or ENDPOINTS:
+        run_endpoint(args.base_url, path, headers, args.concurrency, args.duration)
+
+
+if __name__ == "__main__":
+    main()
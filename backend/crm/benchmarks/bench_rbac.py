@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: legacy list-scan RBAC checks vs compiled permission checkers
+
+Run from backend/crm:
+    python benchmarks/bench_rbac.py
+"""
+import sys
+import os
+import asyncio
+import time
+
+# Add the crm app to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.dependencies.rbac import require_leads_read, require_opportunities_write
+from app.utils.permissions import compile_permissions
+
+ITERATIONS = 200_000
+
+ROLES = {
+    "admin": ["all"],
+    "sales": ["leads:read", "leads:write", "opportunities:read", "opportunities:write",
+              "contacts:read", "companies:read"],
+    "wide": [f"module{i}:read" for i in range(40)] + ["opportunities:all"],
+    "denied": ["reports:read"],
+}
+
+
+async def legacy_require_any_permission(permissions, current_user):
+    """Copy of the pre-compiler require_any_permission (minus the debug print)"""
+    user_permissions = current_user.get("permissions", [])
+    permissions.append("*")
+    if "all" in user_permissions:
+        return current_user
+    if not any(perm in user_permissions for perm in permissions):
+        raise PermissionError(permissions)
+    return current_user
+
+
+async def legacy_require_leads_read(current_user):
+    return await legacy_require_any_permission(["leads:read", "leads:all"], current_user)
+
+
+async def legacy_require_opportunities_write(current_user):
+    return await legacy_require_any_permission(
+        ["opportunities:write", "opportunities:all"], current_user
+    )
+
+
+async def run(checker, user):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        try:
+            await checker(user)
+        except Exception:
+            pass
+    return time.perf_counter() - start
+
+
+async def main():
+    print(f"{'role':<8} {'check':<22} {'legacy ns/op':>14} {'compiled ns/op':>16} {'speedup':>8}")
+    for role, permissions in ROLES.items():
+        legacy_user = {"id": 1, "permissions": permissions}
+        compiled_user = {
+            "id": 1,
+            "permissions": permissions,
+            "compiled_permissions": compile_permissions(permissions),
+        }
+        for name, legacy, compiled in (
+            ("leads:read", legacy_require_leads_read, require_leads_read),
+            ("opportunities:write", legacy_require_opportunities_write, require_opportunities_write),
+        ):
+            legacy_time = await run(legacy, legacy_user)
+            compiled_time = await run(compiled, compiled_user)
+            print(
+                f"{role:<8} {name:<22} "
+                f"{legacy_time / ITERATIONS * 1e9:>14.1f} "
+                f"{compiled_time / ITERATIONS * 1e9:>16.1f} "
+                f"{legacy_time / compiled_time:>7.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
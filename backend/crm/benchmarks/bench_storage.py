@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark: streaming document uploads and ranged downloads
+
+Writes a --size-mb file of random bytes, then for the configured storage
+backend (STORAGE_BACKEND, local by default):
+
+  * streams it through DocumentStorage.save (chunked, hashed as it goes)
+    and reports MB/s and the peak RSS growth,
+  * for comparison reads the whole file into memory and hashes it, which
+    is what handling the UploadFile with ``await file.read()`` costs,
+  * reads --ranges random 64KiB ranges and reports the p50 / p99 latency.
+
+Each upload strategy runs in its own process so peak RSS is comparable.
+
+Run from backend/crm:
+    STORAGE_LOCAL_ROOT=/tmp/bench-uploads python benchmarks/bench_storage.py --size-mb 512
+"""
+import sys
+import os
+import argparse
+import hashlib
+import multiprocessing
+import random
+import resource
+import statistics
+import tempfile
+import time
+
+# Add the crm app to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils.storage import storage, document_key
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def upload(path, mode, results):
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    with open(path, "rb") as f:
+        if mode == "stream":
+            stored = storage.save(f, document_key("bench", "upload.bin"))
+            key, digest = stored.key, stored.sha256
+        else:
+            body = f.read()
+            key, digest = None, hashlib.sha256(body).hexdigest()
+    results.put((key, digest, time.perf_counter() - start, peak_rss_mb() - baseline))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--ranges", type=int, default=1000)
+    args = parser.parse_args()
+
+    storage.backend.start()
+    # Measure the transfer, not the STORAGE_MAX_UPLOAD_BYTES limit
+    storage.max_upload_bytes = 0
+    size = args.size_mb * 1024 * 1024
+    context = multiprocessing.get_context("fork")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "upload.bin")
+        with open(path, "wb") as f:
+            for _ in range(args.size_mb):
+                f.write(os.urandom(1024 * 1024))
+
+        keys = []
+        for mode in ("stream", "read all"):
+            results = context.Queue()
+            process = context.Process(target=upload, args=(path, mode, results))
+            process.start()
+            key, digest, elapsed, rss_mb = results.get()
+            process.join()
+            keys.append(key)
+            print(
+                f"{mode:9} {args.size_mb}MB in {elapsed:.2f}s ({args.size_mb / elapsed:.0f} MB/s), "
+                f"RSS +{rss_mb:.0f}MB, sha256 {digest[:12]}"
+            )
+
+    key = keys[0]
+    rng = random.Random(3)
+    latencies = []
+    for _ in range(args.ranges):
+        start = rng.randrange(0, size - 65536)
+        began = time.perf_counter()
+        data = b"".join(storage.backend.iter_range(key, start, start + 65535, storage.chunk_size))
+        latencies.append(time.perf_counter() - began)
+        assert len(data) == 65536
+    latencies.sort()
+    print(
+        f"64KiB ranges: p50 {statistics.median(latencies) * 1e6:.0f}us "
+        f"p99 {latencies[int(len(latencies) * 0.99)] * 1e6:.0f}us"
+    )
+    storage.backend.delete(key)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark: multipart (upload session) parts vs one streamed upload
+
+Writes a --size-mb file of random bytes, then for the configured storage
+backend (STORAGE_BACKEND, local by default):
+
+  * streams it through DocumentStorage.save in one go, the direct
+    /upload path,
+  * sends it as --part-mb parts through DocumentStorage.save_part, the
+    PUT /api/uploads/{session}/parts/{n} path, with 1 and --workers parts
+    in flight (each body fed in 64KiB chunks as Starlette's request.stream()
+    would), then assembles them with complete_multipart,
+
+and reports MB/s, the assembly time and the longest single part, which is
+how long one request is busy; on a single streamed upload that is the
+whole file.
+
+Run from backend/crm:
+    STORAGE_LOCAL_ROOT=/tmp/bench-uploads python benchmarks/bench_upload_sessions.py --size-mb 512
+"""
+import sys
+import os
+import argparse
+import asyncio
+import hashlib
+import tempfile
+import time
+
+# Add the crm app to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils.storage import storage, document_key
+
+BODY_CHUNK = 64 * 1024
+
+
+async def body(path, offset, length):
+    with open(path, "rb") as f:
+        f.seek(offset)
+        remaining = length
+        while remaining:
+            chunk = f.read(min(BODY_CHUNK, remaining))
+            remaining -= len(chunk)
+            yield chunk
+
+
+async def upload_parts(path, size, part_size, workers):
+    key = document_key("bench", "parts.bin")
+    upload_id = storage.backend.create_multipart(key, "application/octet-stream")
+    count = -(-size // part_size)
+    semaphore = asyncio.Semaphore(workers)
+    durations = []
+
+    async def send(number):
+        offset = (number - 1) * part_size
+        length = min(part_size, size - offset)
+        async with semaphore:
+            began = time.perf_counter()
+            await storage.save_part(key, upload_id, number, body(path, offset, length), length)
+            durations.append(time.perf_counter() - began)
+
+    start = time.perf_counter()
+    # Send the parts in reverse to show order doesn't matter
+    await asyncio.gather(*(send(number) for number in range(count, 0, -1)))
+    transfer = time.perf_counter() - start
+    began = time.perf_counter()
+    parts = storage.backend.list_parts(key, upload_id)
+    digest = storage.complete_multipart(key, upload_id, parts)
+    assembly = time.perf_counter() - began
+    storage.backend.delete(key)
+    return transfer, assembly, max(durations), digest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--part-mb", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    storage.backend.start()
+    # Measure the transfer, not the STORAGE_MAX_UPLOAD_BYTES limit
+    storage.max_upload_bytes = 0
+    size = args.size_mb * 1024 * 1024
+    part_size = args.part_mb * 1024 * 1024
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "upload.bin")
+        expected = hashlib.sha256()
+        with open(path, "wb") as f:
+            for _ in range(args.size_mb):
+                block = os.urandom(1024 * 1024)
+                expected.update(block)
+                f.write(block)
+        expected = expected.hexdigest()
+
+        start = time.perf_counter()
+        with open(path, "rb") as f:
+            stored = storage.save(f, document_key("bench", "single.bin"))
+        elapsed = time.perf_counter() - start
+        storage.backend.delete(stored.key)
+        assert stored.sha256 == expected
+        print(
+            f"single upload   {args.size_mb}MB in {elapsed:.2f}s ({args.size_mb / elapsed:.0f} MB/s), "
+            f"one request busy {elapsed:.2f}s"
+        )
+
+        for workers in sorted({1, args.workers}):
+            transfer, assembly, longest, digest = asyncio.run(
+                upload_parts(path, size, part_size, workers)
+            )
+            total = transfer + assembly
+            print(
+                f"{workers} part(s) in flight: parts {transfer:.2f}s + assembly {assembly:.2f}s "
+                f"({args.size_mb / total:.0f} MB/s), longest part {longest * 1000:.0f}ms, "
+                f"sha256 {'ok' if digest in (expected, None) else 'MISMATCH'}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Load test: non-login latency while a burst of logins is in flight
+
+Measures p50/p99 of GET /health on its own, then again while LOGINS
+concurrent POST /api/login requests run. With bcrypt on the password
+hashing pool the two distributions should stay close; with bcrypt inline
+the health probes queue behind every ~250ms hash.
+
+Usage (against a running server):
+    python benchmarks/load_login_burst.py --base-url http://localhost:8000 \
+        --logins 200 --login-concurrency 50
+"""
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def probe(base_url, stop_event, samples, interval):
+    session = requests.Session()
+    while not stop_event.is_set():
+        start = time.perf_counter()
+        session.get(f"{base_url}/health", timeout=30)
+        samples.append((time.perf_counter() - start) * 1000)
+        time.sleep(interval)
+
+
+def measure_probes(base_url, duration, probes, interval, during=None):
+    samples = []
+    stop_event = threading.Event()
+    threads = [
+        threading.Thread(target=probe, args=(base_url, stop_event, samples, interval))
+        for _ in range(probes)
+    ]
+    for thread in threads:
+        thread.start()
+
+    if during is not None:
+        during()
+    else:
+        time.sleep(duration)
+
+    stop_event.set()
+    for thread in threads:
+        thread.join()
+    return samples
+
+
+def login_burst(base_url, logins, concurrency, username, password):
+    statuses = {}
+    lock = threading.Lock()
+
+    def login(_):
+        response = requests.post(
+            f"{base_url}/api/login",
+            json={"email_or_username": username, "password": password},
+            timeout=60,
+        )
+        with lock:
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(login, range(logins)))
+    elapsed = time.perf_counter() - start
+    print(f"Logins: {logins} in {elapsed:.2f}s ({logins / elapsed:.1f}/s), statuses={statuses}")
+
+
+def report(label, samples):
+    print(
+        f"{label:<14} n={len(samples):<6} "
+        f"p50={statistics.median(samples):8.2f}ms "
+        f"p99={percentile(samples, 99):8.2f}ms "
+        f"max={max(samples):8.2f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--login-concurrency", type=int, default=50)
+    parser.add_argument("--probes", type=int, default=4)
+    parser.add_argument("--probe-interval", type=float, default=0.01)
+    parser.add_argument("--baseline-seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    baseline = measure_probes(args.base_url, args.baseline_seconds, args.probes, args.probe_interval)
+    burst = measure_probes(
+        args.base_url, None, args.probes, args.probe_interval,
+        during=lambda: login_burst(
+            args.base_url, args.logins, args.login_concurrency, args.username, args.password
+        ),
+    )
+
+    report("baseline", baseline)
+    report("during logins", burst)
+    print(f"p99 ratio (burst / baseline): {percentile(burst, 99) / percentile(baseline, 99):.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,7 @@ import os
 # Add the crm app to Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
 
-from app.database.engine import engine
+from app.database.engine import get_engine, get_sessionmaker
 from sqlalchemy import inspect
 
 if __name__ == "__main__":
@@ -16,7 +16,7 @@ if __name__ == "__main__":
     
     try:
         # Get database inspector
-        inspector = inspect(engine)
+        inspector = inspect(get_engine())
         
         # Get all table names
         table_names = inspector.get_table_names()
@@ -34,10 +34,9 @@ if __name__ == "__main__":
             print(f"\n✅ All required tables present!")
         
         # Check sample data
-        from app.database.engine import SessionLocal
         from app.models import User, Role, Company, Lead, Opportunity
         
-        db = SessionLocal()
+        db = get_sessionmaker()()
         try:
             user_count = db.query(User).count()
             role_count = db.query(Role).count()